@@ -54,6 +54,25 @@
     });
   }
 
+  // Replace YouTube facades with the real player on click
+  function initVideoFacades() {
+    document.querySelectorAll('.yt-facade').forEach(function(facade) {
+      facade.addEventListener('click', function(e) {
+        e.preventDefault();
+        var iframe = document.createElement('iframe');
+        iframe.src = facade.getAttribute('data-embed');
+        iframe.title = facade.getAttribute('title') || '';
+        iframe.setAttribute('width', '100%');
+        iframe.setAttribute('height', '480');
+        iframe.setAttribute('frameborder', '0');
+        iframe.setAttribute('allow', 'accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share');
+        iframe.setAttribute('referrerpolicy', 'strict-origin-when-cross-origin');
+        iframe.setAttribute('allowfullscreen', '');
+        facade.parentNode.replaceChild(iframe, facade);
+      });
+    });
+  }
+
   // Initialize when DOM is ready
   if (document.readyState === 'loading') {
     document.addEventListener('DOMContentLoaded', function() {
@@ -64,6 +83,7 @@
       }
       window.addEventListener('scroll', toggleScrollUp);
       initMobileNav();
+      initVideoFacades();
     });
   } else {
     toggleScrollUp();
@@ -73,5 +93,6 @@
     }
     window.addEventListener('scroll', toggleScrollUp);
     initMobileNav();
+    initVideoFacades();
   }
 })();
@@ -0,0 +1,188 @@
+// Site search for FTTT Jekyll Site
+// Queries the static index built by search_index.py. The search box stays
+// hidden unless a HEAD request finds meta.json (builds without the index,
+// e.g. `jekyll serve`, show no box). Nothing else is downloaded until the box
+// is used; then only meta.json, the shards holding the query's tokens and the
+// doc chunks of the shown results are fetched.
+
+(function() {
+  'use strict';
+
+  // Must match CJK_CLASS / TOKEN_RE in search_index.py
+  var TOKEN = /([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+)|([a-z0-9]+)/g;
+  var MAX_RESULTS = 10;
+  var DEBOUNCE_MS = 200;
+
+  var cache = {};
+
+  // CJK bigrams (a lone CJK character stays a unigram) and Latin words
+  function tokenize(text) {
+    var normalized = (text.normalize ? text.normalize('NFKC') : text).toLowerCase();
+    var tokens = [];
+    var match;
+    TOKEN.lastIndex = 0;
+    while ((match = TOKEN.exec(normalized))) {
+      if (match[2]) {
+        tokens.push(match[2]);
+      } else if (match[1].length === 1) {
+        tokens.push(match[1]);
+      } else {
+        for (var i = 0; i + 1 < match[1].length; i++) {
+          tokens.push(match[1].substr(i, 2));
+        }
+      }
+    }
+    return tokens.filter(function(token, i) {
+      return tokens.indexOf(token) === i;
+    });
+  }
+
+  // FNV-1a, same as shard_of() in search_index.py
+  function shardOf(token, shards) {
+    var h = 0x811c9dc5;
+    for (var i = 0; i < token.length; i++) {
+      h = Math.imul(h ^ token.charCodeAt(i), 0x01000193) >>> 0;
+    }
+    return h % shards;
+  }
+
+  function fetchJson(url) {
+    if (!cache[url]) {
+      cache[url] = fetch(url).then(function(response) {
+        if (!response.ok) throw new Error(response.status + ' ' + url);
+        return response.json();
+      });
+    }
+    return cache[url];
+  }
+
+  // Decode flat [doc id delta, tf, ...] postings into {docId: tf}
+  function decode(flat) {
+    var docs = {};
+    var id = 0;
+    for (var i = 0; i < flat.length; i += 2) {
+      id += flat[i];
+      docs[id] = flat[i + 1];
+    }
+    return docs;
+  }
+
+  // Pages containing every token, ranked by tf * idf
+  function search(metaUrl, query) {
+    var tokens = tokenize(query);
+    if (!tokens.length) return Promise.resolve([]);
+
+    return fetchJson(metaUrl).then(function(meta) {
+      var base = new URL(metaUrl, location.href);
+      var fileUrl = function(name) { return new URL(name, base).href; };
+
+      return Promise.all(tokens.map(function(token) {
+        return fetchJson(fileUrl(meta.files.shards[shardOf(token, meta.shards)]))
+          .then(function(shard) {
+            // Tokens such as "constructor" must not match Object.prototype
+            return Object.prototype.hasOwnProperty.call(shard, token) ? decode(shard[token]) : {};
+          });
+      })).then(function(lists) {
+        var scores = null;
+        lists.forEach(function(docs) {
+          var ids = Object.keys(docs);
+          var idf = Math.log(1 + meta.pages / Math.max(1, ids.length));
+          var next = {};
+          ids.forEach(function(id) {
+            if (scores === null || id in scores) {
+              next[id] = (scores ? scores[id] : 0) + docs[id] * idf;
+            }
+          });
+          scores = next;
+        });
+
+        var ranked = Object.keys(scores).sort(function(a, b) {
+          return scores[b] - scores[a];
+        }).slice(0, MAX_RESULTS).map(Number);
+
+        return Promise.all(ranked.map(function(id) {
+          var chunk = Math.floor(id / meta.docChunk);
+          return fetchJson(fileUrl(meta.files.docs[chunk])).then(function(docs) {
+            var doc = docs[id % meta.docChunk];
+            return { url: doc[0], title: doc[1], excerpt: doc[2] };
+          });
+        }));
+      });
+    });
+  }
+
+  function render(list, results, query) {
+    list.innerHTML = '';
+    if (!query) {
+      list.hidden = true;
+      return;
+    }
+
+    if (!results.length) {
+      var empty = document.createElement('li');
+      empty.className = 'site-search-empty';
+      empty.textContent = '找不到符合「' + query + '」的頁面';
+      list.appendChild(empty);
+    }
+
+    results.forEach(function(result) {
+      var item = document.createElement('li');
+      var link = document.createElement('a');
+      link.href = result.url;
+      link.textContent = result.title;
+      var excerpt = document.createElement('p');
+      excerpt.textContent = result.excerpt;
+      item.appendChild(link);
+      item.appendChild(excerpt);
+      list.appendChild(item);
+    });
+    list.hidden = false;
+  }
+
+  function initSearch() {
+    var box = document.querySelector('.site-search');
+    if (!box || !window.fetch || !window.Promise) return;
+
+    var input = box.querySelector('.site-search-input');
+    var list = box.querySelector('.site-search-results');
+    var metaUrl = box.getAttribute('data-index');
+    var timer = null;
+    var latest = 0;
+
+    fetch(metaUrl, { method: 'HEAD' }).then(function(response) {
+      if (response.ok) box.hidden = false;
+    }, function() {});
+
+    input.addEventListener('input', function() {
+      clearTimeout(timer);
+      timer = setTimeout(function() {
+        var query = input.value.trim();
+        var request = ++latest;
+        search(metaUrl, query).then(function(results) {
+          if (request === latest) render(list, results, query);
+        }, function() {
+          if (request !== latest) return;
+          list.innerHTML = '<li class="site-search-empty">搜尋暫時無法使用</li>';
+          list.hidden = false;
+        });
+      }, DEBOUNCE_MS);
+    });
+
+    input.addEventListener('keydown', function(e) {
+      if (e.key === 'Escape') {
+        input.value = '';
+        render(list, [], '');
+      }
+    });
+
+    document.addEventListener('click', function(e) {
+      if (!box.contains(e.target)) list.hidden = true;
+    });
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initSearch);
+  } else {
+    initSearch();
+  }
+})();
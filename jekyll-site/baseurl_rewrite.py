@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Prefix root-relative URLs in a built site with the configured baseurl.
+
+GitHub Pages serves this site from /static-page, but Markdown content links
+to /assets/..., /wp-content/... and other root-relative paths. This tool
+parses each built page once (see html_urls.py) and prefixes every
+root-relative URL in src, href, srcset, poster and CSS url(...) values,
+inside HTML pages and standalone .css files.
+
+It is idempotent: URLs that already start with the baseurl are left alone
+(a doubled slash after the baseurl, as in /static-page//assets, is
+collapsed), so running it after every build or deploy is safe.
+
+Only uses the standard library, so it runs without the fallback builder's
+dependencies.
+
+Run from jekyll-site/ after a Jekyll build:
+  python3 baseurl_rewrite.py --baseurl /static-page
+  python3 baseurl_rewrite.py --site _site --baseurl /static-page --jobs 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import os
+
+from html_urls import rewrite_css_urls, rewrite_html_urls
+
+DEFAULT_SITE = Path(__file__).resolve().parent / '_site'
+
+
+def prefix_url(url, baseurl):
+    """
+    Return the baseurl-prefixed form of a root-relative URL, or None when
+    the URL must not change (relative, external, protocol-relative or
+    already prefixed).
+    """
+    stripped = url.strip()
+    if not baseurl or not stripped.startswith('/') or stripped.startswith('//'):
+        return None
+
+    if stripped == baseurl or stripped.startswith((baseurl + '/', baseurl + '?', baseurl + '#')):
+        rest = stripped[len(baseurl):]
+        if rest.startswith('//'):
+            return baseurl + '/' + rest.lstrip('/')
+        return None
+
+    return baseurl + stripped
+
+
+def normalize_baseurl(baseurl):
+    """'static-page/' → '/static-page', '' or '/' → ''"""
+    baseurl = (baseurl or '').strip().strip('/')
+    return f'/{baseurl}' if baseurl else ''
+
+
+def prefix_baseurl(html, baseurl):
+    """Prefix every root-relative URL of an HTML document with baseurl."""
+    baseurl = normalize_baseurl(baseurl)
+    if not baseurl:
+        return html
+    return rewrite_html_urls(html, lambda url: prefix_url(url, baseurl))
+
+
+def prefix_baseurl_css(css, baseurl):
+    """Prefix every root-relative url(...) of a stylesheet with baseurl."""
+    baseurl = normalize_baseurl(baseurl)
+    if not baseurl:
+        return css
+    return rewrite_css_urls(css, lambda url: prefix_url(url, baseurl))
+
+
+def rewrite_file(task):
+    """
+    Rewrite one HTML or CSS file in place.
+
+    Args:
+        task: Tuple of (path, baseurl)
+
+    Returns:
+        bool: True if the file changed
+    """
+    path, baseurl = task
+    text = path.read_text(encoding='utf-8', errors='ignore')
+    if path.suffix == '.css':
+        new_text = prefix_baseurl_css(text, baseurl)
+    else:
+        new_text = prefix_baseurl(text, baseurl)
+
+    if new_text == text:
+        return False
+    path.write_text(new_text, encoding='utf-8')
+    return True
+
+
+def run(site=None, baseurl='', jobs=1):
+    """
+    Prefix root-relative URLs in every HTML and CSS file of a built site.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Baseurl to apply, e.g. '/static-page'
+        jobs: Worker processes
+
+    Returns:
+        int: Number of files changed
+    """
+    site = Path(site or DEFAULT_SITE)
+    baseurl = normalize_baseurl(baseurl)
+    if not baseurl:
+        print('✓ Empty baseurl, nothing to rewrite')
+        return 0
+
+    files = sorted(p for p in site.rglob('*') if p.suffix in ('.html', '.css') and p.is_file())
+    tasks = [(path, baseurl) for path in files]
+
+    if jobs <= 1 or len(tasks) <= 1:
+        results = [rewrite_file(task) for task in tasks]
+    else:
+        workers = min(jobs, len(tasks))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(rewrite_file, tasks,
+                                    chunksize=max(1, len(tasks) // (workers * 4))))
+
+    changed = sum(results)
+    print(f'✓ PREFIXED {baseurl} in {changed} of {len(files)} files')
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Prefix root-relative URLs in a built site with the baseurl.'
+    )
+    parser.add_argument('--site', default=str(DEFAULT_SITE),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', required=True,
+                        help='baseurl to apply, e.g. /static-page')
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help='worker processes (default 0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark over synthetic sites.
+
+Generates Jekyll source trees shaped like this site (nested sections such as
+訓練八方面/<topic>/, CJK paragraphs, images, YouTube iframes, internal links)
+at several sizes and times every stage of the pipeline on each:
+
+- crawl_and_convert   scripts/crawl_and_convert.py against a local WordPress
+                      stub with as many pages (up to the crawl's page limit)
+- crawl_noop          the same crawl again (304s, unchanged fingerprints)
+- convert_to_jekyll   scripts/convert_to_jekyll.py over the crawled backups
+- enrich_jekyll_site  scripts/enrich_jekyll_site.py over the converted pages
+- generate            writing the synthetic source tree
+- build_full          fallback_build.render(full=True)
+- build_noop          incremental rebuild with nothing changed
+- build_incremental   incremental rebuild after editing 1% of the pages
+- build_parallel      full rebuild with --jobs (only when jobs > 1)
+- youtube_facade, image_pipeline, minify_site, search_index,
+  postbuild_assets, baseurl_rewrite
+                      the post-build stages, in pipeline order
+
+The WordPress site and the YouTube posters are served by a local HTTP stub,
+so the crawl and the facade stage run their real fetch paths without
+network access. Each size gets its own workspace and .fallback-cache/, so
+caches start cold. The scripts/ stages are skipped when their dependencies
+(requests, beautifulsoup4, markdownify) are not installed.
+
+Results are written as JSON; pass --compare with an earlier result file to
+print per-stage ratios and exit non-zero when a stage regressed.
+
+Run from jekyll-site/:
+  python3 benchmark.py                           # 10, 100, 1000, 10000 pages
+  python3 benchmark.py --sizes 10,100 --jobs 4
+  python3 benchmark.py --sizes 1000 --compare .fallback-cache/benchmarks/old.json
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import fallback_build
+
+SITE_ROOT = Path(__file__).resolve().parent
+SCRIPTS_DIR = SITE_ROOT.parent / 'scripts'
+RESULTS_DIR = SITE_ROOT / '.fallback-cache' / 'benchmarks'
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+
+# Parts of the real site copied into every synthetic tree
+SKELETON = ['_config.yml', '_layouts', '_includes', 'assets/css', 'assets/js']
+IMAGE_SOURCE = SITE_ROOT / 'assets' / 'images'
+
+SECTIONS = ['訓練八方面', '參加訓練', '相關資訊', '影音專區']
+TOPICS = ['事奉', '基督的身體', '生活分享', '福音', '讀經', '禱告', '召會生活', '品格']
+CJK_TEXT = (
+    '我們在主的恢復裏接受全時間訓練學員在生命真理品格與事奉上得著成全'
+    '每日晨興操練靈讀經禱告並在召會生活中實際配搭學習彼此相愛同心合意'
+    '藉著福音開展與眾召會的交通使人認識基督的身體並為主的見證站住地位'
+)
+PUNCTUATION = '，。、；：'
+
+# Stand-in poster served for every video (a valid 1x1 JPEG is not needed:
+# the facade stage only stores the bytes)
+POSTER_BYTES = b'\xff\xd8\xff\xe0' + b'\0' * 2048 + b'\xff\xd9'
+
+WP_UPLOADS = '/wp-content/uploads/2024/01/'
+WP_SITE_NAME = '臺灣福音工作全時間訓練網站'
+
+
+# ============================================================================
+# Synthetic Site Generator
+# ============================================================================
+
+def cjk_paragraph(rng, length):
+    """Return `length` characters of CJK text with punctuation."""
+    chars = []
+    while len(chars) < length:
+        run = rng.randint(8, 24)
+        start = rng.randrange(len(CJK_TEXT) - run)
+        chars.extend(CJK_TEXT[start:start + run])
+        chars.append(rng.choice(PUNCTUATION))
+    return ''.join(chars[:length - 1]) + '。'
+
+
+def video_id(n):
+    """Deterministic 11-character YouTube-style id."""
+    alphabet = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_'
+    return ''.join(alphabet[(n * 7 + i * 13) % len(alphabet)] for i in range(11))
+
+
+def page_path(i, depth):
+    """Source path of page i, nested `depth` directories deep."""
+    parts = [SECTIONS[i % len(SECTIONS)]]
+    for level in range(1, depth):
+        parts.append(TOPICS[(i // (level * len(SECTIONS))) % len(TOPICS)])
+    return '/'.join(parts) + f'/頁面{i:05d}.md'
+
+
+def page_markdown(i, paths, images, rng, options):
+    """Markdown source of one synthetic page."""
+    title = f'{TOPICS[i % len(TOPICS)]} 第{i}篇'
+    lines = ['---', 'layout: default', f'title: "{title}"', '---', '', f'# {title}', '']
+
+    per_paragraph = max(1, options['cjk_chars'] // options['paragraphs'])
+    for n in range(options['paragraphs']):
+        if n and n % 3 == 0:
+            lines += [f'## 段落 {n}', '']
+        lines += [cjk_paragraph(rng, per_paragraph), '']
+
+        if n < options['images'] and images:
+            image = images[(i + n) % len(images)]
+            lines += [f'![{title} 圖{n}](/assets/images/{image})', '']
+
+    for n in range(options['iframes']):
+        vid = video_id((i + n) % options['videos'])
+        lines += [
+            f'<iframe width="560" height="315" src="https://www.youtube.com/embed/{vid}" '
+            f'title="{title} 影片{n}" frameborder="0" allowfullscreen></iframe>',
+            '',
+        ]
+
+    lines += ['## 相關連結', '']
+    for n in range(options['links']):
+        target = paths[rng.randrange(len(paths))]
+        name = Path(target).stem
+        url = '/' + str(Path(target).parent / name) + '/'
+        lines.append(f'- [{name}]({url})')
+    lines.append('')
+
+    if i % 10 == 0:
+        lines += ['| 項目 | 說明 |', '| --- | --- |']
+        lines += [f'| {TOPICS[k]} | {cjk_paragraph(rng, 20)} |' for k in range(4)]
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+def generate_site(root, pages, options, seed=0):
+    """
+    Write a synthetic Jekyll source tree with `pages` pages.
+
+    Returns:
+        dict: {'pages': n, 'images': n, 'source_bytes': n}
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    for rel in SKELETON:
+        src = SITE_ROOT / rel
+        dst = root / rel
+        if src.is_dir():
+            shutil.copytree(src, dst)
+        elif src.exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dst)
+
+    # Reuse the site's real images so the image stage encodes realistic data
+    image_dir = root / 'assets' / 'images'
+    image_dir.mkdir(parents=True, exist_ok=True)
+    sources = sorted(p for p in IMAGE_SOURCE.glob('*') if p.is_file())
+    images = []
+    for src in sources[:options['image_pool']]:
+        shutil.copy2(src, image_dir / src.name)
+        images.append(src.name)
+
+    paths = [page_path(i, options['depth']) for i in range(pages)]
+    total = 0
+    for i, rel in enumerate(paths):
+        text = page_markdown(i, paths, images, rng, options)
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        total += len(text.encode('utf-8'))
+
+    index = ['---', 'layout: default', 'title: 首頁', '---', '', '# 首頁', '']
+    index += [f'- [{TOPICS[k]}](/{paths[k][:-3]}/)' for k in range(min(len(paths), 8))]
+    (root / 'index.md').write_text('\n'.join(index) + '\n', encoding='utf-8')
+
+    return {'pages': pages + 1, 'images': len(images), 'source_bytes': total}
+
+
+def edit_pages(root, pages, fraction, depth):
+    """Append a line to a fraction of the pages (at least one)."""
+    count = max(1, int(pages * fraction))
+    step = max(1, pages // count)
+    for i in range(0, step * count, step):
+        path = Path(root) / page_path(i, depth)
+        with open(path, 'a', encoding='utf-8') as fh:
+            fh.write('\n更新的內容。\n')
+    return count
+
+
+def wordpress_url(base, n):
+    """URL of WordPress page n (0 is the home page)."""
+    return f'{base}/' if n == 0 else f'{base}/?page_id={n}'
+
+
+def wordpress_page(n, pages, images, base):
+    """
+    HTML of WordPress page n, shaped like the live site: header and footer
+    around a <main> with a wp-block-heading title, CJK paragraphs, uploads,
+    a YouTube iframe and links that reach every page within a few levels.
+    """
+    rng = random.Random(n)
+    title = '首頁' if n == 0 else f'{TOPICS[n % len(TOPICS)]} 第{n}篇'
+    body = [f'<h3 class="wp-block-heading">{title}</h3>']
+
+    for k in range(4):
+        body.append(f'<p>{cjk_paragraph(rng, 300)}</p>')
+        if k < 2 and images:
+            name = urllib.parse.quote(images[(n + k) % len(images)])
+            body.append(f'<figure class="wp-block-image"><img src="{base}{WP_UPLOADS}{name}" '
+                        f'alt="{title} 圖{k}" width="800" height="600"></figure>')
+
+    body.append(f'<iframe width="560" height="315" src="https://www.youtube.com/embed/'
+                f'{video_id(n % 20)}" title="{title} 影片" allowfullscreen></iframe>')
+
+    children = [k for k in (2 * n + 1, 2 * n + 2) if k < pages]
+    related = [rng.randrange(pages) for _ in range(3)]
+    body.append('<ul>' + ''.join(
+        f'<li><a href="{wordpress_url(base, k)}">第{k}篇</a></li>' for k in children + related
+    ) + '</ul>')
+
+    return (
+        f'<!DOCTYPE html><html lang="zh-TW"><head><meta charset="UTF-8">'
+        f'<title>{title} – {WP_SITE_NAME}</title>'
+        f'<link rel="canonical" href="{wordpress_url(base, n)}"></head>'
+        f'<body class="page-template-default page page-id-{n}">'
+        f'<header><nav><a href="{base}/">{WP_SITE_NAME}</a></nav></header>'
+        f'<main id="main">{"".join(body)}</main>'
+        f'<footer><p>© {WP_SITE_NAME}</p></footer></body></html>'
+    )
+
+
+# ============================================================================
+# Local HTTP Stub
+# ============================================================================
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for the remote hosts: the same small JPEG for every
+    /vi/<id>/hqdefault.jpg poster, and a WordPress site of server.wp_pages
+    pages (/ and /?page_id=N) with its uploads, answering If-None-Match
+    with 304 like the live site.
+    """
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        base = f'http://{self.headers.get("Host", "127.0.0.1")}'
+
+        if url.path.startswith('/vi/'):
+            return self.send_body(POSTER_BYTES, 'image/jpeg')
+
+        if url.path.startswith(WP_UPLOADS):
+            name = urllib.parse.unquote(url.path[len(WP_UPLOADS):])
+            path = IMAGE_SOURCE / name
+            if name in self.server.wp_images and path.is_file():
+                kind = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                return self.send_body(path.read_bytes(), kind)
+
+        if url.path == '/':
+            page_id = dict(urllib.parse.parse_qsl(url.query)).get('page_id', '0')
+            if page_id.isdigit() and int(page_id) < self.server.wp_pages:
+                html = wordpress_page(int(page_id), self.server.wp_pages,
+                                      self.server.wp_images, base)
+                return self.send_body(html.encode('utf-8'), 'text/html; charset=UTF-8')
+
+        self.send_error(404)
+
+    def send_body(self, body, content_type):
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub():
+    """Start the HTTP stub on a free local port; returns (server, base_url)."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.wp_pages = 0
+    server.wp_images = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+# ============================================================================
+# Stage Timing
+# ============================================================================
+
+def timed(fn, *args, **kwargs):
+    """Run fn with its progress output silenced; return elapsed seconds."""
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def tree_size(root):
+    """(files, bytes) of a directory tree."""
+    files = 0
+    size = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+
+def use_poster_stub(poster_base):
+    """
+    Point the YouTube stage at the poster stub. The stage caches follow
+    fallback_build.set_site_root(), so each size already has its own.
+    Posters are fetched in the main process, so worker processes need no
+    setup.
+    """
+    import youtube_facade
+
+    youtube_facade.POSTER_URL = poster_base + '/vi/{id}/hqdefault.jpg'
+
+
+def load_scripts():
+    """
+    Import the scripts/ modules, or return None (with a notice) when their
+    dependencies are missing.
+    """
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    try:
+        import convert_to_jekyll
+        import crawl_and_convert
+        import enrich_jekyll_site
+    except ImportError as exc:
+        print(f'⚠️  Skipping the scripts/ stages: {exc}')
+        return None
+    return crawl_and_convert, convert_to_jekyll, enrich_jekyll_site
+
+
+def bench_scripts(root, pages, options, jobs, server, base_url):
+    """
+    Crawl, convert and enrich a stub WordPress site into its own workspace.
+
+    Returns:
+        tuple: (stage timings, number of WordPress pages)
+    """
+    scripts = load_scripts()
+    if scripts is None:
+        return {}, 0
+    crawl_and_convert, convert_to_jekyll, enrich_jekyll_site = scripts
+    from crawl_engine import CrawlEngine
+    from crawl_frontier import DEFAULT_MAX_PAGES
+
+    wp_pages = min(pages, DEFAULT_MAX_PAGES)
+    server.wp_pages = wp_pages
+    server.wp_images = sorted(p.name for p in IMAGE_SOURCE.glob('*')
+                              if p.is_file())[:options['image_pool']]
+
+    workspace = Path(root) / 'wordpress'
+    (workspace / 'jekyll-site').mkdir(parents=True)
+    (workspace / 'jekyll-site' / '_config.yml').write_text('title: benchmark\n', encoding='utf-8')
+
+    crawl_args = ['--start-url', f'{base_url}/', '--rate', '0', '--concurrency', '8',
+                  '--max-depth', '64', '--max-pages', str(wp_pages), '--jobs', str(jobs)]
+    stages = {}
+
+    crawl_and_convert.set_workspace(workspace)
+    stages['crawl_and_convert'] = timed(crawl_and_convert.main, crawl_args)
+    stages['crawl_noop'] = timed(crawl_and_convert.main, crawl_args)
+
+    convert_to_jekyll.set_workspace(workspace, mirror=workspace / 'page_backups')
+    stages['convert_to_jekyll'] = timed(convert_to_jekyll.convert_all, jobs=jobs)
+
+    enrich_jekyll_site.set_workspace(workspace, base_url)
+    enrich_jekyll_site.engine = CrawlEngine(rate=0)
+    stages['enrich_jekyll_site'] = timed(enrich_jekyll_site.main, [])
+
+    return stages, wp_pages
+
+
+def bench_size(workdir, pages, options, jobs, server, base_url):
+    """Generate one synthetic site and time every stage on it."""
+    import baseurl_rewrite
+    import image_pipeline
+    import minify_site
+    import postbuild_assets
+    import search_index
+    import youtube_facade
+
+    root = Path(workdir) / f'site-{pages}'
+    started = time.perf_counter()
+    info = generate_site(root, pages, options)
+    generated = time.perf_counter() - started
+
+    stages, wp_pages = bench_scripts(root, pages, options, jobs, server, base_url)
+    stages['generate'] = generated
+
+    fallback_build.set_site_root(root)
+    use_poster_stub(base_url)
+    out = fallback_build.OUT
+
+    stages['build_full'] = timed(fallback_build.render, full=True, jobs=1)
+    stages['build_noop'] = timed(fallback_build.render, jobs=1)
+    edited = edit_pages(root, pages, 0.01, options['depth'])
+    stages['build_incremental'] = timed(fallback_build.render, jobs=1)
+    if jobs > 1:
+        stages['build_parallel'] = timed(fallback_build.render, full=True, jobs=jobs)
+
+    html_files, html_bytes = tree_size(out)
+
+    stages['youtube_facade'] = timed(youtube_facade.run, out, '', jobs)
+    stages['image_pipeline'] = timed(image_pipeline.run, out, '', jobs)
+    stages['minify_site'] = timed(minify_site.run, out, '', jobs)
+    stages['search_index'] = timed(search_index.run, out, '', jobs)
+    stages['postbuild_assets'] = timed(postbuild_assets.run, out, '', jobs)
+    stages['baseurl_rewrite'] = timed(baseurl_rewrite.run, out, '/static-page', jobs)
+
+    files, size = tree_size(out)
+    return {
+        'pages': info['pages'],
+        'images': info['images'],
+        'source_bytes': info['source_bytes'],
+        'wordpress_pages': wp_pages,
+        'edited_pages': edited,
+        'built_files': html_files,
+        'built_bytes': html_bytes,
+        'final_files': files,
+        'final_bytes': size,
+        'stages': {name: round(seconds, 4) for name, seconds in stages.items()},
+    }
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def print_table(results):
+    """Print seconds per stage with one column per site size."""
+    stages = []
+    for result in results:
+        stages += [s for s in result['stages'] if s not in stages]
+
+    header = f'{"stage":<20}' + ''.join(f'{r["pages"]:>12,d}p' for r in results)
+    print(header)
+    print('-' * len(header))
+    for stage in stages:
+        row = f'{stage:<20}'
+        for result in results:
+            seconds = result['stages'].get(stage)
+            row += f'{seconds:>12.3f}s' if seconds is not None else f'{"-":>13}'
+        print(row)
+
+
+def compare(results, baseline_path, threshold):
+    """
+    Compare stage times with an earlier result file.
+
+    Returns:
+        int: Number of stages slower than baseline by more than threshold
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding='utf-8'))
+    previous = {r['pages']: r['stages'] for r in baseline['results']}
+    regressions = 0
+
+    print(f'\n📊 Compared with {baseline_path}')
+    for result in results:
+        old = previous.get(result['pages'])
+        if not old:
+            continue
+        for stage, seconds in result['stages'].items():
+            if stage not in old or old[stage] <= 0:
+                continue
+            ratio = seconds / old[stage]
+            # Ignore noise on stages that take only a few milliseconds
+            slower = ratio > 1 + threshold and seconds - old[stage] > 0.05
+            regressions += slower
+            mark = '⚠️ ' if slower else '  '
+            print(f'{mark}{result["pages"]:>7,d}p {stage:<20} '
+                  f'{old[stage]:8.3f}s → {seconds:8.3f}s ({ratio:5.2f}x)')
+
+    return regressions
+
+
+# ============================================================================
+# Entry Point
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the build pipeline on synthetic sites of several sizes.'
+    )
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='comma-separated page counts (default: 10,100,1000,10000)')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='directory nesting of pages (default: 2)')
+    parser.add_argument('--cjk-chars', type=int, default=1500,
+                        help='CJK characters of body text per page (default: 1500)')
+    parser.add_argument('--paragraphs', type=int, default=6,
+                        help='paragraphs per page (default: 6)')
+    parser.add_argument('--images', type=int, default=2,
+                        help='images per page (default: 2)')
+    parser.add_argument('--image-pool', type=int, default=8,
+                        help='distinct images shared by all pages (default: 8)')
+    parser.add_argument('--iframes', type=int, default=1,
+                        help='YouTube iframes per page (default: 1)')
+    parser.add_argument('--videos', type=int, default=20,
+                        help='distinct videos shared by all pages (default: 20)')
+    parser.add_argument('--links', type=int, default=5,
+                        help='internal links per page (default: 5)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    parser.add_argument('--workdir', default=None,
+                        help='where to generate sites (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the generated sites')
+    parser.add_argument('-o', '--output', default=None,
+                        help='result JSON path (default: .fallback-cache/benchmarks/<time>.json)')
+    parser.add_argument('--compare', default=None,
+                        help='earlier result JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='slowdown ratio counted as a regression (default: 0.2)')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    options = {
+        'depth': max(1, args.depth),
+        'cjk_chars': args.cjk_chars,
+        'paragraphs': max(1, args.paragraphs),
+        'images': args.images,
+        'image_pool': args.image_pool,
+        'iframes': args.iframes,
+        'videos': max(1, args.videos),
+        'links': args.links,
+    }
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='fttt-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    server, base_url = start_stub()
+
+    results = []
+    try:
+        for pages in sizes:
+            print(f'⏱  {pages:,d} pages...')
+            result = bench_size(workdir, pages, options, jobs, server, base_url)
+            results.append(result)
+            total = sum(result['stages'].values())
+            print(f'✓ {pages:,d} pages done in {total:.2f}s '
+                  f'({result["final_files"]:,d} files, {result["final_bytes"] / 1e6:.1f} MB)')
+            if not args.keep:
+                shutil.rmtree(workdir / f'site-{pages}', ignore_errors=True)
+    finally:
+        server.shutdown()
+        fallback_build.set_site_root(SITE_ROOT)
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'jobs': jobs,
+        'options': options,
+        'results': results,
+    }
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        output = RESULTS_DIR / f'{stamp}.json'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding='utf-8')
+
+    print()
+    print_table(results)
+    print(f'\n💾 Results written to {output}')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f'\n❌ {regressions} stage(s) regressed by more than {args.threshold:.0%}')
+            sys.exit(1)
+        print('\n✅ No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,10 @@ rm -rf _site
 bundle exec jekyll build --config _config.yml,_config.local.yml
 
 if [ -f "_site/index.html" ]; then
+    # Without the index the header search box stays hidden
+    echo "Building search index..."
+    python3 search_index.py --site _site --baseurl ""
+
     echo ""
     echo "✅ Build successful!"
     echo ""
@@ -16,11 +16,12 @@ rm -rf _site
 bundle exec jekyll build --config _config.yml,_config.pages.yml
 
 if [ -f "_site/index.html" ]; then
-    # Fix image paths in content: prefix /assets/ and /wp-content/ with /static-page
-    echo "Fixing image paths..."
-    find _site -name "*.html" -exec sed -i 's|src="/assets/|src="/static-page/assets/|g' {} \;
-    find _site -name "*.html" -exec sed -i 's|src="/wp-content/|src="/static-page/wp-content/|g' {} \;
-    find _site -name "*.html" -exec sed -i 's|src="/static-page//|src="/static-page/|g' {} \;
+    # Prefix root-relative URLs in content (src, href, srcset, url()) with /static-page
+    echo "Prefixing baseurl in built pages..."
+    python3 baseurl_rewrite.py --site _site --baseurl /static-page
+
+    echo "Building search index..."
+    python3 search_index.py --site _site --baseurl /static-page
 
     echo ""
     echo "✅ Build successful!"
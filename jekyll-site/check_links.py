@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Link and asset checker for a built site.
+
+Walks _site/ once, extracting every href/src/srcset/poster/url(...) of each
+HTML and CSS file (see html_urls.py) in a process pool, then resolves them
+against an in-memory index of the output files, the way GitHub Pages serves
+them:
+
+- the baseurl is stripped (root-relative URLs missing it are broken)
+- percent-encoded CJK paths are decoded
+- dir/ and dir serve dir/index.html, page serves page.html
+- #fragments must match an id (or a name) on the target page
+
+Reports broken links and assets, missing anchors and orphaned pages (pages
+no other page links to). With --external, http(s) URLs are also checked
+with concurrent HEAD requests (falling back to GET when HEAD is refused).
+
+Exits with status 1 when something is broken, so it can gate a deploy.
+
+Run from workspace root (after a fallback or Jekyll build):
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/check_links.py
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/check_links.py --baseurl /static-page --jobs 4
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/check_links.py --external --json report.json
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import fallback_build
+from html_urls import extract_html_urls, is_local_url, resolve_site_path, rewrite_css_urls
+from postbuild_assets import pool_map
+
+ANCHOR_RE = re.compile(r'''<[a-zA-Z][^>]*?\s(?:id|name)\s*=\s*["']([^"']+)["']''')
+
+# Pages that are entry points and never need inbound links
+ENTRY_PAGES = {'index.html', '404.html'}
+
+EXTERNAL_TIMEOUT = 10
+EXTERNAL_WORKERS = 16
+USER_AGENT = 'fttt-static-page-link-checker'
+
+
+# ============================================================================
+# Site Scan
+# ============================================================================
+
+def scan_file(task):
+    """
+    Extract the URLs (and, for pages, the anchor ids) of one file.
+
+    Args:
+        task: Tuple of (site_dir, relative_path)
+
+    Returns:
+        tuple: (relative_path, [urls], [anchor ids])
+    """
+    site, rel = task
+    text = (site / rel).read_text(encoding='utf-8', errors='ignore')
+
+    if rel.endswith('.css'):
+        urls = []
+        rewrite_css_urls(text, lambda url: urls.append(url))
+        return rel, urls, []
+
+    return rel, extract_html_urls(text), ANCHOR_RE.findall(text)
+
+
+def build_index(site):
+    """
+    Index every output file and directory of a built site.
+
+    Returns:
+        tuple: (set of file paths, set of directory paths), site-relative
+    """
+    files = set()
+    dirs = set()
+    for dirpath, dirnames, filenames in os.walk(site):
+        rel_dir = Path(dirpath).relative_to(site).as_posix()
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        if prefix:
+            dirs.add(rel_dir)
+        files.update(prefix + name for name in filenames)
+    return files, dirs
+
+
+def resolve_target(site_path, files, dirs):
+    """
+    Return the output file a site path is served from, or None.
+
+    '' and 'dir/' serve index.html, 'dir' redirects to 'dir/', and an
+    extensionless 'page' serves 'page.html'.
+    """
+    if site_path == '' or site_path.endswith('/'):
+        index = site_path + 'index.html'
+        return index if index in files else None
+    if site_path in files:
+        return site_path
+    if site_path in dirs and site_path + '/index.html' in files:
+        return site_path + '/index.html'
+    if site_path + '.html' in files:
+        return site_path + '.html'
+    return None
+
+
+# ============================================================================
+# Checks
+# ============================================================================
+
+def check_local(scanned, files, dirs, baseurl):
+    """
+    Resolve every local URL.
+
+    Returns:
+        tuple: (broken {url: [pages]}, missing anchors {url: [pages]},
+            inbound {page: set of referring pages}, external {url: [pages]},
+            number of links checked)
+    """
+    anchors = {rel: set(ids) for rel, _, ids in scanned}
+    broken = {}
+    missing_anchors = {}
+    inbound = {}
+    external = {}
+    checked = 0
+    baseurl = baseurl.rstrip('/')
+
+    for rel, urls, _ in scanned:
+        for url in urls:
+            url = url.strip()
+            if url.startswith(('http://', 'https://', '//')):
+                external.setdefault(url, []).append(rel)
+                continue
+            if not is_local_url(url):
+                continue
+            checked += 1
+
+            parts = urllib.parse.urlsplit(url)
+            if not parts.path:
+                # Same-page fragment
+                target = rel
+            elif (baseurl and parts.path.startswith('/')
+                    and not (parts.path == baseurl or parts.path.startswith(baseurl + '/'))):
+                target = None
+            else:
+                site_path = resolve_site_path(url, rel, baseurl)
+                target = None if site_path is None else resolve_target(site_path, files, dirs)
+
+            if target is None:
+                broken.setdefault(url, []).append(rel)
+                continue
+
+            if target != rel:
+                inbound.setdefault(target, set()).add(rel)
+
+            fragment = urllib.parse.unquote(parts.fragment)
+            if (fragment and target.endswith('.html')
+                    and fragment not in anchors.get(target, ())):
+                missing_anchors.setdefault(url, []).append(rel)
+
+    return broken, missing_anchors, inbound, external, checked
+
+
+def check_external_url(url):
+    """
+    Check one external URL.
+
+    Returns:
+        tuple: (url, status or None, error message or None)
+    """
+    full = 'https:' + url if url.startswith('//') else url
+    for method in ('HEAD', 'GET'):
+        request = urllib.request.Request(full, method=method, headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=EXTERNAL_TIMEOUT) as response:
+                return url, response.status, None
+        except urllib.error.HTTPError as exc:
+            # Some servers refuse HEAD; retry those with GET
+            if method == 'HEAD' and exc.code in (403, 405, 501):
+                continue
+            return url, exc.code, None
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            return url, None, str(getattr(exc, 'reason', exc))
+    return url, None, 'no response'
+
+
+def check_external(external, workers):
+    """
+    Check external URLs concurrently.
+
+    Returns:
+        dict: url → (status, error) for URLs that failed
+    """
+    failures = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url, status, error in pool.map(check_external_url, sorted(external)):
+            if error or status is None or status >= 400:
+                failures[url] = (status, error)
+    return failures
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def print_group(title, problems, limit):
+    print(f'\n{title}')
+    for url, pages in sorted(problems.items()):
+        pages = sorted(set(pages))
+        shown = ', '.join(pages[:limit])
+        more = f' (+{len(pages) - limit} more)' if len(pages) > limit else ''
+        print(f'  {url}\n      ← {shown}{more}')
+
+
+# ============================================================================
+# Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1, external=False, workers=EXTERNAL_WORKERS,
+        limit=3, report=None):
+    """
+    Check every link and asset reference of a built site.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes for extracting URLs
+        external: Also check http(s) URLs
+        workers: Concurrent requests for external checks
+        limit: Referring pages listed per problem
+        report: Optional path for a JSON report
+
+    Returns:
+        dict: The report (broken, missing_anchors, orphans, external, counts)
+    """
+    started = time.perf_counter()
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+
+    files, dirs = build_index(site)
+    sources = sorted(rel for rel in files if rel.endswith(('.html', '.css')))
+    scanned = pool_map(scan_file, [(site, rel) for rel in sources], jobs)
+
+    broken, missing_anchors, inbound, external_urls, checked = check_local(
+        scanned, files, dirs, baseurl)
+    # Pages nothing else links to (entry pages excepted)
+    orphans = [rel for rel in sources
+               if rel.endswith('.html') and rel not in inbound
+               and rel.rsplit('/', 1)[-1] not in ENTRY_PAGES]
+
+    external_failures = {}
+    if external and external_urls:
+        external_failures = check_external(external_urls, workers)
+
+    elapsed = time.perf_counter() - started
+    print(f'🔗 Checked {checked} local links in {len(sources)} files '
+          f'({len(files)} output files) in {elapsed:.2f}s')
+    if external:
+        print(f'🌐 Checked {len(external_urls)} external URLs')
+
+    if broken:
+        print_group(f'❌ BROKEN {len(broken)} links/assets:', broken, limit)
+    if missing_anchors:
+        print_group(f'⚠️  MISSING ANCHOR {len(missing_anchors)} links:', missing_anchors, limit)
+    if external_failures:
+        print_group(
+            f'❌ EXTERNAL {len(external_failures)} URLs failed:',
+            {f'{url} [{status or error}]': external_urls[url]
+             for url, (status, error) in external_failures.items()},
+            limit
+        )
+    if orphans:
+        print(f'\n🏝  ORPHAN {len(orphans)} pages (no inbound links):')
+        for rel in orphans:
+            print(f'  {rel}')
+
+    if not (broken or missing_anchors or external_failures):
+        print('✅ No broken links')
+
+    result = {
+        'files': len(sources),
+        'links': checked,
+        'broken': {url: sorted(set(p)) for url, p in sorted(broken.items())},
+        'missing_anchors': {url: sorted(set(p)) for url, p in sorted(missing_anchors.items())},
+        'orphans': orphans,
+        'external': {
+            url: {'status': status, 'error': error, 'pages': sorted(set(external_urls[url]))}
+            for url, (status, error) in sorted(external_failures.items())
+        },
+    }
+    if report:
+        Path(report).write_text(json.dumps(result, ensure_ascii=False, indent=1),
+                                encoding='utf-8')
+        print(f'💾 Report written to {report}')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Check internal links, assets and anchors of a built site.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    parser.add_argument('--external', action='store_true',
+                        help='also check http(s) URLs with HEAD requests')
+    parser.add_argument('--workers', type=int, default=EXTERNAL_WORKERS,
+                        help=f'concurrent external requests (default: {EXTERNAL_WORKERS})')
+    parser.add_argument('--limit', type=int, default=3,
+                        help='referring pages listed per problem (default: 3)')
+    parser.add_argument('--json', dest='report', default=None,
+                        help='write the report as JSON to this file')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    result = run(site=args.site, baseurl=args.baseurl, jobs=jobs, external=args.external,
+                 workers=args.workers, limit=args.limit, report=args.report)
+
+    if result['broken'] or result['missing_anchors'] or result['external']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
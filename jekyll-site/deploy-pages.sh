@@ -5,7 +5,7 @@
 #
 # Prerequisites:
 #   - Build site first: ./build-pages.sh
-#   - ghp-import installed: pip install ghp-import
+#   - git push access to origin (deploy_delta.py pushes only changed files)
 
 set -e
 
@@ -25,16 +25,14 @@ echo "Deploying to GitHub Pages..."
 echo "=================================="
 echo ""
 
-# Fix image paths in content: prefix /assets/ and /wp-content/ with /static-page
-echo "Fixing image paths..."
-find _site -name "*.html" -exec sed -i '' 's|src="/assets/|src="/static-page/assets/|g' {} \;
-find _site -name "*.html" -exec sed -i '' 's|src="/wp-content/|src="/static-page/wp-content/|g' {} \;
-find _site -name "*.html" -exec sed -i '' 's|src="/static-page//|src="/static-page/|g' {} \;
+# Prefix root-relative URLs in content (src, href, srcset, url()) with /static-page
+echo "Prefixing baseurl in built pages..."
+python3 baseurl_rewrite.py --site _site --baseurl /static-page
 
 echo ""
 
-# Deploy to gh-pages branch
-ghp-import -n -p -f _site
+# Deploy to gh-pages branch (only files that changed since the last deploy)
+python3 deploy_delta.py --site _site
 
 echo ""
 echo "✅ Deployment successful!"
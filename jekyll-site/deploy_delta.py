@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Delta deploy of a built site to the gh-pages branch.
+
+`ghp-import -n -p -f _site` rebuilds and force-pushes the whole tree on every
+deploy. This tool instead:
+
+1. Reads the tree of the currently deployed gh-pages commit on the remote
+   (path → blob hash, i.e. the manifest of the last deployed site).
+2. Hashes the new build the way git does (cached by size/mtime in
+   .fallback-cache/) and diffs the two.
+3. Writes blobs only for added/changed files, builds the new tree from the
+   previous one with a temporary index, and commits it on top of the
+   deployed commit.
+4. Pushes as a fast-forward and prints the added/changed/removed files and
+   bytes.
+
+Unchanged files (most images) are never re-hashed into the object store or
+re-sent. Like `ghp-import -n`, a `.nojekyll` file is included so GitHub
+Pages serves the tree as-is.
+
+Run from jekyll-site/:
+  python3 deploy_delta.py                       # push _site/ to origin gh-pages
+  python3 deploy_delta.py --dry-run             # only print the summary
+  python3 deploy_delta.py --remote /tmp/test.git --branch gh-pages
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+SITE_ROOT = Path(__file__).resolve().parent
+DEFAULT_SITE = SITE_ROOT / '_site'
+HASH_CACHE = SITE_ROOT / '.fallback-cache' / 'deploy_hashes.json'
+
+# Build artefacts that should never be published
+SKIP_SUFFIXES = ('.tmp', '.part')
+
+
+# ============================================================================
+# Git Helpers
+# ============================================================================
+
+def git(*args, cwd, input=None, env=None, check=True):
+    """Run a git command and return its stdout as bytes."""
+    result = subprocess.run(
+        ['git', *args], cwd=cwd, input=input, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    if check and result.returncode != 0:
+        raise RuntimeError(f'git {" ".join(args)} failed: {result.stderr.decode(errors="replace").strip()}')
+    return result.stdout
+
+
+def blob_hash(data):
+    """Git blob id of some bytes (same as `git hash-object`)."""
+    header = f'blob {len(data)}\0'.encode('ascii')
+    return hashlib.sha1(header + data).hexdigest()
+
+
+def deployed_commit(repo, remote, branch):
+    """
+    Fetch the deployed branch and return its commit id, or None if the
+    branch does not exist on the remote yet.
+    """
+    heads = git('ls-remote', '--heads', remote, branch, cwd=repo).strip()
+    if not heads:
+        return None
+    git('fetch', '--quiet', remote, f'refs/heads/{branch}', cwd=repo)
+    return git('rev-parse', 'FETCH_HEAD', cwd=repo).decode().strip()
+
+
+def deployed_manifest(repo, commit):
+    """
+    Return {path: (mode, blob_id)} for every file in a deployed commit.
+    """
+    if commit is None:
+        return {}
+
+    manifest = {}
+    out = git('ls-tree', '-r', '-z', '--full-tree', commit, cwd=repo)
+    for record in out.split(b'\0'):
+        if not record:
+            continue
+        meta, path = record.split(b'\t', 1)
+        mode, _, sha = meta.decode().split(' ')
+        manifest[path.decode('utf-8')] = (mode, sha)
+    return manifest
+
+
+# ============================================================================
+# Build Manifest
+# ============================================================================
+
+def load_hash_cache():
+    try:
+        return json.loads(HASH_CACHE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_hash_cache(cache):
+    HASH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    HASH_CACHE.write_text(json.dumps(cache, ensure_ascii=False), encoding='utf-8')
+
+
+def build_manifest(site, nojekyll=True):
+    """
+    Return {path: (mode, blob_id, size)} for the new build.
+
+    Blob ids are reused from the cache when a file's size and mtime are
+    unchanged, so only files that were rebuilt are read.
+    """
+    cache = load_hash_cache()
+    new_cache = {}
+    manifest = {}
+
+    for dirpath, dirnames, filenames in os.walk(site):
+        dirnames[:] = [d for d in dirnames if d != '.git']
+        for name in filenames:
+            if name.endswith(SKIP_SUFFIXES):
+                continue
+            path = Path(dirpath) / name
+            if path.is_symlink():
+                continue
+
+            rel = path.relative_to(site).as_posix()
+            stat = path.stat()
+            key = str(path)
+            cached = cache.get(key)
+
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                sha = cached[2]
+            else:
+                sha = blob_hash(path.read_bytes())
+
+            new_cache[key] = [stat.st_size, stat.st_mtime_ns, sha]
+            mode = '100755' if os.access(path, os.X_OK) else '100644'
+            manifest[rel] = (mode, sha, stat.st_size)
+
+    if nojekyll and '.nojekyll' not in manifest:
+        manifest['.nojekyll'] = ('100644', blob_hash(b''), 0)
+
+    save_hash_cache(new_cache)
+    return manifest
+
+
+def diff_manifests(previous, current):
+    """
+    Compare the deployed and new trees.
+
+    Returns:
+        tuple: (added, changed, removed) sorted path lists
+    """
+    added = sorted(p for p in current if p not in previous)
+    changed = sorted(
+        p for p in current
+        if p in previous and previous[p][:2] != current[p][:2]
+    )
+    removed = sorted(p for p in previous if p not in current)
+    return added, changed, removed
+
+
+# ============================================================================
+# Commit Construction
+# ============================================================================
+
+def write_blobs(repo, site, paths, manifest):
+    """Store only the given files as blobs (one git process for all)."""
+    if not paths:
+        return
+
+    # --no-filters stores the bytes as they are, so the blob ids match
+    # blob_hash() whatever core.autocrlf or .gitattributes the repo has
+    listing = ''.join(str(site / p) + '\n' for p in paths if (site / p).exists())
+    if listing:
+        git('hash-object', '-w', '--no-filters', '--stdin-paths', cwd=repo,
+            input=listing.encode('utf-8'))
+
+    # .nojekyll may be synthetic (not present in the build)
+    if '.nojekyll' in paths and not (site / '.nojekyll').exists():
+        git('hash-object', '-w', '--stdin', cwd=repo, input=b'')
+
+
+def build_tree(repo, parent, manifest, added, changed, removed):
+    """
+    Build the new tree from the deployed one using a temporary index, so
+    only the changed entries are touched.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, GIT_INDEX_FILE=str(Path(tmp) / 'index'))
+        if parent:
+            git('read-tree', parent, cwd=repo, env=env)
+        else:
+            git('read-tree', '--empty', cwd=repo, env=env)
+
+        entries = []
+        for path in added + changed:
+            mode, sha, _ = manifest[path]
+            entries.append(f'{mode} {sha}\t{path}\0')
+        for path in removed:
+            entries.append(f'0 {"0" * 40}\t{path}\0')
+
+        if entries:
+            git('update-index', '-z', '--index-info', cwd=repo, env=env,
+                input=''.join(entries).encode('utf-8'))
+        return git('write-tree', cwd=repo, env=env).decode().strip()
+
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def print_summary(added, changed, removed, manifest, verbose):
+    sent = sum(manifest[p][2] for p in added + changed)
+    unchanged = len(manifest) - len(added) - len(changed)
+    print(f'  + added:     {len(added):5d}')
+    print(f'  ~ changed:   {len(changed):5d}')
+    print(f'  - removed:   {len(removed):5d}')
+    print(f'  = unchanged: {unchanged:5d}')
+    print(f'  📦 bytes to upload: {format_bytes(sent)}')
+
+    if verbose:
+        for label, paths in (('+', added), ('~', changed), ('-', removed)):
+            for path in paths:
+                print(f'    {label} {path}')
+    return sent
+
+
+# ============================================================================
+# Entry Point
+# ============================================================================
+
+def deploy(site=None, remote='origin', branch='gh-pages', message=None,
+           push=True, dry_run=False, verbose=False, nojekyll=True):
+    """
+    Deploy only the changes between the built site and the deployed branch.
+
+    Returns:
+        dict: Summary with added/changed/removed counts, bytes and commit
+    """
+    site = Path(site or DEFAULT_SITE).resolve()
+    if not (site / 'index.html').exists():
+        raise SystemExit(f'❌ {site} is not a built site (index.html missing)')
+
+    repo = Path(git('rev-parse', '--show-toplevel', cwd=site).decode().strip())
+
+    parent = deployed_commit(repo, remote, branch)
+    previous = deployed_manifest(repo, parent)
+    manifest = build_manifest(site, nojekyll=nojekyll)
+    added, changed, removed = diff_manifests(previous, manifest)
+
+    print(f'🚀 Delta deploy {site} → {remote} {branch}'
+          + (f' (base {parent[:10]})' if parent else ' (first deploy)'))
+    sent = print_summary(added, changed, removed, manifest, verbose)
+    summary = {'added': len(added), 'changed': len(changed), 'removed': len(removed),
+               'bytes': sent, 'commit': None}
+
+    if not (added or changed or removed):
+        print('✅ Nothing to deploy, the site is up to date')
+        return summary
+    if dry_run:
+        print('ℹ️  Dry run, nothing committed')
+        return summary
+
+    write_blobs(repo, site, added + changed, manifest)
+    tree = build_tree(repo, parent, manifest, added, changed, removed)
+
+    message = message or f'Deploy site: +{len(added)} ~{len(changed)} -{len(removed)}'
+    args = ['commit-tree', tree, '-m', message]
+    if parent:
+        args += ['-p', parent]
+    commit = git(*args, cwd=repo).decode().strip()
+    git('update-ref', f'refs/heads/{branch}', commit, cwd=repo)
+    summary['commit'] = commit
+    print(f'✓ COMMITTED {commit[:10]} on {branch}')
+
+    if push:
+        git('push', '--quiet', remote, f'{commit}:refs/heads/{branch}', cwd=repo)
+        print(f'✅ Pushed {branch} to {remote}')
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Commit and push only the files that changed since the last deploy.'
+    )
+    parser.add_argument('--site', default=str(DEFAULT_SITE),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--remote', default='origin',
+                        help='remote name or URL (default: origin)')
+    parser.add_argument('--branch', default='gh-pages',
+                        help='deploy branch (default: gh-pages)')
+    parser.add_argument('-m', '--message', default=None,
+                        help='commit message')
+    parser.add_argument('--no-push', action='store_true',
+                        help='commit to the local branch without pushing')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='only print what would be deployed')
+    parser.add_argument('--no-nojekyll', action='store_true',
+                        help='do not add a .nojekyll file')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='list every added, changed and removed path')
+    args = parser.parse_args()
+
+    try:
+        deploy(site=args.site, remote=args.remote, branch=args.branch,
+               message=args.message, push=not args.no_push, dry_run=args.dry_run,
+               verbose=args.verbose, nojekyll=not args.no_nojekyll)
+    except RuntimeError as exc:
+        print(f'❌ {exc}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,27 +6,88 @@ Jekyll layout template to create a `_site/` preview without Ruby/Jekyll.
 Features:
 - Preserves HTML embeds (YouTube iframes, etc.)
 - Fixes relative paths for CSS, JS, and images
-- Handles nested directory structure
+- Handles nested directory structure: pages are discovered recursively and
+  written to the same URLs Jekyll would use (permalink style, front matter
+  `permalink:`, directory index.md, `exclude:` list)
 - Supports YAML front matter in markdown files
+- Renders the layout with a compiled Liquid subset (include/if/variables),
+  see fallback_template.py
+- Incremental rebuilds: only changed pages are re-rendered and only changed
+  static files are copied (use --full to force a clean rebuild)
+- Parallel rendering across a process pool (--jobs N)
+- Local preview server with live reload (`serve`, see fallback_serve.py)
+- Optional post-build optimisation stages (--postbuild)
+- Stage timing spans exported as a Chrome trace (--trace FILE), with
+  optional cProfile (--profile FILE) and tracemalloc (--tracemalloc) capture,
+  see tracing.py
 
 Run from workspace root:
   /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py --full
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py --jobs 4
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py --postbuild
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py --postbuild --trace trace.json
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py serve
 """
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import argparse
+import fnmatch
+import hashlib
+import json
 import re
 import markdown
+import os
 import shutil
+import time
+
+from baseurl_rewrite import prefix_baseurl
+from fallback_template import compile_template
+import tracing
+from tracing import span
 
 # ============================================================================
 # Configuration: Define base paths
 # ============================================================================
-BASE = Path('/Users/bird/Code/fttt/static-page/jekyll-site')
-PAGES = BASE  # Pages are now in root directory (*.md files alongside index.md)
+BASE = Path(__file__).resolve().parent
+PAGES = BASE  # Pages live in the site root and nested section directories
 LAYOUT = BASE / '_layouts' / 'default.html'
+INCLUDES = BASE / '_includes'
 CONFIG = BASE / '_config.yml'
 OUT = BASE / '_site'
 
+# Build manifest used by incremental builds (kept outside _site/ so it is
+# never deployed; Jekyll ignores dot-directories)
+MANIFEST = BASE / '.fallback-cache' / 'manifest.json'
+MANIFEST_VERSION = 2
+
+# Extensions rendered as pages when the file starts with front matter
+MARKDOWN_EXTENSIONS = {'.md', '.markdown'}
+
+# Entries Jekyll always excludes in addition to the `exclude:` setting
+DEFAULT_EXCLUDES = [
+    '.sass-cache', '.jekyll-cache', 'gemfiles', 'Gemfile', 'Gemfile.lock',
+    'node_modules', 'vendor/bundle/', 'vendor/cache/', 'vendor/gems/',
+    'vendor/ruby/',
+]
+
+
+def set_site_root(root):
+    """
+    Point the builder at another Jekyll source tree (its _site/, layouts,
+    includes, config and manifest), e.g. a generated benchmark site.
+    """
+    global BASE, PAGES, LAYOUT, INCLUDES, CONFIG, OUT, MANIFEST
+
+    BASE = Path(root).resolve()
+    PAGES = BASE
+    LAYOUT = BASE / '_layouts' / 'default.html'
+    INCLUDES = BASE / '_includes'
+    CONFIG = BASE / '_config.yml'
+    OUT = BASE / '_site'
+    MANIFEST = BASE / '.fallback-cache' / 'manifest.json'
+
 
 # ============================================================================
 # Configuration Readers
@@ -70,6 +131,171 @@ def read_baseurl():
     return val
 
 
+def read_permalink_style():
+    """
+    Read the site-wide permalink style from _config.yml.
+    Returns Jekyll's default 'date' style if not set.
+    """
+    if not CONFIG.exists():
+        return 'date'
+
+    txt = CONFIG.read_text(encoding='utf-8', errors='ignore')
+    match = re.search(r'^permalink:\s*(.*)$', txt, flags=re.MULTILINE)
+
+    if not match:
+        return 'date'
+
+    return match.group(1).strip().strip('"').strip("'") or 'date'
+
+
+def read_config_list(key):
+    """
+    Read a block-style YAML list (`key:` followed by `  - item` lines) from
+    _config.yml. Returns an empty list if the key is missing.
+    """
+    if not CONFIG.exists():
+        return []
+
+    items = []
+    in_list = False
+
+    for line in CONFIG.read_text(encoding='utf-8', errors='ignore').splitlines():
+        if re.match(rf'^{re.escape(key)}:\s*$', line):
+            in_list = True
+            continue
+        if not in_list:
+            continue
+
+        match = re.match(r'^\s+-\s*(.+?)\s*$', line)
+        if match:
+            items.append(match.group(1).strip('"').strip("'"))
+        elif line.strip() and not line.lstrip().startswith('#'):
+            break
+
+    return items
+
+
+# ============================================================================
+# Page Discovery
+# ============================================================================
+
+def is_excluded(rel, excludes):
+    """
+    Return True if a path (relative to the site root, POSIX separators)
+    matches an `exclude:` entry, either directly, as a glob, or by living
+    inside an excluded directory.
+    """
+    for pattern in excludes:
+        prefix = pattern.rstrip('/')
+        if rel == prefix or rel.startswith(prefix + '/'):
+            return True
+        if fnmatch.fnmatch(rel, pattern):
+            return True
+    return False
+
+
+def is_special(name):
+    """
+    Jekyll skips entries starting with '.', '_' or '#', or ending with '~'
+    (layouts, includes, _site/, editor backups, dotfiles).
+    """
+    return name.startswith(('.', '_', '#')) or name.endswith('~')
+
+
+def has_front_matter(path):
+    """Return True if a file starts with a YAML front matter fence."""
+    with open(path, 'rb') as fh:
+        return fh.read(3) == b'---'
+
+
+def scan_site(root=None):
+    """
+    Walk the site source once and build an in-memory file index.
+
+    Files that Jekyll would ignore (special names, `exclude:` entries) are
+    pruned during the walk. Markdown files with front matter become pages;
+    every other file is a static file copied verbatim.
+
+    Returns:
+        dict: {'pages': [rel, ...], 'static': {rel: os.stat_result}}
+    """
+    root = root or BASE
+    excludes = read_config_list('exclude') + DEFAULT_EXCLUDES
+    pages = []
+    static = {}
+    stack = ['']
+
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(root / rel_dir if rel_dir else root) as entries:
+            for entry in entries:
+                if is_special(entry.name):
+                    continue
+
+                rel = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                if is_excluded(rel, excludes):
+                    continue
+
+                if entry.is_dir():
+                    stack.append(rel)
+                elif (Path(entry.name).suffix.lower() in MARKDOWN_EXTENSIONS
+                        and has_front_matter(entry.path)):
+                    pages.append(rel)
+                elif entry.is_file():
+                    static[rel] = entry.stat()
+
+    pages.sort()
+    return {'pages': pages, 'static': dict(sorted(static.items()))}
+
+
+def page_url(rel, front_matter, permalink_style):
+    """
+    Compute a page URL the way Jekyll does for pages (not posts).
+
+    - A `permalink:` in front matter wins.
+    - index.md maps to its directory: '/section/'.
+    - Other pages map to '/:path/:basename/' when the site permalink style
+      ends with '/' (as `/:name:/` does), otherwise '/:path/:basename.html'.
+
+    Args:
+        rel: Source path relative to the site root
+        front_matter: Parsed front matter dictionary
+        permalink_style: `permalink:` value from _config.yml
+
+    Returns:
+        str: Root-relative URL (without baseurl)
+    """
+    if front_matter.get('permalink'):
+        url = front_matter['permalink']
+    else:
+        source = Path(rel)
+        directory = source.parent.as_posix()
+        directory = '' if directory == '.' else directory
+
+        if source.stem == 'index':
+            url = f'/{directory}/'
+        elif permalink_style.endswith('/') or permalink_style == 'pretty':
+            url = f'/{directory}/{source.stem}/'
+        else:
+            url = f'/{directory}/{source.stem}.html'
+
+    url = re.sub(r'/{2,}', '/', '/' + url)
+    return url
+
+
+def output_path_for_url(url):
+    """
+    Map a page URL to its output path relative to _site/, following
+    Jekyll: '/a/' → 'a/index.html', '/a' → 'a.html', '/a.html' → 'a.html'.
+    """
+    path = url.lstrip('/')
+    if not path or path.endswith('/'):
+        return path + 'index.html'
+    if not path.endswith('.html'):
+        return path + '.html'
+    return path
+
+
 # ============================================================================
 # Markdown Processing
 # ============================================================================
@@ -176,87 +402,240 @@ def restore_html_blocks(html_text, placeholder_map):
 
 def prefix_baseurl_in_content(html_content, baseurl):
     """
-    Prefix baseurl to all /assets/ paths in content for proper asset loading
-    when the site is deployed to a subdirectory.
+    Prefix baseurl to all root-relative URLs in content (src, href, srcset,
+    CSS url()) for proper loading when the site is deployed to a
+    subdirectory. Already-prefixed URLs are left alone.
 
     Example:
         If baseurl='/my-site', transforms:
         src="/assets/img.jpg" → src="/my-site/assets/img.jpg"
+        href="/關於訓練/" → href="/my-site/關於訓練/"
 
     Args:
         html_content: HTML content to process
         baseurl: Base URL prefix from config
 
     Returns:
-        str: HTML with prefixed asset paths
+        str: HTML with prefixed paths
     """
     if not baseurl:
         return html_content
 
-    # Replace /assets/ with /baseurl/assets/ in src and href attributes
-    html_content = re.sub(
-        r'(src="|href=")(/assets/)',
-        rf'\g<1>{baseurl}\g<2>',
-        html_content
-    )
-
-    return html_content
+    return prefix_baseurl(html_content, baseurl)
 
 
 # ============================================================================
-# Main Build Function
+# Build Manifest (Incremental Builds)
 # ============================================================================
 
-def render():
+def file_digest(path):
     """
-    Main build function that:
-    1. Reads configuration
-    2. Copies static assets
-    3. Processes markdown files into HTML
-    4. Applies layout template
-    5. Writes output to _site/ directory
+    Return the SHA-256 hex digest of a file, read in chunks so large images
+    do not have to be held in memory.
     """
-    # Read site configuration
-    site_title = read_site_title()
-    baseurl = read_baseurl()
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # Verify layout template exists
-    if not LAYOUT.exists():
-        print(f'❌ Layout not found: {LAYOUT}')
-        return
 
-    layout_t = LAYOUT.read_text(encoding='utf-8', errors='ignore')
+def text_digest(text):
+    """Return the SHA-256 hex digest of a text string."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
-    # Create output directory
-    OUT.mkdir(parents=True, exist_ok=True)
 
-    # Copy static assets (css/js/images) to _site/
-    src_assets = BASE / 'assets'
-    dst_assets = OUT / 'assets'
+def template_digest():
+    """
+    Hash every input shared by all pages: the layout, the includes and the
+    site configuration. When this changes every page must be re-rendered.
+    """
+    digest = hashlib.sha256()
+    inputs = [LAYOUT, CONFIG]
+    if INCLUDES.exists():
+        inputs += sorted(INCLUDES.iterdir())
 
-    if src_assets.exists():
-        if dst_assets.exists():
-            shutil.rmtree(dst_assets)
-        shutil.copytree(src_assets, dst_assets)
-        print(f'✓ COPIED assets → {dst_assets}')
+    for path in inputs:
+        if path.is_file():
+            digest.update(path.relative_to(BASE).as_posix().encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(path.read_bytes())
+            digest.update(b'\0')
 
-    # Track created files for summary
-    created = []
+    return digest.hexdigest()
+
+
+def empty_manifest():
+    """Return a manifest describing an empty _site/ directory."""
+    return {'version': MANIFEST_VERSION, 'templates': None, 'pages': {}, 'static': {}}
+
+
+def load_manifest():
+    """
+    Load the manifest written by the previous build. Returns an empty
+    manifest when it is missing, unreadable or from another format version,
+    which makes the next build a full one.
+    """
+    if not MANIFEST.exists():
+        return empty_manifest()
+
+    try:
+        manifest = json.loads(MANIFEST.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return empty_manifest()
 
-    # Collect all markdown files to process (PAGES is now BASE, so all .md files)
-    all_pages = sorted(PAGES.glob('*.md'))
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty_manifest()
 
-    # Exclude README.md and other non-page files
-    all_pages = [p for p in all_pages if p.stem not in ['README', 'Gemfile']]
+    return manifest
 
-    # Process each markdown file
-    for mdfile in sorted(all_pages):
-        txt = mdfile.read_text(encoding='utf-8', errors='ignore')
 
-        # Parse YAML front matter and markdown body
+def save_manifest(manifest):
+    """Write the build manifest next to (not inside) the output tree."""
+    MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    MANIFEST.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True),
+        encoding='utf-8'
+    )
+
+
+def load_fingerprints():
+    """
+    Originals that postbuild_assets.py served under a fingerprinted name
+    and then deleted from _site/, mapped to that name (site paths).
+    """
+    import postbuild_assets
+    return postbuild_assets.load_state()['fingerprints']
+
+
+def static_output_exists(rel, fingerprints):
+    """
+    True when the output of a static file is in _site/, either as is or as
+    the fingerprinted copy that replaced it.
+    """
+    if (OUT / rel).exists():
+        return True
+    fp_rel = fingerprints.get(rel)
+    return fp_rel is not None and (OUT / fp_rel).is_file()
+
+
+def sync_static(static_files, previous, fingerprints):
+    """
+    Copy static files into _site/ only when their content changed.
+
+    A file whose size and mtime match the previous manifest entry is assumed
+    unchanged without being read; otherwise it is hashed and only copied when
+    the hash differs (or the output copy has gone missing). An original that
+    the post-build stage dropped for its fingerprinted copy is not missing:
+    copying it back would make every incremental --postbuild run fingerprint
+    the same files again.
+
+    Args:
+        static_files: Mapping of relative path → stat result from scan_site()
+        previous: Static file entries from the previous manifest
+        fingerprints: Original → fingerprinted path from load_fingerprints()
+
+    Returns:
+        tuple: (static_entries, number_of_files_copied)
+    """
+    entries = {}
+    copied = 0
+
+    for rel, stat in static_files.items():
+        old = previous.get(rel)
+        present = old is not None and static_output_exists(rel, fingerprints)
+
+        if (present
+                and old['size'] == stat.st_size
+                and old['mtime_ns'] == stat.st_mtime_ns):
+            entries[rel] = old
+            continue
+
+        digest = file_digest(BASE / rel)
+        if not (present and old['hash'] == digest):
+            dst = OUT / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(BASE / rel, dst)
+            copied += 1
+
+        entries[rel] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'hash': digest,
+        }
+
+    return entries, copied
+
+
+def remove_stale_outputs(stale_paths):
+    """
+    Delete outputs that no longer have a source, pruning directories that
+    become empty (but never _site/ itself).
+
+    Args:
+        stale_paths: Output paths relative to _site/
+
+    Returns:
+        int: Number of files removed
+    """
+    removed = 0
+
+    for rel in sorted(stale_paths):
+        path = OUT / rel
+        if path.is_file():
+            path.unlink()
+            removed += 1
+
+        parent = path.parent
+        while parent != OUT and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+    return removed
+
+
+# ============================================================================
+# Page Rendering
+# ============================================================================
+
+def page_context(front_matter, src_rel, url):
+    """
+    Build the Liquid `page` variable from front matter. Empty values become
+    None, matching YAML null (falsy in `{% if %}`).
+    """
+    page = {k: (v if v != '' else None) for k, v in front_matter.items()}
+    page.setdefault('title', Path(src_rel).stem)
+    page['url'] = url
+    page['path'] = src_rel
+    return page
+
+
+def render_page(txt, src_rel, url, layout, site, include_cache=None):
+    """
+    Render one markdown page (front matter + body) into a full HTML page.
+
+    Args:
+        txt: Raw markdown file contents
+        src_rel: Source path relative to the site root
+        url: Page URL (without baseurl)
+        layout: Compiled layout template
+        site: Liquid `site` variable ({'title': ..., 'baseurl': ...})
+        include_cache: Shared cache of compiled _includes/ files
+
+    Returns:
+        str: Complete HTML page
+    """
+    # Parse YAML front matter and markdown body
+    with span('parse', 'render'):
         fm, body_md = parse_front_matter(txt)
-        title = fm.get('title', mdfile.stem)
+        context = {'site': site, 'page': page_context(fm, src_rel, url)}
 
+    # Like Jekyll, render Liquid in the page body before markdown
+    if '{{' in body_md or '{%' in body_md:
+        with span('liquid', 'render'):
+            body_md = compile_template(body_md, INCLUDES, include_cache).render(context)
+
+    with span('markdown', 'render'):
         # Extract HTML blocks to preserve them during markdown processing
         body_md, html_blocks = preserve_html_blocks(body_md)
 
@@ -269,42 +648,313 @@ def render():
         # Restore the HTML blocks that were temporarily removed
         html_body = restore_html_blocks(html_body, html_blocks)
 
-        # Prefix baseurl to asset paths for correct loading
-        html_body = prefix_baseurl_in_content(html_body, baseurl)
-
-        # Apply layout template with content and metadata
-        page_html = layout_t
-        page_html = page_html.replace('{{ content }}', html_body)
-        page_html = page_html.replace('{{ page.title }}', title)
-        page_html = page_html.replace('{{ site.title }}', site_title)
-        page_html = page_html.replace('{{ site.baseurl }}', baseurl)
-
-        # Determine output path based on file location
-        slug = mdfile.stem
-
-        if slug == 'index':
-            # Root index.md → _site/index.html
-            out_file = OUT / 'index.html'
-            out_file.write_text(page_html, encoding='utf-8')
-            created.append(out_file)
-            print(f'✓ WROTE index.html')
-        else:
-            # Other pages → _site/{slug}/index.html
-            out_dir = OUT / slug
-            out_dir.mkdir(parents=True, exist_ok=True)
-            out_file = out_dir / 'index.html'
-            out_file.write_text(page_html, encoding='utf-8')
-            created.append(out_file)
-            print(f'✓ WROTE {slug}/index.html')
+    # Prefix baseurl to asset paths for correct loading
+    with span('baseurl', 'render'):
+        html_body = prefix_baseurl_in_content(html_body, site['baseurl'])
+
+    # Apply layout template with content and metadata
+    with span('layout', 'render'):
+        context['content'] = html_body
+        return layout.render(context)
+
+
+# Shared render context for the current process. Worker processes receive it
+# once through the pool initializer instead of once per page.
+_render_context = {}
+
+
+def init_render_context(layout, site, root=None):
+    """
+    Store the compiled layout and site values used by render_to_file().
+    Workers also receive the site root, since they may not share the
+    parent's module state.
+    """
+    if root is not None and Path(root) != BASE:
+        set_site_root(root)
+    _render_context['layout'] = layout
+    _render_context['site'] = site
+    _render_context['include_cache'] = {}
+
+
+def render_to_file(task):
+    """
+    Render one page and write it to _site/. Runs either in-process or in a
+    pool worker, so it only relies on the shared render context.
+
+    Args:
+        task: Tuple of (markdown_text, source_path, url, output_path)
+
+    Returns:
+        str: The output path that was written
+    """
+    txt, src_rel, url, out_rel = task
+    with span('render_page', 'render', page=src_rel):
+        page_html = render_page(
+            txt,
+            src_rel,
+            url,
+            _render_context['layout'],
+            _render_context['site'],
+            _render_context['include_cache']
+        )
+
+    with span('write', 'render'):
+        out_file = OUT / out_rel
+        out_file.parent.mkdir(parents=True, exist_ok=True)
+        out_file.write_text(page_html, encoding='utf-8')
+    return out_rel
+
+
+def render_pages(tasks, layout, site, jobs=1):
+    """
+    Render and write pages, serially or across a process pool.
+
+    Results are yielded in task order regardless of which worker finished
+    first, so logs and output are identical to a serial build.
+
+    Args:
+        tasks: List of (markdown_text, source_path, url, output_path)
+        layout: Compiled layout template
+        site: Liquid `site` variable
+        jobs: Number of worker processes (1 renders in-process)
+
+    Yields:
+        str: Output path of each written page
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        init_render_context(layout, site)
+        for task in tasks:
+            yield render_to_file(task)
+        return
+
+    workers = min(jobs, len(tasks))
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_render_context,
+        initargs=(layout, site, BASE)
+    ) as pool:
+        yield from pool.map(render_to_file, tasks, chunksize=chunksize)
+
+
+# ============================================================================
+# Main Build Function
+# ============================================================================
+
+def render(full=False, jobs=1):
+    """
+    Main build function that:
+    1. Reads configuration and the previous build manifest
+    2. Scans the source tree and syncs changed static files
+    3. Processes changed markdown pages into HTML
+    4. Applies the compiled layout template
+    5. Writes output to _site/ directory and removes stale outputs
+
+    Args:
+        full: Ignore the previous manifest and rebuild everything
+        jobs: Number of worker processes used to render pages
+    """
+    started = time.perf_counter()
+
+    # Read site configuration
+    site_vars = {'title': read_site_title(), 'baseurl': read_baseurl()}
+    permalink_style = read_permalink_style()
+
+    # Verify layout template exists
+    if not LAYOUT.exists():
+        print(f'❌ Layout not found: {LAYOUT}')
+        return
+
+    # Parse the layout and its includes once for the whole build
+    with span('compile_layout'):
+        layout = compile_template(
+            LAYOUT.read_text(encoding='utf-8', errors='ignore'),
+            INCLUDES
+        )
+
+    # A missing manifest means we cannot trust what is in _site/: rebuild all
+    previous = empty_manifest() if full else load_manifest()
+    full = full or previous['templates'] is None
+    templates = template_digest()
+    templates_changed = previous['templates'] != templates
+
+    manifest = empty_manifest()
+    manifest['templates'] = templates
+
+    # Start from an empty output directory on full builds
+    if full and OUT.exists():
+        shutil.rmtree(OUT)
+    OUT.mkdir(parents=True, exist_ok=True)
+
+    # One walk over the source tree finds every page and static file
+    with span('scan'):
+        site = scan_site(PAGES)
+
+    # Copy static files (assets/css/js/images, ...) to _site/
+    fingerprints = {} if full else load_fingerprints()
+    with span('copy_static'):
+        manifest['static'], copied = sync_static(site['static'], previous['static'], fingerprints)
+    print(f'✓ SYNCED {len(site["static"])} static files → {OUT} ({copied} copied)')
+
+    # Track created files for summary
+    created = []
+    unchanged = 0
+    tasks = []
+
+    # Process each markdown page
+    with span('read_pages'):
+        for src_rel in site['pages']:
+            mdfile = BASE / src_rel
+            txt = mdfile.read_text(encoding='utf-8', errors='ignore')
+            fm, _ = parse_front_matter(txt)
+            url = page_url(src_rel, fm, permalink_style)
+            out_rel = output_path_for_url(url)
+
+            entry = {'hash': text_digest(txt), 'output': out_rel}
+            manifest['pages'][src_rel] = entry
+
+            old = previous['pages'].get(src_rel)
+            if not templates_changed and old == entry and (OUT / out_rel).exists():
+                unchanged += 1
+                continue
+
+            tasks.append((txt, src_rel, url, out_rel))
+
+    # Render changed pages (in parallel when --jobs > 1)
+    with span('render_pages', pages=len(tasks), jobs=jobs):
+        for out_rel in render_pages(tasks, layout, site_vars, jobs):
+            created.append(OUT / out_rel)
+            print(f'✓ WROTE {out_rel}')
+
+    # Remove outputs whose sources were deleted or moved
+    current_outputs = {e['output'] for e in manifest['pages'].values()}
+    current_outputs |= set(manifest['static'])
+    previous_outputs = {e['output'] for e in previous['pages'].values()}
+    previous_outputs |= set(previous['static'])
+    stale = previous_outputs - current_outputs
+    # A deleted static file may only be left as its fingerprinted copy
+    for rel in stale & set(fingerprints):
+        stale |= {fingerprints[rel] + suffix for suffix in ('', '.gz', '.br')}
+    with span('cleanup'):
+        removed = remove_stale_outputs(stale)
+        save_manifest(manifest)
 
     # Print build summary
-    print(f'\n✅ Fallback build complete. Files written: {len(created)}')
+    elapsed = time.perf_counter() - started
+    print(f'\n✅ Fallback build complete in {elapsed * 1000:.0f} ms. '
+          f'Files written: {len(created)}, unchanged: {unchanged}, removed: {removed}')
     print(f'📁 Open in browser: file://{OUT}/index.html')
 
 
+# ============================================================================
+# Post-build Stages
+# ============================================================================
+
+def run_postbuild(jobs=1):
+    """
+    Run the post-build optimisation stages over _site/ in order. Each stage
+    module also has its own command line for use after a Jekyll build.
+    """
+    import image_pipeline
+    import minify_site
+    import postbuild_assets
+    import search_index
+    import youtube_facade
+
+    baseurl = read_baseurl()
+
+    print('\n🔧 Post-build: YouTube facades')
+    with span('youtube_facade', 'postbuild'):
+        youtube_facade.run(OUT, baseurl, jobs)
+
+    print('\n🔧 Post-build: responsive images')
+    with span('image_pipeline', 'postbuild'):
+        image_pipeline.run(OUT, baseurl, jobs)
+
+    print('\n🔧 Post-build: minify + critical CSS')
+    with span('minify_site', 'postbuild'):
+        minify_site.run(OUT, baseurl, jobs)
+
+    # Before fingerprinting, so the index files are precompressed (and
+    # recorded) by the same pass as the rest of the site
+    print('\n🔧 Post-build: search index')
+    with span('search_index', 'postbuild'):
+        search_index.run(OUT, baseurl, jobs)
+
+    print('\n🔧 Post-build: fingerprint + precompress assets')
+    with span('postbuild_assets', 'postbuild'):
+        postbuild_assets.run(OUT, baseurl, jobs)
+
+
 # ============================================================================
 # Entry Point
 # ============================================================================
 
+def main():
+    parser = argparse.ArgumentParser(
+        description='Render the Jekyll site into _site/ without Ruby/Jekyll.'
+    )
+    parser.add_argument(
+        'command', nargs='?', choices=['build', 'serve'], default='build',
+        help='build once (default) or serve _site/ and rebuild on changes'
+    )
+    parser.add_argument(
+        '--full', action='store_true',
+        help='ignore the build manifest and rebuild every page and asset'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=int, default=1,
+        help='render pages in N worker processes (0 = one per CPU core)'
+    )
+    parser.add_argument(
+        '--postbuild', action='store_true',
+        help='run the post-build optimisation stages after building'
+    )
+    parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='interface for `serve` (default: 127.0.0.1)'
+    )
+    parser.add_argument(
+        '--port', type=int, default=4000,
+        help='port for `serve` (default: 4000)'
+    )
+    parser.add_argument(
+        '--trace', metavar='FILE', default=None,
+        help='write a Chrome trace-event JSON of the build and print a per-stage summary'
+    )
+    parser.add_argument(
+        '--profile', metavar='FILE', default=None,
+        help='run the build under cProfile and write the stats to FILE'
+    )
+    parser.add_argument(
+        '--tracemalloc', action='store_true',
+        help='report peak memory and the top allocation sites'
+    )
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
+    if args.command == 'serve':
+        from fallback_serve import serve
+
+        serve(host=args.host, port=args.port, jobs=jobs, full=args.full)
+        return
+
+    if args.trace:
+        tracing.enable()
+
+    with tracing.profiled(args.profile, memory=args.tracemalloc):
+        with span('build', 'main'):
+            render(full=args.full, jobs=jobs)
+        if args.postbuild:
+            with span('postbuild', 'main'):
+                run_postbuild(jobs=jobs)
+
+    if args.trace:
+        tracing.disable()
+        events = tracing.export(args.trace)
+        tracing.print_summary(events)
+        print(f'📈 Trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)')
+
+
 if __name__ == '__main__':
-    render()
\ No newline at end of file
+    main()
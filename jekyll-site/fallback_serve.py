@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Local preview server for the fallback builder.
+
+Serves `_site/` over HTTP, polls the site sources for changes, rebuilds
+incrementally (only affected pages/static files, see fallback_build.render)
+and tells open browser tabs to reload through a Server-Sent Events stream.
+
+Run from workspace root:
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py serve
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/fallback_build.py serve --port 4000
+"""
+
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import mimetypes
+import os
+import threading
+import time
+import urllib.parse
+
+import fallback_build
+
+# Endpoint the injected client script listens on
+LIVERELOAD_PATH = '/__livereload'
+
+# Injected before </body> of every served HTML page
+LIVERELOAD_SNIPPET = (
+    '<script>(function () {'
+    'var es = new EventSource("' + LIVERELOAD_PATH + '");'
+    'es.onmessage = function (e) { if (e.data === "reload") location.reload(); };'
+    '})();</script>'
+)
+
+# Directories under jekyll-site/ that never affect the build output
+IGNORED_DIRS = {'_site', '.fallback-cache', '.git', '.venv', 'venv',
+                '__pycache__', 'node_modules', '.jekyll-cache'}
+
+POLL_INTERVAL = 0.25   # seconds between source scans
+DEBOUNCE = 0.15        # quiet period before rebuilding after a change
+
+# Content types missing from some platform mime tables
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+
+# ============================================================================
+# File Watching
+# ============================================================================
+
+def snapshot_sources(root):
+    """
+    Return {path: (mtime_ns, size)} for every file that can affect the build:
+    pages, static files, _layouts/, _includes/ and _config*.yml.
+    """
+    state = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+class BuildNotifier:
+    """Build counter that SSE handlers block on until the next rebuild."""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def watch_and_rebuild(root, notifier, jobs=1, stop=None):
+    """
+    Poll `root` and rebuild incrementally whenever sources change.
+
+    Changes are debounced: after the first change is seen the watcher waits
+    until the tree has been quiet for DEBOUNCE seconds, so an editor writing
+    several files (or a swap file and a rename) triggers a single rebuild.
+    """
+    stop = stop or threading.Event()
+    previous = snapshot_sources(root)
+
+    while not stop.wait(POLL_INTERVAL):
+        current = snapshot_sources(root)
+        if current == previous:
+            continue
+
+        # Wait for the burst of writes to settle
+        while not stop.wait(DEBOUNCE):
+            settled = snapshot_sources(root)
+            if settled == current:
+                break
+            current = settled
+
+        changed = sorted(
+            Path(p).relative_to(root).as_posix()
+            for p in set(current) ^ set(previous)
+            | {p for p in current if p in previous and current[p] != previous[p]}
+        )
+        previous = current
+        print(f'\n🔄 Changed: {", ".join(changed[:5])}'
+              + (f' (+{len(changed) - 5} more)' if len(changed) > 5 else ''))
+
+        started = time.perf_counter()
+        try:
+            fallback_build.render(jobs=jobs)
+        except Exception as exc:  # keep serving the last good build
+            print(f'❌ Rebuild failed: {exc}')
+            continue
+
+        print(f'⚡ Rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms, reloading browsers')
+        notifier.notify()
+
+
+# ============================================================================
+# HTTP Server
+# ============================================================================
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler for _site/ that strips the configured baseurl,
+    resolves extensionless URLs to `.html` files like `jekyll serve`,
+    injects the live reload client and streams reload events.
+    """
+
+    notifier = None
+    baseurl = ''
+
+    def log_message(self, format, *args):
+        # Keep the console for build output; only report errors
+        if args and str(args[1]).startswith(('4', '5')):
+            super().log_message(format, *args)
+
+    def translate_path(self, path):
+        path = urllib.parse.urlsplit(path).path
+        if self.baseurl and path.startswith(self.baseurl + '/'):
+            path = path[len(self.baseurl):]
+        elif self.baseurl and path == self.baseurl:
+            path = '/'
+
+        resolved = super().translate_path(path)
+        if not os.path.exists(resolved) and os.path.exists(resolved + '.html'):
+            resolved += '.html'
+        return resolved
+
+    def guess_type(self, path):
+        ctype = super().guess_type(path)
+        if ctype.startswith('text/') or ctype in ('application/javascript', 'application/json'):
+            ctype += '; charset=utf-8'
+        return ctype
+
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self.stream_reload_events()
+            return
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split('?')[0].endswith('/'):
+            path = os.path.join(path, 'index.html')
+
+        if path.endswith('.html') and os.path.isfile(path):
+            self.send_html_with_reload(path)
+            return
+
+        super().do_GET()
+
+    def send_html_with_reload(self, path):
+        with open(path, 'rb') as fh:
+            body = fh.read()
+
+        snippet = LIVERELOAD_SNIPPET.encode('utf-8')
+        if b'</body>' in body:
+            body = body.replace(b'</body>', snippet + b'</body>', 1)
+        else:
+            body += snippet
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reload_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+
+        generation = self.notifier.generation
+        try:
+            while True:
+                current = self.notifier.wait(generation, timeout=15)
+                if current != generation:
+                    generation = current
+                    self.wfile.write(b'data: reload\n\n')
+                else:
+                    self.wfile.write(b': keep-alive\n\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(host='127.0.0.1', port=4000, jobs=1, full=False):
+    """
+    Build once, then serve _site/ and rebuild on every source change.
+
+    Args:
+        host: Interface to bind
+        port: TCP port to listen on
+        jobs: Worker processes used for rebuilds
+        full: Make the initial build a full rebuild
+    """
+    fallback_build.render(full=full, jobs=jobs)
+
+    notifier = BuildNotifier()
+    baseurl = fallback_build.read_baseurl().rstrip('/')
+    handler = type('Handler', (PreviewHandler,), {
+        'notifier': notifier,
+        'baseurl': baseurl,
+    })
+
+    stop = threading.Event()
+    watcher = threading.Thread(
+        target=watch_and_rebuild,
+        args=(fallback_build.BASE, notifier, jobs, stop),
+        daemon=True
+    )
+    watcher.start()
+
+    server = ThreadingHTTPServer(
+        (host, port),
+        partial(handler, directory=str(fallback_build.OUT))
+    )
+    server.daemon_threads = True
+
+    print(f'\n📍 Serving {fallback_build.OUT} at http://{host}:{port}{baseurl}/')
+    print('👀 Watching for changes. Press Ctrl+C to stop.')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('\n👋 Stopping server')
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    serve()
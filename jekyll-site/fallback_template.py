@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Minimal compiled Liquid templates for the fallback builder.
+
+Jekyll renders `_layouts/default.html` with Liquid. The fallback builder
+only needs the small subset our templates actually use, so this module
+implements just that:
+
+- {{ variable.path }}             lookup in the render context
+- {% include file.html %}          inlined from _includes/ at compile time
+- {% if x %} / {% unless x %} ... {% else %} ... {% endif %} / {% endunless %}
+- {% raw %} ... {% endraw %} and {% comment %} ... {% endcomment %}
+- {%- -%} / {{- -}} whitespace control
+
+A template is parsed once into a flat list of nodes: static text chunks
+(adjacent ones merged) and slots (variables and conditionals). Rendering a
+page walks that list and joins the parts once, so the cost per page does not
+depend on how many placeholders the layout contains.
+
+Usage:
+  layout = compile_template(layout_text, includes_dir)
+  html = layout.render({'page': {...}, 'site': {...}, 'content': body})
+"""
+
+from pathlib import Path
+import re
+
+# Matches {{ ... }} and {% ... %} tags (with optional '-' trim markers)
+TAG_RE = re.compile(r'(\{\{-?.*?-?\}\}|\{%-?.*?-?%\})', re.DOTALL)
+
+
+class TemplateError(ValueError):
+    """Raised for template syntax the fallback builder does not support."""
+
+
+class Template:
+    """A compiled template: a list of static chunks and slot nodes."""
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def render(self, context):
+        """
+        Render the template with a context dictionary.
+
+        Args:
+            context: Nested dictionaries, e.g. {'page': {...}, 'site': {...}}
+
+        Returns:
+            str: Rendered text
+        """
+        parts = []
+        _render_nodes(self.nodes, context, parts)
+        return ''.join(parts)
+
+
+# ============================================================================
+# Rendering
+# ============================================================================
+
+def lookup(context, path):
+    """
+    Resolve a dotted variable path ('page.title') in the context.
+    Missing keys resolve to None, like Liquid's nil.
+    """
+    value = context
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+    return value
+
+
+def is_truthy(value):
+    """Liquid truthiness: only nil and false are falsy."""
+    return value is not None and value is not False
+
+
+def _render_nodes(nodes, context, parts):
+    for node in nodes:
+        if node.__class__ is str:
+            parts.append(node)
+        elif node[0] == 'var':
+            value = lookup(context, node[1])
+            if value is not None:
+                parts.append(str(value))
+        else:
+            # ('if', path, negate, then_nodes, else_nodes)
+            _, path, negate, then_nodes, else_nodes = node
+            if is_truthy(lookup(context, path)) != negate:
+                _render_nodes(then_nodes, context, parts)
+            else:
+                _render_nodes(else_nodes, context, parts)
+
+
+# ============================================================================
+# Compilation
+# ============================================================================
+
+def parse_variable(expr):
+    """
+    Parse a variable expression into a lookup path.
+    Filters ('x | upcase') are not supported by the fallback builder.
+    """
+    expr = expr.strip()
+    if '|' in expr:
+        raise TemplateError(f'Liquid filters are not supported: {{{{ {expr} }}}}')
+    if not re.fullmatch(r'[\w-]+(\.[\w-]+)*', expr):
+        raise TemplateError(f'Unsupported variable expression: {expr!r}')
+    return tuple(expr.split('.'))
+
+
+def tokenize(text):
+    """
+    Split template text into ('text', str), ('var', expr) and
+    ('tag', name, args) tokens, applying whitespace-control markers.
+    """
+    tokens = []
+    trim_next = False
+
+    for piece in TAG_RE.split(text):
+        if not piece:
+            continue
+
+        is_var = piece.startswith('{{') and piece.endswith('}}')
+        is_tag = piece.startswith('{%') and piece.endswith('%}')
+
+        if not (is_var or is_tag):
+            if trim_next:
+                piece = piece.lstrip()
+            tokens.append(['text', piece])
+            trim_next = False
+            continue
+
+        inner = piece[2:-2]
+        if inner.startswith('-'):
+            inner = inner[1:]
+            if tokens and tokens[-1][0] == 'text':
+                tokens[-1][1] = tokens[-1][1].rstrip()
+        trim_next = inner.endswith('-')
+        if trim_next:
+            inner = inner[:-1]
+
+        if is_var:
+            tokens.append(['var', inner.strip()])
+        else:
+            name, _, args = inner.strip().partition(' ')
+            tokens.append(['tag', name, args.strip()])
+
+    return tokens
+
+
+def _append_text(nodes, text):
+    if not text:
+        return
+    if nodes and nodes[-1].__class__ is str:
+        nodes[-1] += text
+    else:
+        nodes.append(text)
+
+
+def _append_nodes(nodes, more):
+    for node in more:
+        if node.__class__ is str:
+            _append_text(nodes, node)
+        else:
+            nodes.append(node)
+
+
+def compile_template(text, includes_dir=None, include_cache=None):
+    """
+    Compile template text into a Template.
+
+    Args:
+        text: Template source
+        includes_dir: Directory searched by {% include %} (e.g. _includes/)
+        include_cache: Optional dict shared between compilations so each
+            include file is read and compiled only once
+
+    Returns:
+        Template: The compiled template
+
+    Raises:
+        TemplateError: On unsupported or unbalanced tags
+    """
+    include_cache = {} if include_cache is None else include_cache
+    tokens = tokenize(text)
+
+    # Stack of (nodes, open_block) where open_block is the pending 'if' node
+    root = []
+    stack = []
+    nodes = root
+    index = 0
+
+    while index < len(tokens):
+        token = tokens[index]
+        index += 1
+
+        if token[0] == 'text':
+            _append_text(nodes, token[1])
+            continue
+
+        if token[0] == 'var':
+            nodes.append(('var', parse_variable(token[1])))
+            continue
+
+        _, name, args = token
+
+        if name in ('raw', 'comment'):
+            # Collect everything up to the matching end tag verbatim
+            end = 'end' + name
+            raw = []
+            while index < len(tokens) and not (
+                    tokens[index][0] == 'tag' and tokens[index][1] == end):
+                raw.append(_token_source(tokens[index]))
+                index += 1
+            if index == len(tokens):
+                raise TemplateError(f'Unclosed {{% {name} %}} block')
+            index += 1
+            if name == 'raw':
+                _append_text(nodes, ''.join(raw))
+
+        elif name == 'include':
+            nodes_from_include = _compile_include(args, includes_dir, include_cache)
+            _append_nodes(nodes, nodes_from_include)
+
+        elif name in ('if', 'unless'):
+            node = ['if', parse_variable(args), name == 'unless', [], []]
+            stack.append((nodes, node, 'end' + name))
+            nodes = node[3]
+
+        elif name == 'else':
+            if not stack:
+                raise TemplateError('{% else %} outside of a block')
+            _, node, _ = stack[-1]
+            nodes = node[4]
+
+        elif name in ('endif', 'endunless'):
+            if not stack or stack[-1][2] != name:
+                raise TemplateError(f'Unexpected {{% {name} %}}')
+            nodes, node, _ = stack.pop()
+            nodes.append(tuple(node))
+
+        else:
+            raise TemplateError(f'Unsupported Liquid tag: {{% {name} %}}')
+
+    if stack:
+        raise TemplateError(f'Unclosed block, expected {{% {stack[-1][2]} %}}')
+
+    return Template(root)
+
+
+def _token_source(token):
+    if token[0] == 'text':
+        return token[1]
+    if token[0] == 'var':
+        return '{{ ' + token[1] + ' }}'
+    return '{% ' + (token[1] + ' ' + token[2]).strip() + ' %}'
+
+
+def _compile_include(args, includes_dir, include_cache):
+    name = args.strip()
+    if not name or ' ' in name:
+        raise TemplateError(f'Unsupported include: {{% include {args} %}}')
+    if includes_dir is None:
+        raise TemplateError(f'No includes directory for {{% include {name} %}}')
+
+    if name not in include_cache:
+        path = Path(includes_dir) / name
+        if not path.exists():
+            raise TemplateError(f'Include not found: {path}')
+        source = path.read_text(encoding='utf-8', errors='ignore')
+        include_cache[name] = compile_template(
+            source, includes_dir, include_cache
+        ).nodes
+
+    return include_cache[name]
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for finding and rewriting URLs in built HTML and CSS.
+
+The post-build stages (asset fingerprinting, baseurl prefixing, link
+checking, ...) all need the same thing: every URL a page references, found
+in one pass over the document. URLs are looked up in:
+
+- src, href, poster, action, data-src attributes
+- srcset / data-srcset candidate lists
+- CSS url(...) inside <style> blocks and style="" attributes
+
+Script bodies and HTML comments are skipped so inline JavaScript strings
+and commented-out markup are never touched.
+"""
+
+import re
+import urllib.parse
+
+# One alternation so a document is scanned exactly once. Order matters:
+# comments and script bodies are matched first so their contents are skipped.
+TOKEN_RE = re.compile(
+    r'''
+      (?P<comment><!--.*?-->)
+    | <script\b(?P<script_attrs>[^>]*)>(?P<script_body>.*?)</script\s*>
+    | (?P<style_open><style\b[^>]*>)(?P<style_body>.*?)(?=</style\s*>)
+    | (?P<attr_prefix>\s(?P<attr>src|href|poster|action|data-src|srcset|data-srcset|style)
+        \s*=\s*)(?P<quote>["'])(?P<value>.*?)(?P=quote)
+    ''',
+    re.IGNORECASE | re.DOTALL | re.VERBOSE
+)
+
+ATTR_RE = re.compile(
+    r'''(?P<attr_prefix>\s(?P<attr>src|href|poster|action|data-src|srcset|data-srcset|style)
+        \s*=\s*)(?P<quote>["'])(?P<value>.*?)(?P=quote)''',
+    re.IGNORECASE | re.DOTALL | re.VERBOSE
+)
+
+CSS_URL_RE = re.compile(r'''url\(\s*(?P<quote>["']?)(?P<url>[^"')]*?)(?P=quote)\s*\)''')
+
+SRCSET_ATTRS = {'srcset', 'data-srcset'}
+
+
+# ============================================================================
+# Rewriting
+# ============================================================================
+
+def rewrite_srcset(value, fn):
+    """Apply fn to each URL of a srcset candidate list."""
+    candidates = []
+    for candidate in value.split(','):
+        parts = candidate.strip().split(None, 1)
+        if not parts:
+            continue
+        new_url = fn(parts[0])
+        if new_url is not None:
+            parts[0] = new_url
+        candidates.append(' '.join(parts))
+    return ', '.join(candidates)
+
+
+def rewrite_css_urls(css, fn):
+    """
+    Apply fn to every url(...) in a stylesheet.
+
+    Args:
+        css: CSS text
+        fn: Callable taking a URL and returning a replacement or None
+
+    Returns:
+        str: CSS with rewritten URLs
+    """
+    def replace(match):
+        new_url = fn(match.group('url'))
+        if new_url is None:
+            return match.group(0)
+        quote = match.group('quote')
+        return f'url({quote}{new_url}{quote})'
+
+    return CSS_URL_RE.sub(replace, css)
+
+
+def _rewrite_attr(match, fn):
+    attr = match.group('attr').lower()
+    value = match.group('value')
+
+    if attr in SRCSET_ATTRS:
+        new_value = rewrite_srcset(value, fn)
+    elif attr == 'style':
+        new_value = rewrite_css_urls(value, fn)
+    else:
+        new_value = fn(value)
+        if new_value is None:
+            new_value = value
+
+    if new_value == value:
+        return match.group(0)
+    quote = match.group('quote')
+    return f'{match.group("attr_prefix")}{quote}{new_value}{quote}'
+
+
+def rewrite_html_urls(html, fn):
+    """
+    Apply fn to every URL referenced by an HTML document, in one pass.
+
+    Args:
+        html: HTML text
+        fn: Callable taking a URL and returning its replacement, or None to
+            leave it unchanged
+
+    Returns:
+        str: HTML with rewritten URLs
+    """
+    def replace(match):
+        if match.group('comment'):
+            return match.group(0)
+
+        if match.group('script_body') is not None:
+            attrs = match.group('script_attrs')
+            new_attrs = ATTR_RE.sub(lambda m: _rewrite_attr(m, fn), attrs)
+            if new_attrs == attrs:
+                return match.group(0)
+            return f'<script{new_attrs}>{match.group("script_body")}</script>'
+
+        if match.group('style_open'):
+            return match.group('style_open') + rewrite_css_urls(match.group('style_body'), fn)
+
+        return _rewrite_attr(match, fn)
+
+    return TOKEN_RE.sub(replace, html)
+
+
+def extract_html_urls(html):
+    """
+    Return every URL referenced by an HTML document, in document order.
+    """
+    urls = []
+
+    def collect(url):
+        urls.append(url)
+        return None
+
+    rewrite_html_urls(html, collect)
+    return urls
+
+
+# ============================================================================
+# URL Resolution
+# ============================================================================
+
+def is_local_url(url):
+    """
+    Return True for URLs that point into the site itself (root-relative or
+    document-relative paths), False for external, data:, mailto:, fragment
+    only and template URLs.
+    """
+    url = url.strip()
+    if not url or url.startswith(('#', '//', '{{', '{%')):
+        return False
+    return not urllib.parse.urlsplit(url).scheme
+
+
+def resolve_site_path(url, page_rel, baseurl=''):
+    """
+    Resolve a local URL to a path relative to the site root.
+
+    Percent-encoded characters (CJK file names) are decoded, the baseurl
+    prefix is removed from root-relative URLs and document-relative URLs are
+    resolved against the page's directory.
+
+    Args:
+        url: URL as written in the page
+        page_rel: Path of the referencing file relative to the site root
+        baseurl: Configured baseurl ('' or '/static-page')
+
+    Returns:
+        str: Site-relative path ('' for the site root), or None if the URL
+            is not local or escapes the site root
+    """
+    if not is_local_url(url):
+        return None
+
+    path = urllib.parse.unquote(urllib.parse.urlsplit(url.strip()).path)
+    baseurl = baseurl.rstrip('/')
+
+    if path.startswith('/'):
+        if baseurl and (path == baseurl or path.startswith(baseurl + '/')):
+            path = path[len(baseurl):]
+        resolved = path
+    else:
+        page_dir = page_rel.rsplit('/', 1)[0] if '/' in page_rel else ''
+        resolved = f'/{page_dir}/{path}' if page_dir else f'/{path}'
+
+    trailing = resolved.endswith('/')
+    segments = []
+    for segment in resolved.split('/'):
+        if segment in ('', '.'):
+            continue
+        if segment == '..':
+            if not segments:
+                return None
+            segments.pop()
+        else:
+            segments.append(segment)
+
+    site_path = '/'.join(segments)
+    if trailing and site_path:
+        site_path += '/'
+    return site_path
+
+
+def replace_basename(url, new_name):
+    """
+    Replace the last path segment of a URL, keeping its query, fragment and
+    the original encoding style (percent-encoded or raw UTF-8).
+    """
+    parts = urllib.parse.urlsplit(url)
+    head, _, last = parts.path.rpartition('/')
+    if '%' in last:
+        new_name = urllib.parse.quote(new_name)
+    path = f'{head}/{new_name}' if head or parts.path.startswith('/') else new_name
+    return urllib.parse.urlunsplit(parts._replace(path=path))
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+Post-build image stage: responsive variants and <img> rewriting.
+
+For every JPEG/PNG/WebP under assets/images/ in a built site, and the images
+that scripts/enrich_jekyll_site.py downloads into the asset store
+(assets/store/), this stage:
+
+1. Generates resized AVIF, WebP and JPEG (PNG for images with transparency)
+   variants at a few widths, never upscaling, with EXIF/ICC/text metadata
+   stripped and EXIF orientation applied.
+2. Records each image's intrinsic width and height.
+3. Rewrites <img> tags in every HTML page into <picture> elements with
+   srcset/sizes per format, explicit width/height (no layout shift) and
+   loading="lazy" for images inside the main content. `sizes` comes from
+   the tag's own sizes or width attribute, else the content column width;
+   images before <main> without either (layout images whose rendered size
+   only the stylesheet knows) are left alone.
+
+Processed variants are cached in .fallback-cache/images/ by source hash
+(and encoder settings), so reruns only copy cached files. Encoding runs in
+a process pool.
+
+Requires Pillow (`pip install Pillow`); AVIF output needs a Pillow build
+with AVIF support and is skipped otherwise.
+
+Run from workspace root (after a fallback or Jekyll build):
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/image_pipeline.py --jobs 4
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import urllib.parse
+
+import fallback_build
+from html_urls import resolve_site_path
+from postbuild_assets import pool_map, strip_fingerprint
+
+IMAGE_ROOT = 'assets/images'
+VARIANT_DIR = 'variants'
+
+# Source images: the site's own, and the asset store's
+# assets/store/<2 hex digits>/<hash><ext> blobs
+SOURCE_GLOBS = (f'{IMAGE_ROOT}/*', 'assets/store/??/*')
+SOURCE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+# Target widths in CSS pixels; the content column is at most 1200px wide and
+# the hero banner spans the viewport
+WIDTHS = (480, 960, 1440, 1920)
+SIZES = '(max-width: 1200px) 100vw, 1200px'
+WIDTH_ATTR_RE = re.compile(r'^\s*(\d+)\s*(?:px)?\s*$')
+
+QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 80}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+# Bump when the encoding logic changes so cached variants are regenerated
+PIPELINE_VERSION = 1
+SETTINGS_KEY = json.dumps([PIPELINE_VERSION, WIDTHS, QUALITY], sort_keys=True)
+
+IMG_TAG_RE = re.compile(r'<!--.*?-->|<picture\b.*?</picture\s*>|<img\b[^>]*>', re.IGNORECASE | re.DOTALL)
+IMG_ATTR_RE = re.compile(r'''([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>/]+)))?''')
+MAIN_START_RE = re.compile(r'<main\b', re.IGNORECASE)
+
+
+def load_pillow():
+    """Import Pillow lazily so the rest of the build works without it."""
+    try:
+        from PIL import Image, ImageOps, features
+    except ImportError:
+        return None
+    return Image, ImageOps, features
+
+
+def cache_root():
+    """
+    Variant cache directory. Resolved on every run (and passed to the
+    workers) so it follows fallback_build.set_site_root().
+    """
+    return fallback_build.MANIFEST.parent / 'images'
+
+
+# ============================================================================
+# Variant Generation (runs in worker processes)
+# ============================================================================
+
+def source_key(path):
+    """Cache key: hash of the source bytes plus the encoder settings."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b''):
+            digest.update(chunk)
+    digest.update(SETTINGS_KEY.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def process_image(task):
+    """
+    Generate (or reuse) the cached variants for one source image.
+
+    Args:
+        task: Tuple of (source_path, cache_key, cache_root)
+
+    Returns:
+        dict: Metadata {'width', 'height', 'variants': {format: [[w, file]]}}
+            or None if the image could not be decoded
+    """
+    src, key, cache = task
+    cache_dir = cache / key
+    meta_path = cache_dir / 'meta.json'
+    if meta_path.exists():
+        return json.loads(meta_path.read_text(encoding='utf-8'))
+
+    Image, ImageOps, features = load_pillow()
+    try:
+        with Image.open(src) as opened:
+            image = ImageOps.exif_transpose(opened)
+            image.load()
+    except OSError:
+        return None
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    width, height = image.size
+
+    formats = ['webp', 'png' if has_alpha else 'jpeg']
+    if features.check('avif'):
+        formats.insert(0, 'avif')
+
+    targets = sorted({w for w in WIDTHS if w < width} | {min(width, WIDTHS[-1])})
+    tmp_dir = cache_dir.with_name(key + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    variants = {fmt: [] for fmt in formats}
+    for target in targets:
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS)
+        for fmt in formats:
+            name = f'{target}.{EXTENSIONS[fmt]}'
+            # No exif/icc_profile/pnginfo arguments: metadata is dropped
+            if fmt == 'png':
+                resized.save(tmp_dir / name, 'PNG', optimize=True)
+            elif fmt == 'jpeg':
+                resized.save(tmp_dir / name, 'JPEG', quality=QUALITY['jpeg'],
+                             optimize=True, progressive=True)
+            elif fmt == 'webp':
+                resized.save(tmp_dir / name, 'WEBP', quality=QUALITY['webp'], method=6)
+            else:
+                resized.save(tmp_dir / name, 'AVIF', quality=QUALITY['avif'])
+            variants[fmt].append([target, name])
+
+    meta = {'width': width, 'height': height, 'variants': variants}
+    (tmp_dir / 'meta.json').write_text(json.dumps(meta), encoding='utf-8')
+
+    # Publish the finished cache entry atomically
+    try:
+        tmp_dir.rename(cache_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return meta
+
+
+# ============================================================================
+# Publishing Variants
+# ============================================================================
+
+def variant_rel(image_rel, key, target, fmt):
+    """
+    Site path of one variant: assets/images/variants/<stem>-<w>.<hash>.<ext>.
+    The hash makes it fingerprinted (and skipped by postbuild_assets).
+    """
+    stem = Path(image_rel).stem
+    return f'{IMAGE_ROOT}/{VARIANT_DIR}/{stem}-{target}.{key[:10]}.{EXTENSIONS[fmt]}'
+
+
+def publish_variants(site, image_rel, key, meta, cache):
+    """
+    Copy cached variants into the site (hard links when possible).
+
+    Returns:
+        tuple: (image_info, number_of_files_published)
+    """
+    published = 0
+    info = {'width': meta['width'], 'height': meta['height'], 'sources': {}}
+
+    for fmt, entries in meta['variants'].items():
+        candidates = []
+        for target, name in entries:
+            rel = variant_rel(image_rel, key, target, fmt)
+            dst = site / rel
+            if not dst.exists():
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(cache / key / name, dst)
+                except OSError:
+                    shutil.copyfile(cache / key / name, dst)
+                published += 1
+            candidates.append((target, rel))
+        info['sources'][fmt] = candidates
+
+    return info, published
+
+
+# ============================================================================
+# HTML Rewriting
+# ============================================================================
+
+def parse_img_attrs(tag):
+    """Return the attributes of an <img> tag as an ordered dict."""
+    body = tag[4:].rstrip('>').rstrip('/')
+    attrs = {}
+    for match in IMG_ATTR_RE.finditer(body):
+        name, dq, sq, bare = match.groups()
+        value = dq if dq is not None else sq if sq is not None else bare
+        attrs[name.lower()] = value
+    return attrs
+
+
+def format_attrs(attrs):
+    parts = []
+    for name, value in attrs.items():
+        if value is None:
+            parts.append(name)
+        else:
+            # Values are kept as written (entities included); only quotes
+            # from single-quoted attributes need escaping
+            escaped = value.replace('"', '&quot;')
+            parts.append(f'{name}="{escaped}"')
+    return ' '.join(parts)
+
+
+def variant_url(rel, baseurl, encode):
+    path = urllib.parse.quote(rel) if encode else rel
+    return f'{baseurl.rstrip("/")}/{path}'
+
+
+def image_sizes(attrs, layout):
+    """
+    The sizes attribute for an <img>: its own, else its width attribute in
+    pixels, else the content column for content images. Returns None for
+    layout images without either, whose rendered size is set by CSS.
+    """
+    if attrs.get('sizes'):
+        return attrs['sizes']
+    width = WIDTH_ATTR_RE.match(attrs.get('width') or '')
+    if width:
+        return f'{width.group(1)}px'
+    return None if layout else SIZES
+
+
+def fill_dimensions(img, info):
+    """
+    Give an <img> width and height so the browser can reserve its box.
+
+    Missing both, it gets the intrinsic size. With only one of them, the
+    other is derived from the intrinsic aspect ratio (or left unset when the
+    given one is not in pixels), so the image is not distorted.
+    """
+    if 'width' not in img and 'height' not in img:
+        img['width'], img['height'] = str(info['width']), str(info['height'])
+    elif 'height' not in img:
+        match = WIDTH_ATTR_RE.match(img['width'] or '')
+        if match:
+            img['height'] = str(round(int(match.group(1)) * info['height'] / info['width']))
+    elif 'width' not in img:
+        match = WIDTH_ATTR_RE.match(img['height'] or '')
+        if match:
+            img['width'] = str(round(int(match.group(1)) * info['width'] / info['height']))
+
+
+def build_picture(attrs, info, baseurl, lazy, encode, sizes):
+    """Build a <picture> element replacing one <img>."""
+    def srcset(fmt):
+        return ', '.join(f'{variant_url(rel, baseurl, encode)} {w}w'
+                         for w, rel in info['sources'][fmt])
+
+    fallback_fmt = 'png' if 'png' in info['sources'] else 'jpeg'
+    largest = info['sources'][fallback_fmt][-1][1]
+    attrs.pop('sizes', None)
+
+    sources = ''.join(
+        f'<source type="{MIME_TYPES[fmt]}" srcset="{srcset(fmt)}" sizes="{sizes}">'
+        for fmt in ('avif', 'webp') if fmt in info['sources']
+    )
+
+    img = dict(attrs)
+    img['src'] = variant_url(largest, baseurl, encode)
+    img['srcset'] = srcset(fallback_fmt)
+    img['sizes'] = sizes
+    fill_dimensions(img, info)
+    if lazy:
+        img.setdefault('loading', 'lazy')
+    img.setdefault('decoding', 'async')
+
+    return f'<picture>{sources}<img {format_attrs(img)}></picture>'
+
+
+def rewrite_images(html, page_rel, images, baseurl):
+    """
+    Replace every <img> pointing at a processed image with a <picture>.
+    Images before <main> (logo, hero banner) are not lazy-loaded since they
+    are above the fold, and are only rewritten when their size is known
+    (see image_sizes()).
+
+    Returns:
+        tuple: (new_html, number_of_images_rewritten)
+    """
+    main_start = MAIN_START_RE.search(html)
+    main_offset = main_start.start() if main_start else 0
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        tag = match.group(0)
+        if not tag.lower().startswith('<img'):
+            return tag  # comment or an existing <picture>
+
+        attrs = parse_img_attrs(tag)
+        src = attrs.get('src')
+        if not src or 'srcset' in attrs:
+            return tag
+
+        site_path = resolve_site_path(src, page_rel, baseurl)
+        info = site_path and images.get(strip_fingerprint(site_path))
+        if not info:
+            return tag
+
+        in_main = match.start() >= main_offset
+        sizes = image_sizes(attrs, layout=not in_main)
+        if sizes is None:
+            return tag
+
+        count += 1
+        encode = '%' in src
+        return build_picture(attrs, info, baseurl, in_main, encode, sizes)
+
+    return IMG_TAG_RE.sub(replace, html), count
+
+
+_worker_state = {}
+
+
+def init_worker(site, images, baseurl):
+    _worker_state['site'] = site
+    _worker_state['images'] = images
+    _worker_state['baseurl'] = baseurl
+
+
+def rewrite_page(rel):
+    path = _worker_state['site'] / rel
+    html = path.read_text(encoding='utf-8', errors='ignore')
+    new_html, count = rewrite_images(html, rel, _worker_state['images'], _worker_state['baseurl'])
+    if count:
+        path.write_text(new_html, encoding='utf-8')
+    return count
+
+
+# ============================================================================
+# Stage Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1):
+    """
+    Generate responsive image variants and rewrite <img> tags.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes for encoding and HTML rewriting
+
+    Returns:
+        dict: Summary counts
+    """
+    if load_pillow() is None:
+        print('⚠️  Pillow not installed, skipping image optimisation (pip install Pillow)')
+        return {'images': 0, 'images_rewritten': 0}
+
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+    root = site / IMAGE_ROOT
+    cache = cache_root()
+
+    sources = sorted(
+        p for pattern in SOURCE_GLOBS for p in site.glob(pattern)
+        if p.is_file()
+        and p.suffix.lower() in SOURCE_EXTENSIONS
+        and p.name == strip_fingerprint(p.name)
+    )
+
+    keys = [source_key(p) for p in sources]
+    cached = sum((cache / key / 'meta.json').exists() for key in keys)
+    metas = pool_map(process_image, [(p, key, cache) for p, key in zip(sources, keys)], jobs)
+    print(f'✓ PROCESSED {len(sources)} images ({len(sources) - cached} encoded, {cached} cached)')
+
+    images = {}
+    published = 0
+    for path, key, meta in zip(sources, keys, metas):
+        if meta is None:
+            print(f'⚠️  Could not decode {path.name}, leaving it as is')
+            continue
+        rel = path.relative_to(site).as_posix()
+        images[rel], count = publish_variants(site, rel, key, meta, cache)
+        published += count
+
+    # Remove variants of images that changed or were deleted
+    current = {rel for info in images.values()
+               for candidates in info['sources'].values()
+               for _, rel in candidates}
+    variant_root = root / VARIANT_DIR
+    if variant_root.exists():
+        for path in list(variant_root.iterdir()):
+            rel = path.relative_to(site).as_posix()
+            if rel not in current and rel.removesuffix('.gz').removesuffix('.br') not in current:
+                path.unlink()
+
+    pages = sorted(p.relative_to(site).as_posix() for p in site.rglob('*.html'))
+    rewritten = sum(pool_map(rewrite_page, pages, jobs,
+                             initializer=init_worker,
+                             initargs=(site, images, baseurl)))
+    print(f'✓ REWROTE {rewritten} <img> tags, published {published} variant files')
+
+    return {'images': len(images), 'images_rewritten': rewritten}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Generate responsive image variants and rewrite <img> tags in a built site.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Post-build output optimiser: minification and critical CSS extraction.
+
+The layout embeds a large <style> block that is repeated verbatim in every
+page. For each built HTML page this stage:
+
+1. Splits inline <style> blocks into critical rules (base elements, header,
+   navigation, hero banner and layout containers, i.e. what is visible
+   above the fold) and everything else.
+2. Keeps the critical rules inline and moves the rest into a shared,
+   content-hashed stylesheet (assets/css/inline.<hash>.css) that is
+   written once and loaded without blocking rendering.
+3. Minifies the HTML (comments, inter-tag whitespace) while leaving <pre>,
+   <textarea> and <script> contents alone, plus inline CSS/JS.
+
+Standalone CSS/JS files under assets/ are minified in place as well, and
+the bytes saved are reported per page. Run it before postbuild_assets so
+the minified files are the ones fingerprinted and precompressed.
+
+Run from workspace root (after a fallback or Jekyll build):
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/minify_site.py --jobs 4
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import os
+import re
+
+import fallback_build
+from postbuild_assets import HASH_LENGTH, is_fingerprinted, pool_map
+
+SHARED_CSS_DIR = 'assets/css'
+
+# Rules whose selectors start with one of these are needed for the first
+# paint: base elements, header and navigation, hero banner and the layout
+# containers that position the start of the content.
+CRITICAL_SELECTOR_RE = re.compile(
+    r'^(\*|html|body|a|img|'
+    r'#page|#masthead|#site-navigation|#content|'
+    r'\.site-branding|\.site-title|\.site-description|\.header-wrap|'
+    r'\.main-navigation|\.menu-toggle|\.hero-banner|\.inner-wrap|\.site-main|'
+    r'\.entry-content(\s+(h2|p|img|iframe))?)'
+    r'(?![\w-])'
+)
+
+# Media queries that never apply to the first paint on screen
+NON_CRITICAL_AT_RULE_RE = re.compile(r'^@media\s+print\b', re.IGNORECASE)
+
+STYLE_RE = re.compile(r'<style\b(?P<attrs>[^>]*)>(?P<css>.*?)</style\s*>', re.IGNORECASE | re.DOTALL)
+PRESERVE_RE = re.compile(
+    r'(<!--\[if.*?<!\[endif\]-->'           # conditional comments
+    r'|<!--.*?-->'                           # comments (dropped)
+    r'|<(pre|textarea)\b.*?</\2\s*>'         # whitespace-sensitive blocks
+    r'|<script\b[^>]*>.*?</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+SCRIPT_RE = re.compile(r'(<script\b[^>]*>)(.*?)(</script\s*>)', re.IGNORECASE | re.DOTALL)
+STYLE_BLOCK_RE = re.compile(r'(<style\b[^>]*>)(.*?)(</style\s*>)', re.IGNORECASE | re.DOTALL)
+
+# Strings (and JS template/regex literals) are swapped for placeholders
+# while whitespace and comments around them are removed
+PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+CSS_TOKEN_RE = re.compile(r'/\*.*?\*/|"(?:[^"\\]|\\.)*"|' r"'(?:[^'\\]|\\.)*'", re.DOTALL)
+JS_CODE_RE = re.compile(r'''[^/"'`]+''')
+JS_STRING_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|' r"'(?:[^'\\\n]|\\.)*'", re.DOTALL)
+JS_REGEX_RE = re.compile(r'/(?![*/])(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+# A '/' after one of these starts a regular expression rather than a division
+JS_REGEX_AFTER_RE = re.compile(
+    r'(?:^|[(,=:\[!&|?{};+\-*%<>~^]|\b(?:return|typeof|instanceof|in|of|new|delete|void|'
+    r'throw|case|do|else|yield|await))$'
+)
+
+
+def protect(tokens, text):
+    """Store text in tokens and return its placeholder."""
+    tokens.append(text)
+    return f'\x00{len(tokens) - 1}\x00'
+
+
+def restore(text, tokens):
+    return PLACEHOLDER_RE.sub(lambda m: tokens[int(m.group(1))], text)
+
+
+# ============================================================================
+# CSS
+# ============================================================================
+
+def minify_css(css):
+    """
+    Conservative CSS minifier: drops comments and redundant whitespace.
+    Spaces are kept around '+', '-' and before ':' so calc() expressions and
+    descendant pseudo-class selectors ('a :hover') keep their meaning, and
+    quoted strings (content: "  >  ") are left as written.
+    """
+    strings = []
+    css = CSS_TOKEN_RE.sub(
+        lambda m: '' if m.group(0).startswith('/*') else protect(strings, m.group(0)), css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return restore(css.strip(), strings)
+
+
+def split_rules(css):
+    """
+    Split a stylesheet into top-level blocks.
+
+    Returns:
+        list: (prelude, body) tuples, e.g. ('.a', 'color:red') or
+            ('@media (max-width: 767px)', '.a{...}.b{...}'). At-rules
+            without a block ('@import ...;') have a body of None.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    blocks = []
+    index = 0
+    length = len(css)
+
+    while index < length:
+        brace = css.find('{', index)
+        semicolon = css.find(';', index)
+        if brace == -1:
+            break
+
+        if css[index:].lstrip().startswith('@') and -1 < semicolon < brace:
+            blocks.append((css[index:semicolon].strip(), None))
+            index = semicolon + 1
+            continue
+
+        depth = 0
+        end = brace
+        while end < length:
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            end += 1
+
+        blocks.append((css[index:brace].strip(), css[brace + 1:end].strip()))
+        index = end + 1
+
+    return blocks
+
+
+def is_critical_selector(prelude):
+    """True if any selector of the rule targets above-the-fold elements."""
+    return any(CRITICAL_SELECTOR_RE.match(sel.strip()) for sel in prelude.split(','))
+
+
+def split_critical(css):
+    """
+    Partition a stylesheet into critical and deferred CSS.
+
+    @media blocks are split rule by rule, so a block can contribute to both
+    halves. Other at-rules (@font-face, @keyframes, @import) are kept
+    critical since they cannot be safely split.
+
+    Returns:
+        tuple: (critical_css, deferred_css), both minified
+    """
+    critical = []
+    deferred = []
+
+    for prelude, body in split_rules(css):
+        if body is None:
+            critical.append(f'{prelude};')
+        elif NON_CRITICAL_AT_RULE_RE.match(prelude):
+            deferred.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@') and not prelude.lower().startswith('@media'):
+            critical.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@'):
+            inner_critical, inner_deferred = split_critical(body)
+            if inner_critical:
+                critical.append(f'{prelude}{{{inner_critical}}}')
+            if inner_deferred:
+                deferred.append(f'{prelude}{{{inner_deferred}}}')
+        elif is_critical_selector(prelude):
+            critical.append(f'{prelude}{{{body}}}')
+        else:
+            deferred.append(f'{prelude}{{{body}}}')
+
+    return minify_css(''.join(critical)), minify_css(''.join(deferred))
+
+
+# ============================================================================
+# JavaScript
+# ============================================================================
+
+def template_end(js, start):
+    """Index just past the template literal opening at js[start], ${...} included."""
+    index = start + 1
+    length = len(js)
+    while index < length:
+        char = js[index]
+        if char == '\\':
+            index += 2
+        elif char == '`':
+            return index + 1
+        elif js.startswith('${', index):
+            index += 2
+            depth = 1
+            while index < length and depth:
+                char = js[index]
+                if char == '`':
+                    index = template_end(js, index)
+                    continue
+                if char in '"\'':
+                    match = JS_STRING_RE.match(js, index)
+                    index = match.end() if match else index + 1
+                    continue
+                depth += (char == '{') - (char == '}')
+                index += 1
+        else:
+            index += 1
+    return length
+
+
+def minify_js(js):
+    """
+    Conservative JavaScript minifier: removes comments, indentation and
+    blank lines. Strings, template literals and regular expression literals
+    are copied verbatim, and code is never joined across lines, so
+    automatic semicolon insertion is unaffected.
+    """
+    literals = []
+    code = []
+    last = ''  # code before the latest literal, to tell a regex from a division
+    index = 0
+    length = len(js)
+
+    while index < length:
+        char = js[index]
+        if char in '"\'':
+            match = JS_STRING_RE.match(js, index)
+            end = match.end() if match else index + 1
+        elif char == '`':
+            end = template_end(js, index)
+        elif js.startswith('//', index):
+            end = js.find('\n', index)
+            index = length if end == -1 else end
+            continue
+        elif js.startswith('/*', index):
+            end = js.find('*/', index + 2)
+            end = length if end == -1 else end + 2
+            # Keep a line break so statements on either side stay separate
+            code.append('\n' if '\n' in js[index:end] else ' ')
+            index = end
+            continue
+        elif char == '/':
+            match = JS_REGEX_AFTER_RE.search(last) and JS_REGEX_RE.match(js, index)
+            end = match.end() if match else index + 1
+            if not match:
+                code.append(char)
+                last = char
+                index = end
+                continue
+        else:
+            end = JS_CODE_RE.match(js, index).end()
+            code.append(js[index:end])
+            last = js[index:end].rstrip() or last
+            index = end
+            continue
+
+        code.append(protect(literals, js[index:end]))
+        last = 'literal'
+        index = end
+
+    lines = (line.strip() for line in ''.join(code).splitlines())
+    return restore('\n'.join(line for line in lines if line), literals)
+
+
+# ============================================================================
+# HTML
+# ============================================================================
+
+def minify_html(html):
+    """
+    Remove comments and collapse whitespace outside whitespace-sensitive
+    elements. Runs containing a newline become one newline, others one
+    space, so inline spacing between words is preserved.
+    """
+    parts = []
+    text = ''
+    last = 0
+
+    for match in PRESERVE_RE.finditer(html):
+        text += html[last:match.start()]
+        last = match.end()
+        block = match.group(0)
+
+        # Dropped comments join the text around them before collapsing
+        if block.startswith('<!--') and not block.startswith('<!--[if'):
+            continue
+
+        parts.append(_collapse(text))
+        text = ''
+        if block[:7].lower() == '<script':
+            block = SCRIPT_RE.sub(lambda m: m.group(1) + minify_js(m.group(2)) + m.group(3), block)
+        elif block[:6].lower() == '<style':
+            block = STYLE_BLOCK_RE.sub(lambda m: m.group(1) + minify_css(m.group(2)) + m.group(3), block)
+        parts.append(block)
+
+    parts.append(_collapse(text + html[last:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def _collapse(text):
+    text = re.sub(r'\s*\n\s*', '\n', text)
+    return re.sub(r'[ \t\r\f\v]+', ' ', text)
+
+
+def shared_stylesheet(site, css):
+    """
+    Write deferred CSS to a content-hashed file (once per distinct content).
+
+    Returns:
+        str: Path of the stylesheet relative to the site root
+    """
+    digest = hashlib.sha256(css.encode('utf-8')).hexdigest()[:HASH_LENGTH]
+    rel = f'{SHARED_CSS_DIR}/inline.{digest}.css'
+    path = site / rel
+
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        tmp.write_text(css, encoding='utf-8')
+        os.replace(tmp, path)
+
+    return rel
+
+
+def deferred_link(href):
+    """Stylesheet link that does not block first paint."""
+    return (f'<link rel="stylesheet" href="{href}" media="print" onload="this.media=\'all\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+
+
+_worker_state = {}
+
+
+def init_worker(site, baseurl):
+    _worker_state['site'] = site
+    _worker_state['baseurl'] = baseurl
+
+
+def optimise_page(rel):
+    """
+    Extract deferred CSS and minify one page in place.
+
+    Returns:
+        tuple: (relative_path, bytes_before, bytes_after)
+    """
+    site = _worker_state['site']
+    baseurl = _worker_state['baseurl'].rstrip('/')
+    path = site / rel
+    html = path.read_text(encoding='utf-8', errors='ignore')
+    before = len(html.encode('utf-8'))
+
+    def extract(match):
+        critical, deferred = split_critical(match.group('css'))
+        replacement = f'<style{match.group("attrs")}>{critical}</style>' if critical else ''
+        if deferred:
+            href = f'{baseurl}/{shared_stylesheet(site, deferred)}'
+            replacement += deferred_link(href)
+        return replacement
+
+    new_html = minify_html(STYLE_RE.sub(extract, html))
+    after = len(new_html.encode('utf-8'))
+
+    if new_html != html:
+        path.write_text(new_html, encoding='utf-8')
+    return rel, before, after
+
+
+def minify_asset(rel_and_site):
+    """Minify one standalone CSS/JS file in place."""
+    site, rel = rel_and_site
+    path = site / rel
+    text = path.read_text(encoding='utf-8', errors='ignore')
+    minified = minify_css(text) if rel.endswith('.css') else minify_js(text)
+    if minified != text:
+        path.write_text(minified, encoding='utf-8')
+    return len(text.encode('utf-8')) - len(minified.encode('utf-8'))
+
+
+# ============================================================================
+# Stage Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1):
+    """
+    Minify HTML/CSS/JS in a built site and extract shared inline styles.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes
+
+    Returns:
+        dict: Summary byte counts
+    """
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+
+    assets = sorted(
+        p.relative_to(site).as_posix() for p in (site / 'assets').rglob('*')
+        if p.is_file() and p.suffix in ('.css', '.js') and not is_fingerprinted(p)
+    ) if (site / 'assets').exists() else []
+    asset_saved = sum(pool_map(minify_asset, [(site, rel) for rel in assets], jobs))
+    print(f'✓ MINIFIED {len(assets)} CSS/JS files (-{asset_saved:,} bytes)')
+
+    pages = sorted(p.relative_to(site).as_posix() for p in site.rglob('*.html'))
+    results = pool_map(optimise_page, pages, jobs,
+                       initializer=init_worker, initargs=(site, baseurl))
+
+    total_before = total_after = 0
+    for rel, before, after in results:
+        total_before += before
+        total_after += after
+        if before != after:
+            print(f'  {rel}: {before:,} → {after:,} bytes (-{before - after:,})')
+
+    saved = total_before - total_after
+    percent = saved * 100 / total_before if total_before else 0
+    print(f'✓ OPTIMISED {len(pages)} pages: {total_before:,} → {total_after:,} bytes '
+          f'(-{saved:,}, {percent:.0f}%)')
+
+    return {'html_before': total_before, 'html_after': total_after, 'asset_saved': asset_saved}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Minify a built site and move shared inline CSS to a cached stylesheet.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
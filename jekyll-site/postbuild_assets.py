@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Post-build asset stage: cache-busting fingerprints and precompression.
+
+Works on any built site directory, whether it came from fallback_build.py
+or from `bundle exec jekyll build`:
+
+1. Hard-links every CSS/JS/image/font under assets/ to a content-hashed
+   name (main.css → main.3f2a9c01d4.css). Stylesheets are fingerprinted
+   after their own url(...) references have been rewritten.
+2. Rewrites references in every HTML page to the fingerprinted names
+   (handles baseurl, relative paths and percent-encoded CJK file names),
+   then deletes the originals nothing refers to any more, so each asset is
+   deployed once. fallback_build.py reads the mapping below and does not
+   copy those originals back on incremental builds.
+3. Writes .gz (and .br when the `brotli` package is installed) siblings for
+   text files so a static server can send them precompressed.
+
+The original → fingerprinted mapping and the hashes of compressed files
+are kept in .fallback-cache/, so files whose hash has not changed since the
+last run are skipped, and the HTML rewriting and compression run in a process pool.
+
+Run from workspace root:
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/postbuild_assets.py
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/postbuild_assets.py --site jekyll-site/_site --baseurl /static-page --jobs 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import urllib.parse
+
+import fallback_build
+from html_urls import (
+    replace_basename,
+    resolve_site_path,
+    rewrite_css_urls,
+    rewrite_html_urls,
+)
+from tracing import span, traced
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz files are written without it
+    brotli = None
+
+ASSET_ROOT = 'assets'
+FINGERPRINT_EXTENSIONS = {
+    '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif',
+    '.ico', '.woff', '.woff2', '.ttf', '.eot',
+}
+COMPRESS_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.xml', '.txt', '.map'}
+
+# Non-HTML files whose text may still name an original asset (HTML pages are
+# checked while they are rewritten)
+REFERENCE_EXTENSIONS = {'.css', '.js', '.json', '.xml', '.txt', '.webmanifest'}
+
+# Files smaller than this gain nothing from precompression
+MIN_COMPRESS_SIZE = 256
+
+HASH_LENGTH = 10
+FINGERPRINT_RE = re.compile(rf'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?P<ext>\.[^.]+)$')
+
+
+# ============================================================================
+# Fingerprinting
+# ============================================================================
+
+def short_hash(data):
+    """Return the fingerprint used in file names for some bytes."""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprinted_name(name, digest):
+    """main.css + 3f2a9c01d4 → main.3f2a9c01d4.css"""
+    stem, dot, ext = name.rpartition('.')
+    if not dot:
+        return f'{name}.{digest}'
+    return f'{stem}.{digest}.{ext}'
+
+
+def strip_fingerprint(site_path):
+    """
+    Map a fingerprinted path back to its original path, or return it
+    unchanged. Lets pages that still point at an older fingerprint be
+    updated to the current one.
+    """
+    head, _, name = site_path.rpartition('/')
+    match = FINGERPRINT_RE.match(name)
+    if not match:
+        return site_path
+    original = match.group('stem') + match.group('ext')
+    return f'{head}/{original}' if head else original
+
+
+def is_fingerprinted(path):
+    return FINGERPRINT_RE.match(path.name) is not None
+
+
+def write_fingerprint(site, rel, data, rewritten=False):
+    """
+    Create the fingerprinted name of an asset (if it does not exist yet) and
+    remove stale fingerprints of the same asset.
+
+    The fingerprinted file is a hard link to the original, so the two share
+    their bytes until the original is dropped; `rewritten` data (stylesheets
+    with updated url(...) references) is written as a new file instead.
+
+    Returns:
+        tuple: (fingerprinted_rel, created)
+    """
+    src = site / rel
+    fp_name = fingerprinted_name(src.name, short_hash(data))
+    fp_path = src.with_name(fp_name)
+    created = not fp_path.exists()
+
+    if created and rewritten:
+        fp_path.write_bytes(data)
+        shutil.copystat(src, fp_path)
+    elif created:
+        try:
+            os.link(src, fp_path)
+        except OSError:
+            shutil.copy2(src, fp_path)
+
+    # Drop older fingerprints of this asset (and their compressed siblings)
+    stem, _, ext = src.name.rpartition('.')
+    for old in list(src.parent.glob(f'{glob_escape(stem)}.*.{glob_escape(ext)}*')):
+        match = FINGERPRINT_RE.match(old.name.removesuffix('.gz').removesuffix('.br'))
+        if match and not old.name.startswith(fp_name) and match.group('stem') == stem:
+            old.unlink()
+
+    return fp_path.relative_to(site).as_posix(), created
+
+
+def glob_escape(text):
+    return re.sub(r'([\[\]*?])', r'[\1]', text)
+
+
+def make_url_rewriter(mapping, page_rel, baseurl):
+    """
+    Build a rewrite callback for html_urls that swaps references to assets in
+    `mapping` (original site path → fingerprinted site path).
+    """
+    def rewrite(url):
+        site_path = resolve_site_path(url, page_rel, baseurl)
+        if site_path is None:
+            return None
+        target = mapping.get(site_path) or mapping.get(strip_fingerprint(site_path))
+        if target is None or target == site_path:
+            return None
+        return replace_basename(url, target.rsplit('/', 1)[-1])
+
+    return rewrite
+
+
+def fingerprint_assets(site, baseurl, previous=None):
+    """
+    Fingerprint every asset under assets/.
+
+    Non-CSS assets are hashed first so stylesheets can point their url(...)
+    references at fingerprinted images and fonts before being hashed.
+
+    Args:
+        site: Built site directory
+        baseurl: Site baseurl
+        previous: Mapping from the last run; entries whose original has been
+            dropped are kept while their fingerprinted file exists
+
+    Returns:
+        tuple: (mapping of original → fingerprinted path, number created)
+    """
+    root = site / ASSET_ROOT
+    if not root.exists():
+        return {}, 0
+
+    assets = sorted(
+        p for p in root.rglob('*')
+        if p.is_file()
+        and p.suffix.lower() in FINGERPRINT_EXTENSIONS
+        and not is_fingerprinted(p)
+    )
+
+    mapping = {
+        rel: fp_rel for rel, fp_rel in (previous or {}).items()
+        if (site / fp_rel).is_file()
+    }
+    created = 0
+    stylesheets = []
+
+    for path in assets:
+        rel = path.relative_to(site).as_posix()
+        if path.suffix.lower() == '.css':
+            stylesheets.append(rel)
+            continue
+        mapping[rel], was_created = write_fingerprint(site, rel, path.read_bytes())
+        created += was_created
+
+    for rel in stylesheets:
+        css = (site / rel).read_text(encoding='utf-8', errors='ignore')
+        css = rewrite_css_urls(css, make_url_rewriter(mapping, rel, baseurl))
+        mapping[rel], was_created = write_fingerprint(site, rel, css.encode('utf-8'),
+                                                      rewritten=True)
+        created += was_created
+
+    return mapping, created
+
+
+# ============================================================================
+# HTML Rewriting
+# ============================================================================
+
+_worker_state = {}
+
+
+def init_worker(site, mapping, baseurl):
+    _worker_state['site'] = site
+    _worker_state['mapping'] = mapping
+    _worker_state['baseurl'] = baseurl
+    _worker_state['names'] = original_names(mapping)
+
+
+def original_names(mapping):
+    """
+    Spellings of each original's file name (as is and percent-encoded) that
+    a reference left in a page or script would contain.
+    """
+    names = {}
+    for rel in mapping:
+        name = rel.rsplit('/', 1)[-1]
+        names[rel] = {name, urllib.parse.quote(name)}
+    return names
+
+
+def still_named(text, names):
+    """Originals whose file name still appears somewhere in text."""
+    return [rel for rel, spellings in names.items()
+            if any(spelling in text for spelling in spellings)]
+
+
+def rewrite_page(rel):
+    """
+    Point one HTML page at fingerprinted assets. Only writes the file when
+    something changed.
+
+    Returns:
+        tuple: (rewritten, originals the page still names, e.g. in scripts)
+    """
+    path = _worker_state['site'] / rel
+    html = path.read_text(encoding='utf-8', errors='ignore')
+    rewrite = make_url_rewriter(_worker_state['mapping'], rel, _worker_state['baseurl'])
+    new_html = rewrite_html_urls(html, rewrite)
+    named = still_named(new_html, _worker_state['names'])
+
+    if new_html == html:
+        return False, named
+    path.write_text(new_html, encoding='utf-8')
+    return True, named
+
+
+def drop_originals(site, mapping, referenced):
+    """
+    Delete originals that have a fingerprinted name and are no longer
+    referenced, together with their compressed siblings.
+
+    Returns:
+        int: Number of originals removed
+    """
+    names = original_names(mapping)
+    for path in site.rglob('*'):
+        if path.is_file() and path.suffix.lower() in REFERENCE_EXTENSIONS:
+            text = path.read_text(encoding='utf-8', errors='ignore')
+            referenced.update(still_named(text, names))
+
+    removed = 0
+    for rel in sorted(set(mapping) - referenced):
+        src = site / rel
+        for path in (src, src.with_name(src.name + '.gz'), src.with_name(src.name + '.br')):
+            if path.is_file():
+                path.unlink()
+                removed += path == src
+    return removed
+
+
+# ============================================================================
+# Precompression
+# ============================================================================
+
+def compress_file(task):
+    """
+    Write .gz/.br siblings for one file unless its hash matches the cached
+    one and the siblings already exist.
+
+    Args:
+        task: Tuple of (site_dir, relative_path, cached_hash)
+
+    Returns:
+        tuple: (relative_path, content_hash, compressed)
+    """
+    site, rel, cached = task
+    path = site / rel
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+
+    gz_path = path.with_name(path.name + '.gz')
+    br_path = path.with_name(path.name + '.br')
+    up_to_date = gz_path.exists() and (brotli is None or br_path.exists())
+    if cached == digest and up_to_date:
+        return rel, digest, False
+
+    # mtime=0 keeps the .gz bytes reproducible across builds
+    gz_path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        br_path.write_bytes(brotli.compress(data, quality=11))
+
+    return rel, digest, True
+
+
+def state_path():
+    """
+    State file, kept outside the site so it is not deployed. Resolved on
+    every call so it follows fallback_build.set_site_root().
+    """
+    return fallback_build.MANIFEST.parent / 'postbuild_assets.json'
+
+
+def load_state():
+    """
+    Returns:
+        dict: {'fingerprints': {original: fingerprinted}, 'compressed': {rel: hash}}
+    """
+    try:
+        state = json.loads(state_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        state = {}
+    if not isinstance(state.get('compressed'), dict):
+        state = {}  # older flat format: rebuild from scratch
+    return {'fingerprints': state.get('fingerprints', {}),
+            'compressed': state.get('compressed', {})}
+
+
+def save_state(state):
+    path = state_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state, ensure_ascii=False, indent=1, sort_keys=True),
+                    encoding='utf-8')
+
+
+def pool_map(fn, items, jobs, initializer=None, initargs=()):
+    """
+    Map fn over items in order, in-process for jobs <= 1. Each call is
+    timed as a span when tracing is enabled.
+    """
+    fn = traced(fn)
+    if jobs <= 1 or len(items) <= 1:
+        if initializer:
+            initializer(*initargs)
+        return [fn(item) for item in items]
+
+    workers = min(jobs, len(items))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                             initargs=initargs) as pool:
+        return list(pool.map(fn, items, chunksize=max(1, len(items) // (workers * 4))))
+
+
+# ============================================================================
+# Stage Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1):
+    """
+    Fingerprint assets, rewrite HTML references and precompress text files.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes for HTML rewriting and compression
+
+    Returns:
+        dict: Summary counts
+    """
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+
+    state = load_state()
+    with span('fingerprint_assets', 'postbuild_assets'):
+        mapping, created = fingerprint_assets(site, baseurl, state['fingerprints'])
+    print(f'✓ FINGERPRINTED {len(mapping)} assets ({created} new)')
+
+    pages = sorted(p.relative_to(site).as_posix() for p in site.rglob('*.html'))
+    results = pool_map(rewrite_page, pages, jobs,
+                       initializer=init_worker,
+                       initargs=(site, mapping, baseurl))
+    rewritten = sum(1 for did, _ in results if did)
+    referenced = {rel for _, named in results for rel in named}
+    print(f'✓ REWROTE asset references in {rewritten} of {len(pages)} pages')
+
+    with span('drop_originals', 'postbuild_assets'):
+        dropped = drop_originals(site, mapping, referenced)
+    print(f'✓ REMOVED {dropped} originals now served under fingerprinted names')
+
+    targets = sorted(
+        p.relative_to(site).as_posix() for p in site.rglob('*')
+        if p.is_file()
+        and p.suffix.lower() in COMPRESS_EXTENSIONS
+        and p.stat().st_size >= MIN_COMPRESS_SIZE
+    )
+    cached = state['compressed']
+    results = pool_map(compress_file, [(site, rel, cached.get(rel)) for rel in targets], jobs)
+    compressed = sum(1 for _, _, did in results if did)
+    save_state({
+        'fingerprints': mapping,
+        'compressed': {rel: digest for rel, digest, _ in results},
+    })
+
+    formats = '.gz + .br' if brotli is not None else '.gz (install brotli for .br)'
+    print(f'✓ COMPRESSED {compressed} files, {len(targets) - compressed} unchanged [{formats}]')
+
+    return {
+        'fingerprinted': len(mapping),
+        'pages_rewritten': rewritten,
+        'originals_removed': dropped,
+        'compressed': compressed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Fingerprint assets and precompress text files in a built site.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
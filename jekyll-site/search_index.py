@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Post-build stage: static full-text search index.
+
+All content is Traditional Chinese, which has no spaces between words, so
+pages are tokenized into overlapping CJK character bigrams (基督的身體 →
+基督 督的 的身 身體); runs of Latin letters and digits are indexed as whole
+words. The same tokenizer runs in assets/js/search.js, so a query matches
+when all of its bigrams occur in a page.
+
+The index is written to search/ in the built site:
+
+- meta.json           shard count and the (content-hashed) file names below
+- shard-<n>.<hash>.json  token → postings, as a flat list of
+                         [doc id delta, term frequency, ...]
+- docs-<n>.<hash>.json   [url, title, excerpt] for a range of doc ids
+
+Tokens are spread over shards by an FNV-1a hash, so the client downloads
+only meta.json plus the shards for the tokens of a query, and only when the
+search box is first used.
+
+Text is extracted from the <main> element of every page (falling back to
+<body>). Extraction results are cached per page in .fallback-cache/, keyed by
+the page's content hash (ignoring asset fingerprints), so a rebuild only
+parses the pages that changed, and shard files whose content did not
+change are not rewritten. Runs just
+before postbuild_assets in the post-build pipeline (page text is final by
+then) and writes the .gz/.br siblings of its own files for Jekyll builds,
+where postbuild_assets does not run.
+
+Run from workspace root (after a fallback or Jekyll build):
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/search_index.py
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/search_index.py --site jekyll-site/_site --baseurl /static-page
+"""
+
+from collections import Counter
+from html.parser import HTMLParser
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import unicodedata
+
+import fallback_build
+from postbuild_assets import HASH_LENGTH, compress_file, pool_map
+
+CACHE_VERSION = 1
+INDEX_DIR = 'search'
+
+# Pages that are not content
+SKIP_DIRS = ('assets/', INDEX_DIR + '/')
+
+# Target size of one shard; the shard count grows with the index
+SHARD_TARGET_BYTES = 24 * 1024
+MAX_SHARDS = 512
+DOC_CHUNK = 256
+EXCERPT_LENGTH = 80
+
+# Hiragana/Katakana, CJK Extension A, CJK Unified, Compatibility, Hangul.
+# Must match the ranges in assets/js/search.js.
+CJK_CLASS = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af'
+TOKEN_RE = re.compile(f'([{CJK_CLASS}]+)|([a-z0-9]+)')
+TITLE_SUFFIX = ' - '
+
+# The content hash postbuild_assets puts in asset file names (main.3f2a9c01d4.css)
+ASSET_FINGERPRINT_RE = re.compile(rf'\.[0-9a-f]{{{HASH_LENGTH}}}(?=\.[A-Za-z0-9]+)'.encode())
+
+
+# ============================================================================
+# Tokenizer
+# ============================================================================
+
+def tokenize(text):
+    """
+    Split text into search tokens: CJK bigrams (a lone CJK character is kept
+    as a unigram) and lowercase Latin/digit words.
+    """
+    text = unicodedata.normalize('NFKC', text).lower()
+    tokens = []
+    for match in TOKEN_RE.finditer(text):
+        cjk, word = match.groups()
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def shard_of(token, shards):
+    """FNV-1a over the token's code points (same as search.js)."""
+    h = 0x811c9dc5
+    for ch in token:
+        h = ((h ^ ord(ch)) * 0x01000193) & 0xffffffff
+    return h % shards
+
+
+# ============================================================================
+# Text Extraction
+# ============================================================================
+
+class TextExtractor(HTMLParser):
+    """Collect the page title and the visible text of <main> (or <body>)."""
+
+    SKIP = {'script', 'style', 'noscript', 'template', 'svg'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = []
+        self.main = []
+        self.body = []
+        self.in_title = False
+        self.main_depth = 0
+        self.in_body = False
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skip_depth += 1
+        elif tag == 'title':
+            self.in_title = True
+        elif tag == 'main':
+            self.main_depth += 1
+        elif tag == 'body':
+            self.in_body = True
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag == 'title':
+            self.in_title = False
+        elif tag == 'main':
+            self.main_depth = max(0, self.main_depth - 1)
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title.append(data)
+        elif self.skip_depth:
+            return
+        elif self.main_depth:
+            self.main.append(data)
+        elif self.in_body:
+            self.body.append(data)
+
+    def text(self):
+        return ' '.join(''.join(self.main or self.body).split())
+
+
+def page_url(rel, baseurl):
+    """Public URL of a built page: dir/index.html → /baseurl/dir/"""
+    if rel == 'index.html':
+        path = '/'
+    elif rel.endswith('/index.html'):
+        path = '/' + rel[:-len('index.html')]
+    else:
+        path = '/' + rel
+    return baseurl.rstrip('/') + path
+
+
+def extract_page(task):
+    """
+    Extract and tokenize one page.
+
+    Args:
+        task: Tuple of (site_dir, relative_path, content_hash)
+
+    Returns:
+        tuple: (relative_path, cache_entry)
+    """
+    site, rel, digest = task
+    parser = TextExtractor()
+    parser.feed((site / rel).read_text(encoding='utf-8', errors='ignore'))
+    parser.close()
+
+    text = parser.text()
+    title = ''.join(parser.title).strip().split(TITLE_SUFFIX)[0].strip() or rel
+    excerpt = text[:EXCERPT_LENGTH] + ('…' if len(text) > EXCERPT_LENGTH else '')
+
+    return rel, {
+        'hash': digest,
+        'title': title,
+        'excerpt': excerpt,
+        'terms': dict(Counter(tokenize(title + ' ' + text))),
+    }
+
+
+# ============================================================================
+# Index Construction
+# ============================================================================
+
+def page_digest(path):
+    """
+    Cache key of a page: its content hash with asset fingerprints removed.
+
+    Pages are indexed before postbuild_assets points them at fingerprinted
+    asset names, so the same page is seen with and without fingerprints on
+    alternate runs; the extracted text is the same either way.
+    """
+    return hashlib.sha256(ASSET_FINGERPRINT_RE.sub(b'', path.read_bytes())).hexdigest()
+
+
+def cache_path():
+    """Resolved on every call so it follows fallback_build.set_site_root()."""
+    return fallback_build.MANIFEST.parent / 'search_index.json'
+
+
+def load_cache():
+    try:
+        cache = json.loads(cache_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return cache.get('pages', {}) if cache.get('version') == CACHE_VERSION else {}
+
+
+def save_cache(pages):
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({'version': CACHE_VERSION, 'pages': pages},
+                                ensure_ascii=False, separators=(',', ':')),
+                     encoding='utf-8')
+
+
+def build_postings(docs):
+    """
+    Invert per-page term counts.
+
+    Args:
+        docs: List of cache entries, in doc id order
+
+    Returns:
+        dict: token → flat [doc id delta, tf, ...] list
+    """
+    postings = {}
+    last = {}
+    for doc_id, entry in enumerate(docs):
+        for token, tf in entry['terms'].items():
+            flat = postings.get(token)
+            if flat is None:
+                postings[token] = [doc_id, tf]
+            else:
+                flat += (doc_id - last[token], tf)
+            last[token] = doc_id
+    return postings
+
+
+def shard_count(postings):
+    """
+    Pick a shard count that keeps shards near SHARD_TARGET_BYTES. Rounded
+    up to a power of two so small content changes keep the same layout
+    (and unchanged shards keep their file names).
+    """
+    estimate = sum(len(token) * 3 + 6 + 3 * len(flat) for token, flat in postings.items())
+    needed = max(1, math.ceil(estimate / SHARD_TARGET_BYTES))
+    return min(MAX_SHARDS, 1 << (needed - 1).bit_length())
+
+
+def write_hashed(index_dir, prefix, payload):
+    """
+    Write JSON under a content-hashed name unless it already exists.
+
+    Returns:
+        tuple: (file_name, written)
+    """
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    name = f'{prefix}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}.json'
+    path = index_dir / name
+    if path.exists():
+        return name, False
+    path.write_bytes(data)
+    return name, True
+
+
+# ============================================================================
+# Stage Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1):
+    """
+    Build (or update) the search index of a built site.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes for text extraction
+
+    Returns:
+        dict: Summary counts
+    """
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+
+    pages = sorted(
+        rel for rel in (p.relative_to(site).as_posix() for p in site.rglob('*.html'))
+        if not rel.startswith(SKIP_DIRS)
+    )
+
+    cache = load_cache()
+    entries = {}
+    tasks = []
+    for rel in pages:
+        digest = page_digest(site / rel)
+        cached = cache.get(rel)
+        if cached and cached['hash'] == digest:
+            entries[rel] = cached
+        else:
+            tasks.append((site, rel, digest))
+
+    entries.update(pool_map(extract_page, tasks, jobs))
+    save_cache(entries)
+    print(f'✓ EXTRACTED text from {len(tasks)} pages ({len(pages) - len(tasks)} cached)')
+
+    docs = [entries[rel] for rel in pages]
+    postings = build_postings(docs)
+    shards = shard_count(postings)
+
+    grouped = [{} for _ in range(shards)]
+    for token in sorted(postings):
+        grouped[shard_of(token, shards)][token] = postings[token]
+
+    index_dir = site / INDEX_DIR
+    index_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    files = {'shards': [], 'docs': []}
+
+    for n, shard in enumerate(grouped):
+        name, did = write_hashed(index_dir, f'shard-{n}', shard)
+        files['shards'].append(name)
+        written += did
+
+    for start in range(0, len(pages), DOC_CHUNK):
+        chunk = [
+            [page_url(rel, baseurl), entries[rel]['title'], entries[rel]['excerpt']]
+            for rel in pages[start:start + DOC_CHUNK]
+        ]
+        name, did = write_hashed(index_dir, f'docs-{start // DOC_CHUNK}', chunk)
+        files['docs'].append(name)
+        written += did
+
+    meta = {
+        'version': CACHE_VERSION,
+        'pages': len(pages),
+        'shards': shards,
+        'docChunk': DOC_CHUNK,
+        'files': files,
+    }
+    (index_dir / 'meta.json').write_text(
+        json.dumps(meta, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+
+    # Remove shards and doc chunks (and their .gz/.br) from earlier builds
+    current = set(files['shards']) | set(files['docs']) | {'meta.json'}
+    removed = 0
+    for path in list(index_dir.iterdir()):
+        if path.name.removesuffix('.gz').removesuffix('.br') not in current:
+            path.unlink()
+            removed += 1
+
+    # Precompress new files like postbuild_assets does for the rest of the site
+    for name in current:
+        if name == 'meta.json' or not (index_dir / (name + '.gz')).exists():
+            compress_file((site, f'{INDEX_DIR}/{name}', None))
+
+    size = sum((index_dir / name).stat().st_size for name in current)
+    print(f'✓ INDEXED {len(pages)} pages, {len(postings)} tokens in {shards} shards '
+          f'({written} files written, {removed} removed, {size / 1024:.0f} KB total)')
+
+    return {'pages': len(pages), 'tokens': len(postings), 'shards': shards}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build the static CJK search index of a built site.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
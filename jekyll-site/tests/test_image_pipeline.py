@@ -0,0 +1,48 @@
+"""<picture> elements keep the aspect ratio of the image they replace"""
+
+from pathlib import Path
+import sys
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from image_pipeline import build_picture, fill_dimensions
+
+INFO = {
+    'width': 1600,
+    'height': 1200,
+    'sources': {'jpeg': [(480, 'assets/images/opt/上課-480.jpg'), (960, 'assets/images/opt/上課-960.jpg')]},
+}
+
+
+class DimensionsTest(unittest.TestCase):
+
+    def dimensions(self, **attrs):
+        fill_dimensions(attrs, INFO)
+        return attrs.get('width'), attrs.get('height')
+
+    def test_intrinsic_size_when_both_are_missing(self):
+        self.assertEqual(self.dimensions(), ('1600', '1200'))
+
+    def test_missing_dimension_follows_the_aspect_ratio(self):
+        self.assertEqual(self.dimensions(width='400'), ('400', '300'))
+        self.assertEqual(self.dimensions(width='400px'), ('400px', '300'))
+        self.assertEqual(self.dimensions(height='150'), ('200', '150'))
+
+    def test_dimension_not_in_pixels_leaves_the_other_unset(self):
+        self.assertEqual(self.dimensions(width='50%'), ('50%', None))
+        self.assertEqual(self.dimensions(height=None), (None, None))
+
+    def test_given_dimensions_are_kept(self):
+        self.assertEqual(self.dimensions(width='300', height='300'), ('300', '300'))
+
+    def test_picture_img(self):
+        picture = build_picture({'src': 'x.jpg', 'alt': '上課', 'width': '400'}, INFO,
+                                '/static-page', lazy=True, encode=False, sizes='400px')
+        self.assertIn(' width="400" ', picture)
+        self.assertIn(' height="300" ', picture)
+        self.assertIn('src="/static-page/assets/images/opt/上課-960.jpg"', picture)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""The search index cache survives postbuild_assets fingerprinting the pages"""
+
+from pathlib import Path
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fallback_build
+import search_index
+
+PAGE = ('<html><head><title>生命 - 訓練</title>'
+        '<link rel="stylesheet" href="/static-page/assets/css/{css}"></head>'
+        '<body><main><h1>生命</h1><p>基督的身體</p>'
+        '<img src="/static-page/assets/images/{image}" alt="上課"></main></body></html>')
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        fallback_build.set_site_root(root)
+        self.addCleanup(fallback_build.set_site_root, Path(fallback_build.__file__).resolve().parent)
+
+        self.page = root / '_site' / '生命' / 'index.html'
+        self.page.parent.mkdir(parents=True)
+
+    def index(self, html):
+        self.page.write_text(html, encoding='utf-8')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            search_index.run(baseurl='/static-page')
+        return output.getvalue()
+
+    def test_fingerprinted_asset_names_hit_the_cache(self):
+        page = PAGE.format(css='main.css', image='上課.jpg')
+        fingerprinted = PAGE.format(css='main.3f2a9c01d4.css', image='上課.0123456789.jpg')
+
+        self.assertIn('EXTRACTED text from 1 pages (0 cached)', self.index(page))
+        self.assertIn('EXTRACTED text from 0 pages (1 cached)', self.index(fingerprinted))
+        self.assertIn('EXTRACTED text from 0 pages (1 cached)', self.index(page))
+
+    def test_changed_text_is_extracted_again(self):
+        page = PAGE.format(css='main.css', image='上課.jpg')
+        self.index(page)
+        self.assertIn('EXTRACTED text from 1 pages (0 cached)', self.index(page.replace('基督', '召會')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""YouTube facades replace video embeds and leave playlist embeds alone"""
+
+from pathlib import Path
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fallback_build
+import youtube_facade
+
+VIDEO = ('<iframe width="560" height="315" src="https://www.youtube.com/embed/abcDEF12345?rel=0" '
+         'title="見證" allowfullscreen></iframe>')
+PLAYLIST = ('<iframe width="560" height="315" src="https://www.youtube.com/embed/videoseries?'
+            'si=MHJkVI9NleUsB5TT&amp;list=PLHyB4dLK1burb8-164KnyKa4d5ALvlcrf" '
+            'title="YouTube video player" allowfullscreen></iframe>')
+LIST_ONLY = ('<iframe src="https://www.youtube.com/embed?listType=playlist&amp;list=PLHyB4dLK1bu" '
+             'title="播放清單"></iframe>')
+
+
+class IframePatternTest(unittest.TestCase):
+
+    def test_video_embed(self):
+        match = youtube_facade.IFRAME_RE.search(VIDEO)
+        self.assertEqual(match.group('id'), 'abcDEF12345')
+
+    def test_playlist_embeds_are_not_videos(self):
+        for iframe in (PLAYLIST, LIST_ONLY):
+            with self.subTest(iframe=iframe):
+                self.assertIsNone(youtube_facade.IFRAME_RE.search(iframe))
+
+    def test_longer_path_segment_is_not_a_video_id(self):
+        self.assertIsNone(youtube_facade.IFRAME_RE.search(VIDEO.replace('abcDEF12345', 'abcDEF123456')))
+
+
+class RunTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        fallback_build.set_site_root(root)
+        self.addCleanup(fallback_build.set_site_root, Path(fallback_build.__file__).resolve().parent)
+
+        # A cached poster, so no request leaves the machine
+        cache = youtube_facade.cache_root()
+        cache.mkdir(parents=True)
+        (cache / 'abcDEF12345.jpg').write_bytes(b'\xff\xd8\xff\xd9')
+
+        self.page = root / '_site' / '影音專區' / 'index.html'
+        self.page.parent.mkdir(parents=True)
+        self.page.write_text(f'<main>{PLAYLIST}\n{VIDEO}</main>', encoding='utf-8')
+
+    def test_playlist_iframe_is_kept(self):
+        result = youtube_facade.run(baseurl='/static-page')
+
+        text = self.page.read_text(encoding='utf-8')
+        self.assertEqual(result, {'videos': 1, 'iframes_replaced': 1})
+        self.assertIn(PLAYLIST, text)
+        self.assertNotIn('videoseries"', text)
+        self.assertIn('href="https://www.youtube.com/watch?v=abcDEF12345"', text)
+        self.assertIn('src="/static-page/assets/images/youtube/abcDEF12345.jpg"', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Shared instrumentation for the build scripts: timing spans, Chrome trace
+export, a per-stage summary table and optional cProfile/tracemalloc capture.
+
+Usage in a script:
+
+    from tracing import span
+
+    with span('render', page=src_rel):
+        ...
+
+Spans cost a single flag check while tracing is disabled (the default).
+Once enabled, each span records a Chrome "complete" event. Worker
+processes inherit tracing through an environment variable and write their
+events to the trace directory when they exit; export() merges them, so
+spans inside process pools show up on their own rows in chrome://tracing or
+https://ui.perfetto.dev.
+
+fallback_build.py exposes this as --trace FILE, --profile FILE and
+--tracemalloc.
+"""
+
+from contextlib import contextmanager
+from functools import partial
+from multiprocessing import util
+from pathlib import Path
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+ENV_VAR = 'FALLBACK_TRACE_DIR'
+
+_enabled = False
+_events = []
+_trace_dir = None
+_lock = threading.Lock()
+
+
+class _NullSpan:
+    """Shared do-nothing span returned while tracing is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'cat', 'args', 'start')
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        event = {
+            'name': self.name,
+            'cat': self.cat,
+            'ph': 'X',
+            'ts': self.start / 1000,
+            'dur': (end - self.start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+        }
+        if self.args:
+            event['args'] = self.args
+        with _lock:
+            _events.append(event)
+        return False
+
+
+def span(name, cat='build', **args):
+    """
+    Time a block of code.
+
+    Args:
+        name: Span name shown in the trace and summary (e.g. 'render')
+        cat: Trace category, usually the stage or module
+        **args: Extra values attached to the event (e.g. page=...)
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def _call_traced(fn, item):
+    with _Span(fn.__name__, fn.__module__, {}):
+        return fn(item)
+
+
+def traced(fn):
+    """
+    Wrap a single-argument function (e.g. one mapped over a pool) in a span
+    named after it, with its module as the category. Returns fn unchanged
+    while tracing is disabled. The wrapper is picklable for process pools.
+    """
+    if not _enabled:
+        return fn
+    return partial(_call_traced, fn)
+
+
+# ============================================================================
+# Enabling and Worker Processes
+# ============================================================================
+
+def enable(trace_dir=None):
+    """
+    Start recording spans in this process and in worker processes started
+    afterwards. Events of an earlier trace in this process are dropped.
+    """
+    global _enabled, _trace_dir
+
+    with _lock:
+        _events.clear()
+    _trace_dir = Path(trace_dir or tempfile.mkdtemp(prefix='fallback-trace-'))
+    _trace_dir.mkdir(parents=True, exist_ok=True)
+    os.environ[ENV_VAR] = str(_trace_dir)
+    _enabled = True
+
+
+def disable():
+    """Stop recording spans (already recorded events are kept)."""
+    global _enabled
+
+    _enabled = False
+    os.environ.pop(ENV_VAR, None)
+
+
+def _flush_worker():
+    """Write the events recorded by a worker process to the trace directory."""
+    if not _events or _trace_dir is None:
+        return
+    path = _trace_dir / f'events-{os.getpid()}.json'
+    with _lock:
+        path.write_text(json.dumps(_events), encoding='utf-8')
+
+
+def _init_worker():
+    """
+    Enable tracing in a worker process. Forked workers inherit the parent's
+    events, so those are dropped; multiprocessing runs the finalizer when
+    the worker exits (atexit handlers do not run there).
+    """
+    global _enabled, _trace_dir
+
+    _trace_dir = Path(os.environ[ENV_VAR])
+    _events.clear()
+    _enabled = True
+    util.Finalize(None, _flush_worker, exitpriority=10)
+
+
+if os.environ.get(ENV_VAR) and not _enabled:
+    _init_worker()
+
+
+class _AfterFork:
+    """
+    Registered with multiprocessing so forked pool workers set up tracing
+    after multiprocessing has reset its finalizers in the child.
+    """
+
+    def __call__(self, _):
+        if _enabled and os.environ.get(ENV_VAR):
+            _init_worker()
+
+
+_AFTER_FORK = _AfterFork()
+util.register_after_fork(_AFTER_FORK, _AFTER_FORK)
+
+
+# ============================================================================
+# Export
+# ============================================================================
+
+def collect():
+    """Return this process's events merged with those written by workers."""
+    events = list(_events)
+    if _trace_dir and _trace_dir.exists():
+        for path in sorted(_trace_dir.glob('events-*.json')):
+            try:
+                events += json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                continue
+    events.sort(key=lambda e: e['ts'])
+    return events
+
+
+def export(path):
+    """
+    Write all events as Chrome trace-event JSON and clean up the worker
+    event files.
+
+    Returns:
+        list: The exported events
+    """
+    events = collect()
+    names = {os.getpid(): 'main'}
+    metadata = [
+        {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+         'args': {'name': names.get(pid, f'worker {pid}')}}
+        for pid in sorted({e['pid'] for e in events})
+    ]
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'},
+                   ensure_ascii=False),
+        encoding='utf-8'
+    )
+
+    if _trace_dir:
+        shutil.rmtree(_trace_dir, ignore_errors=True)
+    return events
+
+
+def summary(events):
+    """
+    Aggregate events per span name.
+
+    Returns:
+        list: Rows of (name, cat, count, total_ms, mean_ms, max_ms), slowest
+            total first. Totals of outer spans include their nested spans.
+    """
+    stats = {}
+    for event in events:
+        key = (event['name'], event['cat'])
+        count, total, longest = stats.get(key, (0, 0.0, 0.0))
+        stats[key] = (count + 1, total + event['dur'], max(longest, event['dur']))
+
+    rows = [
+        (name, cat, count, total / 1000, total / count / 1000, longest / 1000)
+        for (name, cat), (count, total, longest) in stats.items()
+    ]
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows
+
+
+def print_summary(events):
+    """Print the per-stage summary table."""
+    if not events:
+        print('⚠️  No spans recorded')
+        return
+
+    wall = (max(e['ts'] + e['dur'] for e in events) - min(e['ts'] for e in events)) / 1000
+    print(f'\n{"span":<24}{"stage":<18}{"count":>7}{"total ms":>11}{"mean ms":>10}{"max ms":>10}')
+    print('-' * 80)
+    for name, cat, count, total, mean, longest in summary(events):
+        print(f'{name:<24}{cat:<18}{count:>7}{total:>11.1f}{mean:>10.2f}{longest:>10.1f}')
+    print(f'\n⏱  Wall time covered by spans: {wall:.1f} ms '
+          f'({len({e["pid"] for e in events})} process(es))')
+
+
+# ============================================================================
+# Profilers
+# ============================================================================
+
+@contextmanager
+def profiled(profile_path=None, memory=False, top=20):
+    """
+    Optionally run a block under cProfile and/or tracemalloc.
+
+    Args:
+        profile_path: Write cProfile stats here (open with pstats/snakeviz)
+        memory: Report peak memory and the top allocation sites
+        top: Number of functions/allocation sites to print
+    """
+    profiler = None
+    if profile_path:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if memory:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            import pstats
+
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            print(f'\n🔬 cProfile stats written to {profile_path} (main process only)')
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(top)
+
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f'\n🧠 tracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB')
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f'  {stat}')
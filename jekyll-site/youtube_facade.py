@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Post-build stage: lightweight YouTube embed facades.
+
+Pages such as 影音專區 embed several YouTube <iframe>s, and every one of
+them loads the full player on page load. This stage replaces each YouTube
+iframe in the built HTML with a facade: a link to the video showing a
+locally cached poster image and a play button. assets/js/main.js swaps the
+facade for the real iframe (with autoplay) when it is clicked; without
+JavaScript the link simply opens the video on YouTube.
+
+Posters are downloaded once from i.ytimg.com into .fallback-cache/youtube/
+(streamed to a temporary file and renamed into place) and copied into
+assets/images/youtube/ of the built site. If a poster cannot be fetched the
+facade points at the remote thumbnail instead.
+
+Run from workspace root (after a fallback or Jekyll build):
+  /Users/bird/Code/fttt/static-page/.venv/bin/python jekyll-site/youtube_facade.py
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import argparse
+import html
+import os
+import re
+import shutil
+import tempfile
+import urllib.parse
+import urllib.request
+
+import fallback_build
+from postbuild_assets import pool_map
+from tracing import traced
+
+POSTER_DIR = 'assets/images/youtube'
+POSTER_URL = 'https://i.ytimg.com/vi/{id}/hqdefault.jpg'
+WATCH_URL = 'https://www.youtube.com/watch?v={id}'
+
+FETCH_TIMEOUT = 15
+FETCH_WORKERS = 4
+
+# Video embeds only: playlist embeds (embed/videoseries?list=..., embed?list=...)
+# have no video id or poster, so they keep their iframe
+IFRAME_RE = re.compile(
+    r'<iframe\b(?P<attrs>[^>]*?\bsrc=["\']'
+    r'(?P<src>(?:https?:)?//(?:www\.)?youtube(?:-nocookie)?\.com/embed/'
+    r'(?!videoseries(?![\w-]))(?P<id>[\w-]{11})(?![\w-])[^"\']*)'
+    r'["\'][^>]*)>\s*</iframe\s*>',
+    re.IGNORECASE
+)
+TITLE_RE = re.compile(r'\btitle=["\']([^"\']*)["\']', re.IGNORECASE)
+
+
+# ============================================================================
+# Posters
+# ============================================================================
+
+def cache_root():
+    """Poster cache, resolved per call so it follows fallback_build.set_site_root()."""
+    return fallback_build.MANIFEST.parent / 'youtube'
+
+
+def fetch_poster(video_id):
+    """
+    Download a video's poster into the cache unless it is already there.
+
+    Returns:
+        Path: Cached poster path, or None if the download failed
+    """
+    cache = cache_root()
+    target = cache / f'{video_id}.jpg'
+    if target.exists():
+        return target
+
+    cache.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cache, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out, urllib.request.urlopen(
+                POSTER_URL.format(id=video_id), timeout=FETCH_TIMEOUT) as response:
+            shutil.copyfileobj(response, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, target)
+        return target
+    except OSError as exc:
+        print(f'⚠️  Could not fetch poster for {video_id}: {exc}')
+        return None
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def publish_posters(site, video_ids):
+    """
+    Fetch missing posters concurrently and copy them into the site.
+
+    Returns:
+        dict: video id → site-relative poster path (only for available posters)
+    """
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        cached = dict(zip(video_ids, pool.map(traced(fetch_poster), video_ids)))
+
+    posters = {}
+    for video_id, path in cached.items():
+        if path is None:
+            continue
+        rel = f'{POSTER_DIR}/{video_id}.jpg'
+        dst = site / rel
+        if not dst.exists():
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, dst)
+        posters[video_id] = rel
+    return posters
+
+
+# ============================================================================
+# HTML Rewriting
+# ============================================================================
+
+def autoplay_url(src):
+    """Embed URL with autoplay enabled, keeping existing parameters."""
+    if src.startswith('//'):
+        src = 'https:' + src
+    parts = urllib.parse.urlsplit(html.unescape(src))
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    query = [(k, v) for k, v in query if k != 'autoplay'] + [('autoplay', '1')]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def facade_html(match, posters, baseurl):
+    """Build the facade markup replacing one iframe."""
+    video_id = match.group('id')
+    title_match = TITLE_RE.search(match.group('attrs'))
+    title = title_match.group(1) if title_match else 'YouTube video'
+
+    if video_id in posters:
+        poster = f'{baseurl.rstrip("/")}/{posters[video_id]}'
+    else:
+        poster = POSTER_URL.format(id=video_id)
+
+    embed = html.escape(autoplay_url(match.group('src')), quote=True)
+    watch = WATCH_URL.format(id=video_id)
+
+    return (
+        f'<a class="yt-facade" href="{watch}" data-embed="{embed}" title="{title}">'
+        f'<img src="{poster}" alt="{title}" loading="lazy" decoding="async" width="480" height="360">'
+        f'<span class="yt-facade-play" aria-hidden="true"></span>'
+        f'<span class="yt-facade-label">▶ 播放：{title}</span>'
+        f'</a>'
+    )
+
+
+_worker_state = {}
+
+
+def init_worker(site, posters, baseurl):
+    _worker_state['site'] = site
+    _worker_state['posters'] = posters
+    _worker_state['baseurl'] = baseurl
+
+
+def rewrite_page(rel):
+    """
+    Replace the YouTube iframes of one page with facades.
+
+    Returns:
+        int: Number of iframes replaced
+    """
+    path = _worker_state['site'] / rel
+    text = path.read_text(encoding='utf-8', errors='ignore')
+    new_text, count = IFRAME_RE.subn(
+        lambda m: facade_html(m, _worker_state['posters'], _worker_state['baseurl']),
+        text
+    )
+    if count:
+        path.write_text(new_text, encoding='utf-8')
+    return count
+
+
+# ============================================================================
+# Stage Entry Point
+# ============================================================================
+
+def run(site=None, baseurl=None, jobs=1):
+    """
+    Replace YouTube iframes with facades in every page of a built site.
+
+    Args:
+        site: Built site directory (default: _site/)
+        baseurl: Site baseurl (default: read from _config.yml)
+        jobs: Worker processes for HTML rewriting
+
+    Returns:
+        dict: Summary counts
+    """
+    site = Path(site or fallback_build.OUT)
+    baseurl = fallback_build.read_baseurl() if baseurl is None else baseurl
+
+    # Find videos first so each poster is fetched once for the whole site
+    pages = []
+    video_ids = set()
+    for path in sorted(site.rglob('*.html')):
+        text = path.read_text(encoding='utf-8', errors='ignore')
+        ids = {m.group('id') for m in IFRAME_RE.finditer(text)}
+        if ids:
+            pages.append(path.relative_to(site).as_posix())
+            video_ids |= ids
+
+    posters = publish_posters(site, sorted(video_ids))
+    replaced = sum(pool_map(rewrite_page, pages, jobs,
+                            initializer=init_worker,
+                            initargs=(site, posters, baseurl)))
+
+    print(f'✓ REPLACED {replaced} YouTube iframes in {len(pages)} pages '
+          f'({len(posters)} of {len(video_ids)} posters cached locally)')
+    return {'videos': len(video_ids), 'iframes_replaced': replaced}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Replace YouTube iframes in a built site with click-to-load facades.'
+    )
+    parser.add_argument('--site', default=str(fallback_build.OUT),
+                        help='built site directory (default: _site/)')
+    parser.add_argument('--baseurl', default=None,
+                        help='site baseurl (default: baseurl from _config.yml)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    run(site=args.site, baseurl=args.baseurl, jobs=jobs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for the assets of the Jekyll site.
+
+crawl_and_convert.py (downloaded images and documents), convert_to_jekyll.py
+(files copied from the mirror) and enrich_jekyll_site.py (downloaded images)
+all put their assets here instead of into three different layouts:
+
+  jekyll-site/assets/store/<first 2 hex digits>/<first 16 hex digits of sha256><ext>
+
+so identical bytes are stored once whatever their URL or file name, a file
+that is already stored is never written again, and a page keeps referencing
+the same path for as long as the asset's bytes do not change.
+
+jekyll-site/asset_index.json maps each source URL to its blob:
+
+  {"version": 1, "urls": {"https://www.fttt.org.tw/wp-content/uploads/a.png":
+      {"sha256": "...", "path": "assets/store/3f/3fa2...png", "size": 1234}}}
+
+Hashes of local source files are cached by (size, mtime) in
+jekyll-site/.asset_hashes.json, so unchanged mirror files are not re-read.
+
+Usage:
+  from asset_store import AssetStore
+
+  store = AssetStore(JEKYLL_OUT)
+  blob = store.put_file(mirror_file, url)             # copy from the mirror
+  blob = store.download(engine, url)                  # stream from the site
+  page_ref = store.site_path(blob)                    # '/assets/store/3f/3fa2...png'
+  store.save()
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+INDEX_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+HASH_PREFIX = 16
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def asset_suffix(name: str) -> str:
+    """Lowercased file extension of a URL or file name ('' if it has none)"""
+    suffix = Path(urlparse(name).path if '://' in name else name).suffix.lower()
+    return suffix if 1 < len(suffix) <= 6 and suffix[1:].isalnum() else ''
+
+class AssetStore:
+    """Blobs by content hash, plus a URL → blob index"""
+
+    def __init__(self, site_dir: Path):
+        self.site_dir = Path(site_dir)
+        self.root = self.site_dir / 'assets' / 'store'
+        self.staging = self.root / 'tmp'
+        self.index_file = self.site_dir / 'asset_index.json'
+        self.hashes_file = self.site_dir / '.asset_hashes.json'
+        self.urls: Dict[str, Dict] = self._load(self.index_file).get('urls', {})
+        self.hashes: Dict[str, Dict] = self._load(self.hashes_file).get('files', {})
+        self.lock = threading.Lock()
+        self.stored = 0      # blobs written this run
+        self.reused = 0      # assets whose bytes were already stored
+
+    def _load(self, path: Path) -> Dict:
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        return data if data.get('version') == INDEX_VERSION else {}
+
+    def _write_json(self, path: Path, data: Dict):
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def save(self):
+        """Write the URL index and the hash cache"""
+        with self.lock:
+            self._write_json(self.index_file, {'version': INDEX_VERSION, 'urls': self.urls})
+            self._write_json(self.hashes_file, {'version': INDEX_VERSION, 'files': self.hashes})
+
+    def site_path(self, blob: Path) -> str:
+        """Root-relative URL of a blob ('/assets/store/...')"""
+        return '/' + blob.relative_to(self.site_dir).as_posix()
+
+    def blob_path(self, sha256: str, suffix: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256[:HASH_PREFIX]}{suffix}"
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """The stored blob of a URL, if it is still there"""
+        entry = self.urls.get(url)
+        if entry:
+            blob = self.site_dir / entry['path']
+            if blob.exists():
+                return blob
+        return None
+
+    def file_hash(self, path: Path) -> str:
+        """sha256 of a local file, cached by (size, mtime)"""
+        stat = path.stat()
+        key = str(path.resolve())
+        cached = self.hashes.get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+            return cached['sha256']
+        sha256 = file_sha256(path)
+        with self.lock:
+            self.hashes[key] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def put_file(self, src: Path, url: Optional[str] = None, move: bool = False) -> Path:
+        """
+        Store a file (copied, or moved with move=True) unless its bytes are
+        already stored, record it under `url` and return the blob path
+        """
+        sha256 = file_sha256(src) if move else self.file_hash(src)
+        blob = self.blob_path(sha256, asset_suffix(url or src.name) or asset_suffix(src.name))
+        if blob.exists():
+            self.reused += 1
+            if move:
+                src.unlink()
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            if move:
+                os.replace(src, blob)
+            else:
+                tmp = blob.with_name(f"{blob.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, blob)
+            self.stored += 1
+        if url:
+            with self.lock:
+                self.urls[url] = {
+                    'sha256': sha256,
+                    'path': blob.relative_to(self.site_dir).as_posix(),
+                    'size': blob.stat().st_size,
+                }
+        return blob
+
+    def download(self, engine, url: str, kind: str = 'asset') -> Path:
+        """
+        Stream url into the store through `engine` (a CrawlEngine) and
+        return its blob. A URL that is already stored is revalidated with a
+        conditional request if the HTTP cache has validators for it, and
+        kept as is otherwise. Raises on download errors.
+        """
+        blob = self.lookup(url)
+        if blob is not None and (engine.cache is None or engine.cache.lookup(url) is None):
+            return blob
+
+        # One staging file per URL, so an interrupted download resumes next time
+        self.staging.mkdir(parents=True, exist_ok=True)
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:HASH_PREFIX]
+        staged = self.staging / f"{key}{asset_suffix(url)}"
+        if engine.download(url, staged, kind=kind, local_copy=blob) != 'downloaded':
+            return blob
+        return self.put_file(staged, url, move=True)
+
+    def report(self):
+        print(f"📦 Asset store: {self.stored} new blobs, {self.reused} already stored, "
+              f"{len(self.urls)} URLs indexed")
@@ -4,15 +4,27 @@ Converter: mirrored HTML -> Jekyll pages + copy referenced assets
 
 Usage: run from workspace root (/Users/bird/Code/fttt/static-page)
   python3 jekyll-site/convert_to_jekyll.py
+  python3 jekyll-site/convert_to_jekyll.py --trace trace.json   # spans per stage, see pipeline_tracing.py
+  python3 jekyll-site/convert_to_jekyll.py --jobs 0    # one worker process per core
 
 It will read the mirrored files under `www.fttt.org.tw/` and create files under `jekyll-site/`.
+The pages to convert come from url_manifest.json, written by crawl_and_convert.py.
+Images and documents go into the content-addressed asset store (see asset_store.py);
+theme files keep their layout under assets/theme/ and are only copied when they changed.
 """
 
+import argparse
 import os
+import re
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from markdownify import markdownify as md
+from asset_store import AssetStore
+from crawl_frontier import load_manifest
+from pipeline_tracing import add_tracing_arguments, span, traced, tracing_run
 
 # Workspace paths (adjust if necessary)
 WORKSPACE = Path('/Users/bird/Code/fttt/static-page')
@@ -20,32 +32,28 @@ MIRROR = WORKSPACE / 'live_fetch' / 'www.fttt.org.tw'  # Use fresh fetch instead
 OUT = WORKSPACE / 'jekyll-site'
 PAGES_OUT = OUT / 'pages'
 ASSETS_OUT = OUT / 'assets'
-UPLOADS_OUT = ASSETS_OUT / 'uploads'
 CSS_OUT = ASSETS_OUT / 'css'
 THEME_OUT = ASSETS_OUT / 'theme'
 
-MAPPING = [
-    ('index.html', -1),  # homepage with page_id 240
-    ('page_125.html', 125),
-    ('page_87.html', 87),
-    ('page_86.html', 86),
-    ('page_85.html', 85),
-    ('page_89.html', 89),
-    ('page_52.html', 52),
-    ('page_60.html', 60),
-    ('page_61.html', 61),
-    ('page_62.html', 62),
-    ('page_63.html', 63),
-    ('page_64.html', 64),
-    ('page_70.html', 70),
-    ('page_71.html', 71),
-    ('page_72.html', 72),
-    ('page_5016.html', 5016),
-    ('page_6871.html', 6871),
-    ('page_4182.html', 4182),
-    ('page_120.html', 120),
-    ('page_5147.html', 5147),
-]
+URL_MANIFEST = WORKSPACE / 'url_manifest.json'
+
+# WordPress page id of the home page (its URL has no ?page_id=)
+HOME_PAGE_ID = 240
+
+def set_workspace(root: Path, mirror: Optional[Path] = None):
+    """
+    Point the converter at another workspace (e.g. a benchmark's) and
+    mirror; also the worker process initializer, so workers use the same paths
+    """
+    global WORKSPACE, MIRROR, OUT, PAGES_OUT, ASSETS_OUT, CSS_OUT, THEME_OUT, URL_MANIFEST
+    WORKSPACE = Path(root)
+    MIRROR = Path(mirror) if mirror else WORKSPACE / 'live_fetch' / 'www.fttt.org.tw'
+    OUT = WORKSPACE / 'jekyll-site'
+    PAGES_OUT = OUT / 'pages'
+    ASSETS_OUT = OUT / 'assets'
+    CSS_OUT = ASSETS_OUT / 'css'
+    THEME_OUT = ASSETS_OUT / 'theme'
+    URL_MANIFEST = WORKSPACE / 'url_manifest.json'
 
 def safe_mkdir(p: Path):
     if not p.exists():
@@ -93,7 +101,7 @@ def find_local_asset(src_path: str):
 
     return None
 
-def copy_asset(src: Path, dest_root: Path):
+def asset_dest(src: Path, dest_root: Path) -> Path:
     rel_parts = src.parts
     # try to keep path after wp-content/uploads or keep last two directories
     try:
@@ -102,10 +110,17 @@ def copy_asset(src: Path, dest_root: Path):
     except ValueError:
         rel = Path(*rel_parts[-3:])
 
-    dest = dest_root / rel
+    return dest_root / rel
+
+def copy_asset(src: Path, dest: Path) -> bool:
+    """Copy a file unless dest already is an unchanged copy of it"""
+    if dest.exists():
+        src_stat, dest_stat = src.stat(), dest.stat()
+        if src_stat.st_size == dest_stat.st_size and src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+            return False
     safe_mkdir(dest.parent)
     shutil.copy2(src, dest)
-    return dest
+    return True
 
 def slug_from_filename(path: Path):
     name = path.stem
@@ -116,102 +131,192 @@ def extract_main(soup: BeautifulSoup):
     main = soup.select_one('.entry-content') or soup.select_one('#content') or soup.body
     return main
 
-def convert_all():
-    safe_mkdir(PAGES_OUT)
-    safe_mkdir(UPLOADS_OUT)
-    safe_mkdir(CSS_OUT)
-    safe_mkdir(THEME_OUT)
+def load_mapping():
+    """(mirror file name, page_id, url) of every page in the URL manifest"""
+    manifest = load_manifest(URL_MANIFEST)
+    mapping = []
+    for page in manifest.get('pages', []):
+        page_id = page['page_id']
+        if page['file'] == 'index.html':
+            page_id = -1
+        mapping.append((page['file'], page_id, page['url']))
+    return mapping
 
-    created = []
-    assets_copied = set()
+# Links to these are copied along with the page (besides every <img>)
+DOCUMENT_HINTS = ('wp-content/uploads', '.pdf', '.docx')
 
-    for src_filename, page_id in MAPPING:
-        src = MIRROR / src_filename
-        if not src.exists():
-            print(f"SKIP: source not found: {src}")
-            continue
+# Stands in for an asset URL in markdown converted by a worker process
+ASSET_TOKEN = '\ue000{}\ue001'
+ASSET_TOKEN_RE = re.compile('\ue000(\\d+)\ue001')
+
+def content_references(main):
+    """(tag, attribute) of the images and document links in the main content"""
+    refs = []
+    for tag in main.find_all(['img', 'a']):
+        if tag.name == 'img' and tag.get('src'):
+            refs.append((tag, 'src'))
+        elif tag.name == 'a' and tag.get('href') and any(h in tag['href'] for h in DOCUMENT_HINTS):
+            refs.append((tag, 'href'))
+    return refs
+
+def head_references(soup: BeautifulSoup):
+    """Theme and CSS links in the head"""
+    return [href for href in (link.get('href') for link in soup.find_all('link'))
+            if href and ('wp-content/themes' in href or 'wp-includes' in href or href.endswith('.css'))]
 
+# Asset URL -> mirrored file, per process
+_local_assets: Dict[str, Optional[Path]] = {}
+
+def local_asset(url: str) -> Optional[Path]:
+    """The mirrored file behind an asset URL, or None for external/missing assets"""
+    if url not in _local_assets:
+        _local_assets[url] = find_local_asset(url)
+    return _local_assets[url]
+
+def convert_page(task: Tuple[Path, int, str]):
+    """
+    Convert one mirrored page: parse once, replace asset references on the
+    tree with placeholder tokens, serialize the main content once and
+    convert it to Markdown. Runs in worker processes with --jobs; the
+    caller stores the assets, fills in the tokens and writes the page.
+    Returns (output file, page text, [(asset URL, mirrored file)],
+    [(theme file, copy)], number of assets).
+    """
+    src, page_id, url = task
+    with span('read', 'convert'):
         html = src.read_text(encoding='utf-8', errors='ignore')
+    with span('parse', 'convert'):
         soup = BeautifulSoup(html, 'lxml')
 
-        # title
+    with span('extract', 'convert'):
         title_tag = soup.find('title')
         title = title_tag.get_text().strip() if title_tag else f'page-{page_id}'
-
         main = extract_main(soup)
+        refs = content_references(main) if main is not None else []
+        head_urls = head_references(soup) if main is not None else []
+        asset_count = len({tag[attr] for tag, attr in refs} | set(head_urls))
+
+    # Content assets go into the asset store; external URLs such as YouTube stay
+    with span('assets', 'convert'):
+        assets = []
+        for tag, attr in refs:
+            local = local_asset(tag[attr])
+            if local:
+                assets.append((tag[attr], local))
+                tag[attr] = ASSET_TOKEN.format(len(assets) - 1)
+        # Stylesheets refer to fonts and images relative to themselves, so theme files keep their layout
+        copies = []
+        for href in head_urls:
+            local = local_asset(href)
+            if local:
+                in_theme = 'wp-content/themes' in str(local) or 'wp-includes' in str(local)
+                copies.append((local, asset_dest(local, THEME_OUT if in_theme else ASSETS_OUT)))
+
+    with span('serialize', 'convert'):
         if main is None:
             body_html = soup.body.decode_contents() if soup.body else html
         else:
-            body_html = ''.join(str(x) for x in main.contents)
-
-        # find assets in main
-        asset_paths = set()
-        temp_soup = BeautifulSoup(body_html, 'lxml')
-        for img in temp_soup.find_all('img'):
-            if img.get('src'):
-                asset_paths.add(img['src'])
-        for a in temp_soup.find_all('a'):
-            if a.get('href') and ('wp-content/uploads' in a['href'] or '.pdf' in a['href'] or '.docx' in a['href']):
-                asset_paths.add(a['href'])
-
-        # also capture theme and css referenced in head (for styling)
-        for link in soup.find_all('link'):
-            href = link.get('href')
-            if not href:
-                continue
-            if 'wp-content/themes' in href or 'wp-includes' in href or href.endswith('.css'):
-                asset_paths.add(href)
-
-        # Copy assets
-        for ap in sorted(asset_paths):
-            local = find_local_asset(ap)
-            if local:
-                if 'wp-content/uploads' in str(local):
-                    dest = copy_asset(local, UPLOADS_OUT)
-                elif 'wp-content/themes' in str(local) or 'wp-includes' in str(local):
-                    dest = copy_asset(local, THEME_OUT)
-                else:
-                    dest = copy_asset(local, ASSETS_OUT)
-                assets_copied.add(str(dest.relative_to(OUT)))
-                # rewrite paths in body_html to new asset path
-                new_rel = '/' + str(Path('assets') / Path(*Path(dest).relative_to(OUT).parts[1:])).replace('\\','/')
-                body_html = body_html.replace(ap, new_rel)
-            else:
-                # leave external URLs as-is (YouTube etc.)
-                pass
-
-        # convert to markdown
+            body_html = main.decode_contents()
+
+    with span('markdown', 'convert'):
         md_body = md(body_html, heading_style="ATX")
 
-        # use custom slug for index
+    with span('frontmatter', 'convert'):
+        # use custom slug for index; other pages are named like their mirror file
         if page_id == -1:
             slug = 'index'
         else:
-            slug = f'page_{page_id}'
+            slug = src.stem
         out_file = PAGES_OUT / f'{slug}.md'
         fm = [
             '---',
             f'title: "{title}"',
-            f'original_page_id: {page_id if page_id != -1 else 240}',
+        ]
+        if page_id is not None:
+            fm.append(f'original_page_id: {page_id if page_id != -1 else HOME_PAGE_ID}')
+        fm += [
             f'original_file: {src.name}',
+            f'original_url: {url}',
             'layout: default',
             '---',
             '',
         ]
 
-        out_file.write_text('\n'.join(fm) + md_body, encoding='utf-8')
+    return out_file, '\n'.join(fm) + md_body, assets, copies, asset_count
+
+def pool_map(fn, items, jobs):
+    """Map fn over items in order, in-process for jobs <= 1; each call is a span with --trace"""
+    fn = traced(fn)
+    if jobs <= 1 or len(items) <= 1:
+        return map(fn, items)
+    # Workers started with spawn re-import this module, so pass the paths on
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items)), initializer=set_workspace,
+                             initargs=(WORKSPACE, MIRROR)) as pool:
+        return list(pool.map(fn, items, chunksize=max(1, len(items) // (jobs * 4))))
+
+def convert_all(jobs: int = 1):
+    mapping = load_mapping()
+    if not mapping:
+        print(f"No pages to convert: {URL_MANIFEST} is missing or empty (run scripts/crawl_and_convert.py first)")
+        return
+
+    safe_mkdir(PAGES_OUT)
+    safe_mkdir(CSS_OUT)
+    safe_mkdir(THEME_OUT)
+
+    created = []
+    store = AssetStore(OUT)
+    stored: Dict[str, str] = {}     # asset URL -> site path of its blob
+    copied: Dict[Path, bool] = {}   # theme copy -> whether it was (re)written
+
+    tasks = []
+    for src_filename, page_id, url in mapping:
+        src = MIRROR / src_filename
+        if not src.exists():
+            print(f"SKIP: source not found: {src}")
+            continue
+        tasks.append((src, page_id, url))
+
+    # Results come back in mapping order, so logs and the store are the same for any --jobs
+    for out_file, text, assets, copies, asset_count in pool_map(convert_page, tasks, jobs):
+        with span('store', 'convert'):
+            site_paths = []
+            for asset_url, local in assets:
+                if asset_url not in stored:
+                    stored[asset_url] = store.site_path(store.put_file(local, asset_url))
+                site_paths.append(stored[asset_url])
+            text = ASSET_TOKEN_RE.sub(lambda m: site_paths[int(m.group(1))], text)
+        with span('write', 'convert'):
+            out_file.write_text(text, encoding='utf-8')
+        with span('copy', 'convert'):
+            for local, dest in copies:
+                if dest not in copied:
+                    copied[dest] = copy_asset(local, dest)
         created.append(out_file)
-        print(f'CREATED: {out_file} (assets: {len(asset_paths)})')
+        print(f'CREATED: {out_file} (assets: {asset_count})')
+    store.save()
 
-    # create a small css shim (copy theme css if found)
     print('\nSummary:')
     print(f'Pages created: {len(created)}')
-    print(f'Assets copied: {len(assets_copied)}')
-    if len(assets_copied) > 0:
+    print(f'Assets stored: {len(set(stored.values()))} '
+          f'({store.stored} new, {store.reused} already in assets/store)')
+    print(f'Theme files copied: {sum(copied.values())} ({len(copied) - sum(copied.values())} unchanged)')
+    if stored:
         print('Sample assets:')
-        for a in list(assets_copied)[:20]:
-            print(' -', a)
+        for asset_url in sorted(stored)[:20]:
+            print(' -', asset_url, '->', stored[asset_url].lstrip('/'))
 
-if __name__ == '__main__':
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Convert mirrored HTML pages to Jekyll pages')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes (0 = one per CPU core)')
+    add_tracing_arguments(parser)
+    args = parser.parse_args(argv)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
     print('Starting conversion: mirror -> jekyll-site')
-    convert_all()
+    with tracing_run(args, 'convert'):
+        convert_all(jobs=jobs)
+
+if __name__ == '__main__':
+    main()
@@ -3,20 +3,56 @@
 WordPress to Jekyll Converter
 Crawls WordPress pages and converts them to Jekyll format, preserving original design.
 
+Pages are discovered by following same-host links breadth first from the
+home page (see crawl_frontier.py) and recorded in url_manifest.json, which
+convert_to_jekyll.py also reads. Pages are fetched concurrently, and each
+page's images and documents are downloaded in parallel, through a
+rate-limited CrawlEngine (see crawl_engine.py). Responses are kept in an HTTP cache under page_backups/
+(see http_cache.py), so re-crawls only send conditional requests and skip
+the body of anything that did not change. Images and documents go into
+the content-addressed asset store (see asset_store.py), so identical files
+are stored once.
+
+Pages whose main content has not changed since the last run (ignoring
+nonces, ?ver= cache busters and timestamps WordPress regenerates on every
+request) are not reconverted; see content_fingerprint() in page_content.py.
+Their images and documents are still revalidated, and a page is
+reconverted when one of them changed on the site (its blob, and so the
+path in the Markdown, is different).
+
+With --jobs N, parsing and markdown conversion run in N worker processes
+while the main process keeps fetching; asset URLs come back as placeholder
+tokens that are swapped for the downloaded copies in one pass.
+
 Usage:
   python3 crawl_and_convert.py
+  python3 crawl_and_convert.py --force   # reconvert every page
+  python3 crawl_and_convert.py --concurrency 8 --rate 4
+  python3 crawl_and_convert.py --no-cache  # ignore the HTTP cache
+  python3 crawl_and_convert.py --max-depth 2 --start-url http://localhost:8000/
+  python3 crawl_and_convert.py --jobs 4   # convert pages in 4 worker processes
+  python3 crawl_and_convert.py --trace trace.json  # spans per stage, see pipeline_tracing.py
 """
 
+import argparse
+import json
 import os
 import sys
-import time
 import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple, Dict, List
 from urllib.parse import urljoin, urlparse
-import requests
 from bs4 import BeautifulSoup
 from markdownify import markdownify as md
+from crawl_engine import CrawlEngine, DEFAULT_CONCURRENCY, DEFAULT_RATE, log
+from crawl_frontier import (DEFAULT_MAX_DEPTH, DEFAULT_MAX_PAGES, Frontier, backup_name,
+                            load_manifest, normalize_url, page_id_of, write_manifest)
+from asset_store import AssetStore
+from http_cache import HttpCache
+from page_content import content_fingerprint, extract_content, extract_page_title
+from pipeline_tracing import add_tracing_arguments, span, tracing_run
 
 # Configuration
 WORKSPACE = Path('/Users/bird/Code/fttt/static-page')
@@ -24,43 +60,52 @@ MIRROR_DIR = WORKSPACE / 'page_backups'
 JEKYLL_OUT = WORKSPACE / 'jekyll-site'
 PAGES_OUT = JEKYLL_OUT / 'pages'
 ASSETS_OUT = JEKYLL_OUT / 'assets'
+FINGERPRINTS_FILE = MIRROR_DIR / 'content_fingerprints.json'
+HTTP_CACHE_DIR = MIRROR_DIR / 'http_cache'
 
 # Base URLs and pages to crawl
 BASE_URL = "https://www.fttt.org.tw"
-PAGES_TO_CRAWL = [
-    ("https://www.fttt.org.tw/", "Home"),
-    ("https://www.fttt.org.tw/?page_id=125", None),
-    ("https://www.fttt.org.tw/?page_id=87", None),
-    ("https://www.fttt.org.tw/?page_id=86", None),
-    ("https://www.fttt.org.tw/?page_id=85", None),
-    ("https://www.fttt.org.tw/?page_id=89", None),
-    ("https://www.fttt.org.tw/?page_id=52", None),
-    ("https://www.fttt.org.tw/?page_id=60", None),
-    ("https://www.fttt.org.tw/?page_id=61", None),
-    ("https://www.fttt.org.tw/?page_id=62", None),
-    ("https://www.fttt.org.tw/?page_id=63", None),
-    ("https://www.fttt.org.tw/?page_id=64", None),
-    ("https://www.fttt.org.tw/?page_id=70", None),
-    ("https://www.fttt.org.tw/?page_id=71", None),
-    ("https://www.fttt.org.tw/?page_id=72", None),
-    ("https://www.fttt.org.tw/?page_id=5016", None),
-    ("https://www.fttt.org.tw/?page_id=6871", None),
-    ("https://www.fttt.org.tw/?page_id=4182", None),
-    ("https://www.fttt.org.tw/?page_id=120", None),
-    ("https://www.fttt.org.tw/?page_id=5147", None),
-]
-
-# Session for requests
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-})
+START_URL = f"{BASE_URL}/"
+
+# Pages are discovered by following links from the start URL (see
+# crawl_frontier.py); the URL manifest lists what the last crawl found and
+# seeds the next one, so pages stay included while they are reachable
+URL_MANIFEST = WORKSPACE / 'url_manifest.json'
+
+# Documents linked from pages that are downloaded with them
+DOCUMENT_EXTENSIONS = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip')
+
+# Rate-limited fetching shared by pages and assets (replaced in main() with CLI settings)
+engine = CrawlEngine()
+
+# Content-addressed asset storage shared with the other scripts (replaced in main())
+store = AssetStore(JEKYLL_OUT)
+
+# Asset URL → download, so assets shared by several pages are fetched once per run
+asset_downloads: Dict[str, Future] = {}
+
+# Stands in for an asset URL in markdown converted by a worker process
+ASSET_TOKEN = '\ue000{}\ue001'
+ASSET_TOKEN_RE = re.compile('\ue000(\\d+)\ue001')
+
+def set_workspace(root: Path):
+    """Point the crawler at another workspace (e.g. a benchmark's) instead of WORKSPACE"""
+    global WORKSPACE, MIRROR_DIR, JEKYLL_OUT, PAGES_OUT, ASSETS_OUT
+    global FINGERPRINTS_FILE, HTTP_CACHE_DIR, URL_MANIFEST
+    WORKSPACE = Path(root)
+    MIRROR_DIR = WORKSPACE / 'page_backups'
+    JEKYLL_OUT = WORKSPACE / 'jekyll-site'
+    PAGES_OUT = JEKYLL_OUT / 'pages'
+    ASSETS_OUT = JEKYLL_OUT / 'assets'
+    FINGERPRINTS_FILE = MIRROR_DIR / 'content_fingerprints.json'
+    HTTP_CACHE_DIR = MIRROR_DIR / 'http_cache'
+    URL_MANIFEST = WORKSPACE / 'url_manifest.json'
 
 def safe_mkdir(p: Path):
     """Create directory safely"""
     if not p.exists():
         p.mkdir(parents=True, exist_ok=True)
-        print(f"✓ Created directory: {p}")
+        log(f"✓ Created directory: {p}")
 
 def sanitize_filename(name: str) -> str:
     """Sanitize a string to be used as a filename"""
@@ -76,14 +121,14 @@ def sanitize_filename(name: str) -> str:
     name = name.strip('-').lower()
     return name
 
-def download_asset(url: str, base_path: Path) -> Optional[Path]:
-    """Download an asset and save it locally"""
+def download_asset(url: str) -> Optional[Path]:
+    """Download an asset into the asset store and return its blob"""
     try:
         # Parse URL
         parsed = urlparse(url)
         
         # Skip external assets and data URIs
-        if parsed.netloc and 'fttt.org.tw' not in parsed.netloc:
+        if parsed.netloc and parsed.netloc != urlparse(BASE_URL).netloc:
             return None
         if url.startswith('data:'):
             return None
@@ -92,164 +137,179 @@ def download_asset(url: str, base_path: Path) -> Optional[Path]:
         if not url.startswith('http'):
             url = urljoin(BASE_URL, url)
         
-        # Download
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Determine file path
-        path = urlparse(url).path
-        filename = Path(path).name or 'asset'
-        
-        # Create subdirectories based on URL path
-        path_parts = Path(path).parts
-        if len(path_parts) > 1:
-            rel_dir = Path(*path_parts[:-1])
-            save_dir = base_path / rel_dir
-        else:
-            save_dir = base_path
-        
-        safe_mkdir(save_dir)
-        save_path = save_dir / filename
-        
-        # Don't overwrite existing files
-        if save_path.exists():
-            return save_path
-        
-        save_path.write_bytes(response.content)
-        print(f"  ✓ Downloaded: {save_path.relative_to(WORKSPACE)}")
-        return save_path
+        # Stream into the store, or revalidate the stored copy with a conditional request
+        previous = store.lookup(url)
+        with span('store_asset', 'crawl', url=url):
+            blob = store.download(engine, url)
+        if blob != previous:
+            log(f"  ✓ Downloaded: {url} → {blob.relative_to(WORKSPACE)}")
+        return blob
     except Exception as e:
-        print(f"  ✗ Failed to download {url}: {e}")
+        log(f"  ✗ Failed to download {url}: {e}")
         return None
 
-def extract_page_title_from_h3(soup: BeautifulSoup) -> Optional[str]:
-    """Extract the page title from wp-block-heading class"""
-    # First try to find heading with wp-block-heading class
-    heading = soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'], class_='wp-block-heading')
-    if heading:
-        title = heading.get_text().strip()
-        return title if title else None
-    
-    # Fallback to first h1
-    h1 = soup.find('h1')
-    if h1 and h1.get('class') is None:  # Skip site title h1s
-        title = h1.get_text().strip()
-        return title if title else None
-    
-    # Fallback to h2
-    h2 = soup.find('h2')
-    if h2:
-        title = h2.get_text().strip()
-        return title if title else None
-    
-    return None
+def load_fingerprints() -> Dict[str, Dict]:
+    """Load the content fingerprints recorded by the previous run"""
+    try:
+        return json.loads(FINGERPRINTS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
 
-def extract_content(soup: BeautifulSoup) -> Tuple[str, BeautifulSoup]:
-    """
-    Extract main content while preserving structure.
-    Returns (header_html, main_content_soup, footer_html)
-    """
-    # Extract header
-    header = soup.find('header')
-    header_html = str(header) if header else ""
-    
-    # Extract footer
-    footer = soup.find('footer')
-    footer_html = str(footer) if footer else ""
-    
-    # Extract main content
-    main = soup.find('main')
-    if not main:
-        main = soup.find('div', class_='content')
-    if not main:
-        main = soup.find('article')
-    if not main:
-        # Fallback: find the main content area
-        main = soup.find('div', id='content')
-    
-    return header_html, main if main else soup, footer_html
+def save_fingerprints(fingerprints: Dict[str, Dict]):
+    """Save content fingerprints (url → fingerprint, title, filename, asset site paths)"""
+    safe_mkdir(FINGERPRINTS_FILE.parent)
+    FINGERPRINTS_FILE.write_text(
+        json.dumps(fingerprints, ensure_ascii=False, indent=2, sort_keys=True),
+        encoding='utf-8'
+    )
 
-def process_html_for_jekyll(html_content: str, url: str, page_num: int) -> Tuple[str, Optional[str]]:
+def process_html_for_jekyll(html_content: str, suggested_title: Optional[str] = None,
+                            previous_fingerprint: Optional[str] = None):
     """
-    Process HTML content:
-    1. Extract title from H3
-    2. Download assets
-    3. Convert to markdown
+    Process HTML content (the CPU-bound part, safe to run in a worker process):
+    1. Fingerprint the content; stop if it matches previous_fingerprint
+    2. Extract title from H3
+    3. Collect asset references, replaced by placeholder tokens
+    4. Convert to markdown
+    The page is parsed once. Returns (fingerprint, markdown or None if
+    unchanged, page_title, asset URLs); localize_assets() swaps the tokens
+    for the downloaded copies.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    with span('parse', 'crawl'):
+        soup = BeautifulSoup(html_content, 'html.parser')
+    with span('fingerprint', 'crawl'):
+        fingerprint = content_fingerprint(soup)
+    if fingerprint == previous_fingerprint:
+        return fingerprint, None, None, []
     
     # Extract title from H3
-    page_title = extract_page_title_from_h3(soup)
-    
-    if not page_title:
-        # Fallback to page title tag
-        title_tag = soup.find('title')
-        if title_tag:
-            page_title = title_tag.get_text().strip()
-            # Remove site name if present
-            page_title = re.sub(r'\s*[-|]\s*.*$', '', page_title)
-    
-    print(f"  Page title extracted: {page_title}")
+    page_title = extract_page_title(soup)
     
     # Extract main content
-    header_html, main_content, footer_html = extract_content(soup)
-    
-    # Download assets from the page
-    assets_dir = ASSETS_OUT / 'page_assets'
-    
-    # Download images
-    for img in main_content.find_all('img'):
-        src = img.get('src')
-        if src:
-            asset_path = download_asset(src, assets_dir)
-            if asset_path:
-                # Update img src to relative path
-                rel_path = asset_path.relative_to(JEKYLL_OUT)
-                img['src'] = f"/{rel_path}"
+    with span('extract', 'crawl'):
+        header_html, main_content, footer_html = extract_content(soup)
     
-    # Download links (documents, PDFs, etc)
-    for a in main_content.find_all('a'):
-        href = a.get('href')
-        if href and not href.startswith('http'):
-            # Check if it's a document
-            if any(href.endswith(ext) for ext in ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.zip']):
-                asset_path = download_asset(href, assets_dir)
-                if asset_path:
-                    rel_path = asset_path.relative_to(JEKYLL_OUT)
-                    a['href'] = f"/{rel_path}"
+    # Images and links to documents (PDFs, etc)
+    asset_urls: List[str] = []
+    references = []
+    for tag in main_content.find_all(['img', 'a']):
+        if tag.name == 'img' and tag.get('src'):
+            references.append((tag, 'src'))
+        elif (tag.name == 'a' and tag.get('href') and not tag['href'].startswith('http')
+              and tag['href'].endswith(DOCUMENT_EXTENSIONS)):
+            references.append((tag, 'href'))
+    for tag, attr in references:
+        asset_urls.append(tag[attr])
+        tag[attr] = ASSET_TOKEN.format(len(asset_urls) - 1)
     
     # Convert to markdown
-    main_html = str(main_content)
-    markdown_content = md(main_html)
+    with span('markdown', 'crawl'):
+        main_html = str(main_content)
+        markdown_content = md(main_html)
     
     # Clean up markdown
     markdown_content = re.sub(r'\n\n+', '\n\n', markdown_content)  # Remove excessive blank lines
     
-    return markdown_content.strip(), page_title
+    return fingerprint, markdown_content.strip(), page_title, asset_urls
 
-def crawl_page(url: str, suggested_title: Optional[str] = None) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+def stored_paths(asset_urls: List[str]) -> List[Optional[str]]:
     """
-    Crawl a single page.
-    Returns: (page_content_markdown, page_title, filename)
+    Download (or revalidate) a page's assets, each once per run and in
+    parallel; returns their site paths, None for assets that failed
+    """
+    for asset_url in asset_urls:
+        if asset_url not in asset_downloads:
+            asset_downloads[asset_url] = engine.submit(download_asset, asset_url)
+    
+    local_paths = []
+    with span('wait_assets', 'crawl'):
+        for asset_url in asset_urls:
+            asset_path = asset_downloads[asset_url].result()
+            local_paths.append(store.site_path(asset_path) if asset_path else None)
+    return local_paths
+
+def localize_assets(markdown_content: str, asset_urls: List[str]) -> Tuple[str, Dict[str, Optional[str]]]:
+    """
+    Download a page's assets and replace their placeholder tokens with the
+    local copies in one pass; assets that fail keep their original URL.
+    Returns the markdown and asset URL → site path (None if it failed)
+    """
+    local_paths = stored_paths(asset_urls)
+    markdown_content = ASSET_TOKEN_RE.sub(
+        lambda m: local_paths[int(m.group(1))] or asset_urls[int(m.group(1))], markdown_content)
+    return markdown_content, dict(zip(asset_urls, local_paths))
+
+def assets_changed(assets: Dict[str, Optional[str]]) -> bool:
+    """
+    Revalidate the assets an unchanged page was converted with; True if one
+    of them now has a different blob, or downloads after failing last time.
+    An asset that fails now keeps the copy the page already links to
+    """
+    asset_urls = sorted(assets)
+    return any(path is not None and path != assets[asset_url]
+               for asset_url, path in zip(asset_urls, stored_paths(asset_urls)))
+
+def previous_fingerprint(url: str, fingerprints: Dict[str, Dict], force: bool = False,
+                         suggested_title: Optional[str] = None) -> Optional[str]:
+    """
+    The fingerprint to compare a page with, if its backup and Jekyll page
+    still exist, the page would keep its title and its assets are recorded
+    """
+    previous = fingerprints.get(url)
+    if (force or not previous or 'assets' not in previous
+            or not (MIRROR_DIR / backup_name(url)).exists()
+            or not (PAGES_OUT / f"{previous['filename']}.md").exists()
+            or (suggested_title and previous['title'] != suggested_title)):
+        return None
+    return previous['fingerprint']
+
+def submit_conversion(pool: Optional[ProcessPoolExecutor], *args) -> Future:
+    """Run process_html_for_jekyll on the process pool, or right away without one"""
+    if pool:
+        return pool.submit(process_html_for_jekyll, *args)
+    converted = Future()
+    try:
+        converted.set_result(process_html_for_jekyll(*args))
+    except Exception as e:
+        converted.set_exception(e)
+    return converted
+
+def crawl_page(url: str, html: str, converted,
+               suggested_title: Optional[str] = None,
+               fingerprints: Optional[Dict[str, Dict]] = None) -> Tuple[Optional[str], Optional[str], Optional[str], bool]:
+    """
+    Finish a page fetched by the frontier, given the result of
+    process_html_for_jekyll() for it.
+    Pages whose content fingerprint matched the previous run are not
+    reconverted (and their backup and Jekyll page are left untouched)
+    unless one of their assets changed; `fingerprints` is updated in place
+    for pages that were converted.
+    Returns: (page_content_markdown, page_title, filename, unchanged)
     """
     try:
         print(f"\n🔄 Crawling: {url}")
-        response = session.get(url, timeout=15)
-        response.raise_for_status()
+        fingerprint, markdown_content, page_title, asset_urls = converted.result()
+        
+        # Skip unchanged content, unless an image or document changed on the site
+        if markdown_content is None:
+            previous = fingerprints[url]
+            if not assets_changed(previous['assets']):
+                print(f"  ⏭️  Unchanged: {previous['filename']}.md")
+                return None, previous['title'], previous['filename'], True
+            print(f"  🔁 Assets changed: reconverting {previous['filename']}.md")
+            fingerprint, markdown_content, page_title, asset_urls = process_html_for_jekyll(
+                html, suggested_title)
         
         # Save backup
         safe_mkdir(MIRROR_DIR)
-        page_id = re.search(r'page_id=(\d+)', url)
-        if page_id:
-            backup_file = MIRROR_DIR / f"page_{page_id.group(1)}.html"
-        else:
-            backup_file = MIRROR_DIR / "index.html"
-        
-        backup_file.write_text(response.text, encoding='utf-8')
+        backup_file = MIRROR_DIR / backup_name(url)
+        with span('write_backup', 'crawl'):
+            backup_file.write_text(html, encoding='utf-8')
         print(f"  ✓ Backup saved: {backup_file.name}")
+        print(f"  Page title extracted: {page_title}")
         
-        # Process content
-        markdown_content, page_title = process_html_for_jekyll(response.text, url, 0)
+        # Download assets
+        markdown_content, assets = localize_assets(markdown_content, asset_urls)
         
         # Use suggested title if provided
         if suggested_title:
@@ -259,20 +319,27 @@ def crawl_page(url: str, suggested_title: Optional[str] = None) -> Tuple[Optiona
         if page_title:
             filename = sanitize_filename(page_title)
         else:
-            page_id = re.search(r'page_id=(\d+)', url)
-            filename = f"page_{page_id.group(1)}" if page_id else "home"
+            filename = Path(backup_name(url)).stem.replace('index', 'home')
+        
+        if fingerprints is not None:
+            fingerprints[url] = {
+                'fingerprint': fingerprint,
+                'title': page_title,
+                'filename': filename,
+                'assets': assets,
+            }
         
         print(f"  ✓ Converted to markdown")
         print(f"  ✓ Page title: {page_title}")
         print(f"  ✓ Filename: {filename}.md")
         
-        return markdown_content, page_title, filename
+        return markdown_content, page_title, filename, False
         
     except Exception as e:
         print(f"  ✗ Error crawling {url}: {e}")
-        return None, None, None
+        return None, None, None, False
 
-def create_jekyll_page(content: str, title: str, filename: str) -> Path:
+def create_jekyll_page(content: str, title: str, filename: str, original_url: str) -> Path:
     """Create a Jekyll markdown page with front matter"""
     safe_mkdir(PAGES_OUT)
     
@@ -280,6 +347,7 @@ def create_jekyll_page(content: str, title: str, filename: str) -> Path:
     front_matter = f"""---
 layout: default
 title: {title}
+original_url: {original_url}
 ---
 
 {content}
@@ -287,7 +355,8 @@ title: {title}
     
     # Write file
     page_path = PAGES_OUT / f"{filename}.md"
-    page_path.write_text(front_matter, encoding='utf-8')
+    with span('write_page', 'crawl'):
+        page_path.write_text(front_matter, encoding='utf-8')
     print(f"  ✓ Jekyll page created: {page_path.relative_to(WORKSPACE)}")
     
     return page_path
@@ -304,7 +373,41 @@ def update_config():
     config_path.write_text(config_content, encoding='utf-8')
     print(f"✓ Updated Jekyll config")
 
-def main():
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Crawl WordPress pages and convert them to Jekyll.')
+    parser.add_argument('--force', action='store_true',
+                        help='reconvert every page, even if its content is unchanged')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'requests in flight at once (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                        help=f'requests per second per host, 0 = unlimited (default: {DEFAULT_RATE})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='fetch everything again instead of using the HTTP cache')
+    parser.add_argument('--start-url', default=START_URL,
+                        help=f'page to start discovering links from (default: {START_URL})')
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                        help=f'link depth to follow from the start URL (default: {DEFAULT_MAX_DEPTH})')
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help=f'stop after this many pages (default: {DEFAULT_MAX_PAGES})')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='worker processes for HTML conversion (0 = one per CPU core)')
+    add_tracing_arguments(parser)
+    args = parser.parse_args(argv)
+    with tracing_run(args, 'crawl'):
+        crawl(args)
+
+def crawl(args: argparse.Namespace):
+    """Crawl from args.start_url, convert changed pages and write the manifest"""
+    global engine, store, BASE_URL
+    
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    start_url = normalize_url(args.start_url)
+    BASE_URL = f"{urlparse(start_url).scheme}://{urlparse(start_url).netloc}"
+    cache = None if args.no_cache else HttpCache(HTTP_CACHE_DIR)
+    engine = CrawlEngine(concurrency=args.concurrency, rate=args.rate, cache=cache)
+    store = AssetStore(JEKYLL_OUT)
+    asset_downloads.clear()
+
     print("=" * 60)
     print("WordPress to Jekyll Converter")
     print("=" * 60)
@@ -320,23 +423,83 @@ def main():
     print(f"  - Backups: {MIRROR_DIR.relative_to(WORKSPACE)}")
     
     # Crawl pages
-    print(f"\n📥 Starting to crawl {len(PAGES_TO_CRAWL)} pages...")
+    # Seed with the start URL and every page the last crawl found
+    previous = load_manifest(URL_MANIFEST).get('pages', [])
+    seeds = [(start_url, 0)] + [
+        (page['url'], page['depth']) for page in previous
+        if urlparse(page['url']).netloc == urlparse(start_url).netloc
+    ]
+    frontier = Frontier(engine, seeds, max_depth=args.max_depth, max_pages=args.max_pages)
+    
+    print(f"\n📥 Crawling from {start_url} (max depth {args.max_depth}, {len(seeds) - 1} known pages)...")
     print("=" * 60)
     
     created_pages = []
+    unchanged_pages = []
     failed_pages = []
+    manifest_pages = []
+    used_filenames: Dict[str, str] = {}
+    fingerprints = load_fingerprints()
     
-    for url, suggested_title in PAGES_TO_CRAWL:
-        content, title, filename = crawl_page(url, suggested_title)
+    def finish(url, depth, html, suggested_title, converted):
+        content, title, filename, unchanged = crawl_page(url, html, converted, suggested_title, fingerprints)
         
-        if content and title and filename:
-            create_jekyll_page(content, title, filename)
+        # Different pages with the same title must not overwrite each other
+        if filename and used_filenames.get(filename, url) != url:
+            filename = f"{filename}-{Path(backup_name(url)).stem}"
+            if url in fingerprints:
+                fingerprints[url]['filename'] = filename
+        if filename:
+            used_filenames[filename] = url
+        
+        if unchanged:
+            unchanged_pages.append((filename, title))
+        elif content and title and filename:
+            create_jekyll_page(content, title, filename, url)
             created_pages.append((filename, title))
         else:
             failed_pages.append(url)
+            return
         
-        # Be respectful to the server
-        time.sleep(2)
+        manifest_pages.append({
+            'url': url,
+            'page_id': page_id_of(url),
+            'file': backup_name(url),
+            'depth': depth,
+            'title': title,
+            'page': f"{filename}.md",
+        })
+    
+    # Pages arrive as they are fetched; links are followed while worker
+    # processes convert them. Pages are finished in the order they arrived,
+    # so logs and file names do not depend on --jobs.
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    pending = deque()
+    for url, depth, response in frontier.crawl():
+        suggested_title = 'Home' if url == start_url else None
+        converted = submit_conversion(pool, response.text, suggested_title,
+                                      previous_fingerprint(url, fingerprints, args.force,
+                                                           suggested_title))
+        pending.append((url, depth, response.text, suggested_title, converted))
+        while len(pending) > jobs * 2 or (pending and pending[0][-1].done()):
+            finish(*pending.popleft())
+    while pending:
+        finish(*pending.popleft())
+    if pool:
+        pool.shutdown()
+    
+    engine.close()
+    store.save()
+    failed_pages += sorted(frontier.failed)
+    
+    # The manifest seeds the next crawl and tells convert_to_jekyll.py what to convert
+    write_manifest(URL_MANIFEST, BASE_URL, manifest_pages)
+    print(f"\n🗺️  URL manifest: {len(manifest_pages)} pages → {URL_MANIFEST.relative_to(WORKSPACE)}")
+    if frontier.blocked:
+        print(f"🤖 Skipped {len(frontier.blocked)} URLs disallowed by robots.txt")
+    
+    # Only record fingerprints once their pages have been written
+    save_fingerprints(fingerprints)
     
     # Update config
     update_config()
@@ -346,6 +509,9 @@ def main():
     print("✅ Conversion Complete!")
     print("=" * 60)
     print(f"✓ Successfully created: {len(created_pages)} pages")
+    print(f"⏭️  Unchanged (skipped): {len(unchanged_pages)} pages")
+    engine.report()
+    store.report()
     print(f"✗ Failed: {len(failed_pages)} pages")
     
     if created_pages:
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Concurrent, rate-limited HTTP fetching for the crawl scripts.
+
+Requests run on a thread pool with at most `concurrency` of them in flight,
+and a token bucket per host caps the request rate (a burst of `burst`
+requests, then `rate` requests per second), so pages and their assets are
+fetched in parallel while the crawl stays polite to www.fttt.org.tw.
+
+download() streams a response straight to disk: chunks go to <file>.part,
+which is fsynced and atomically renamed into place, so memory stays flat
+for large PDFs/ZIPs and a killed process never leaves a half-written file.
+An interrupted download keeps its .part and resumes with a Range request
+next time.
+
+Given an HttpCache (see http_cache.py), get() skips requests for copies that
+are still fresh and revalidates stale ones with conditional requests.
+
+Nothing in here is specific to the WordPress site, so the engine can be
+pointed at a local stub server (python3 -m http.server) for testing.
+
+Usage:
+  from crawl_engine import CrawlEngine
+
+  with CrawlEngine(concurrency=4, rate=2.0, cache=HttpCache(cache_dir)) as engine:
+      futures = [engine.submit(engine.get, url) for url in urls]
+      pages = [f.result() for f in futures]
+  engine.report()
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+import requests
+from http_cache import CachedResponse, HttpCache, response_charset
+from pipeline_tracing import span
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 2.0      # requests per second, per host
+DEFAULT_BURST = 4
+DEFAULT_TIMEOUT = 15
+
+# Streaming downloads
+CHUNK_SIZE = 64 * 1024
+MAX_DOWNLOAD_BYTES = 200 * 1024 * 1024
+RESUME_MIN_BYTES = 1024 * 1024    # keep .part files at least this big for resuming
+
+_print_lock = threading.Lock()
+
+def log(message: str):
+    """print() that does not interleave lines written from pool threads"""
+    with _print_lock:
+        print(message, flush=True)
+
+class DownloadTooLarge(Exception):
+    """A download exceeded its max_bytes guard"""
+
+class TokenBucket:
+    """Allow `burst` requests at once, refilled at `rate` requests per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request may be sent (rate <= 0 means unlimited)"""
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve a token; a negative balance is the queue of waiting callers
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+class CrawlStats:
+    """Thread-safe request and byte counters"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.requests: Dict[str, int] = {}
+        self.cached: Dict[str, int] = {'fresh': 0, 'revalidated': 0}
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, size: int, from_cache: Optional[str] = None):
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.bytes += size
+            if from_cache:
+                self.cached[from_cache] += 1
+
+    def report(self):
+        """Print pages/sec and bytes/sec since the engine was created"""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        pages = self.requests.get('page', 0)
+        others = ', '.join(f"{kind}: {n}" for kind, n in sorted(self.requests.items()) if kind != 'page')
+        print(f"📊 Fetched {pages} pages{' (' + others + ')' if others else ''} "
+              f"({self.bytes / 1e6:.1f} MB) in {elapsed:.1f}s")
+        print(f"   {pages / elapsed:.2f} pages/s, {self.bytes / elapsed / 1024:.1f} KB/s")
+        if any(self.cached.values()):
+            print(f"   {self.cached['fresh']} fresh in cache (no request), "
+                  f"{self.cached['revalidated']} not modified (304)")
+
+class CrawlEngine:
+    """Thread pool + per-host rate limiting around requests"""
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST, timeout: float = DEFAULT_TIMEOUT,
+                 cache: Optional[HttpCache] = None):
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.cache = cache
+        self.stats = CrawlStats()
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='crawl')
+        # Caps requests in flight, including ones made outside the pool
+        self.slots = threading.BoundedSemaphore(self.concurrency)
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def session(self) -> requests.Session:
+        """One requests.Session (connection pool) per thread"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({'User-Agent': USER_AGENT})
+            self.local.session = session
+        return session
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def get(self, url: str, kind: str = 'page', local_copy: Optional[Path] = None, **kwargs):
+        """
+        Rate-limited GET. The body is read before returning, so its size
+        is counted; `kind` ('page', 'asset', ...) groups the stats.
+
+        With a cache, a fresh cached copy is returned without a request and
+        a stale one is revalidated; such results are CachedResponses with
+        `from_cache` set. `local_copy` is a file that already holds the body
+        (a downloaded asset): only its validators are cached, it is
+        revalidated only while it exists, and cached results have no content.
+        """
+        entry, body = self._cache_entry(url, local_copy)
+        if entry and self.cache.is_fresh(entry):
+            self.stats.record(kind, 0, 'fresh')
+            return CachedResponse(url, entry, body, 'fresh')
+        if entry:
+            kwargs['headers'] = {**self.cache.conditional_headers(entry), **kwargs.get('headers', {})}
+
+        with span('rate_limit', 'crawl'):
+            self.bucket(url).acquire()
+        kwargs.setdefault('timeout', self.timeout)
+        with self.slots, span(f'fetch_{kind}', 'crawl', url=url):
+            response = self.session().get(url, **kwargs)
+            size = len(response.content)
+        # Decode .text like a CachedResponse of the same page would
+        response.encoding = response_charset(response.headers)
+
+        if entry and response.status_code == 304:
+            entry = self.cache.revalidated(url, entry, response)
+            self.stats.record(kind, size, 'revalidated')
+            return CachedResponse(url, entry, body, 'revalidated')
+
+        self.stats.record(kind, size)
+        if self.cache is not None and response.status_code == 200:
+            self.cache.store(url, response, None if local_copy is not None else response.content)
+        return response
+
+    def download(self, url: str, dest: Path, kind: str = 'asset',
+                 max_bytes: int = MAX_DOWNLOAD_BYTES, local_copy: Optional[Path] = None) -> str:
+        """
+        Stream url to dest through dest.part and an atomic rename.
+
+        With a cache, an existing dest (or `local_copy`, a copy of the body
+        kept elsewhere) is treated like get(local_copy=dest): when it is
+        fresh or not modified, dest is left alone.
+        A .part left by an interrupted download is resumed with Range and
+        If-Range, so a file that changed meanwhile is fetched whole.
+        Raises DownloadTooLarge (and removes the partial file) past
+        max_bytes.
+
+        Returns: 'downloaded', 'fresh' or 'revalidated'
+        """
+        entry, _ = self._cache_entry(url, local_copy or dest)
+        if entry and self.cache.is_fresh(entry):
+            self.stats.record(kind, 0, 'fresh')
+            return 'fresh'
+
+        # Offsets must be in bytes of the file itself, not of a gzip stream
+        headers = {'Accept-Encoding': 'identity'}
+        if entry:
+            headers.update(self.cache.conditional_headers(entry))
+        part = dest.with_name(dest.name + '.part')
+        part_meta = dest.with_name(dest.name + '.part.json')
+        offset = 0
+        validator = self._resume_validator(url, part, part_meta)
+        if validator:
+            offset = part.stat().st_size
+            headers.update({'Range': f"bytes={offset}-", 'If-Range': validator})
+
+        with span('rate_limit', 'crawl'):
+            self.bucket(url).acquire()
+        with self.slots, span(f'fetch_{kind}', 'crawl', url=url), self.session().get(
+                url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if entry and response.status_code == 304:
+                self.cache.revalidated(url, entry, response)
+                self.stats.record(kind, 0, 'revalidated')
+                return 'revalidated'
+            if response.status_code == 416:
+                # The partial file is no use; start over next time
+                part.unlink(missing_ok=True)
+                part_meta.unlink(missing_ok=True)
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0
+
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and offset + int(length) > max_bytes:
+                # Also drops the .part of a download being resumed
+                part.unlink(missing_ok=True)
+                part_meta.unlink(missing_ok=True)
+                raise DownloadTooLarge(f"{url}: {offset + int(length)} bytes > {max_bytes}")
+
+            # Only strong validators may be used with If-Range
+            etag = response.headers.get('ETag', '')
+            validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+            resumable = bool(validator) and (response.status_code == 206
+                                             or response.headers.get('Accept-Ranges') == 'bytes')
+
+            size = offset
+            try:
+                with open(part, 'ab' if offset else 'wb') as f:
+                    if resumable:
+                        part_meta.write_text(json.dumps({'url': url, 'validator': validator}),
+                                             encoding='utf-8')
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_bytes:
+                            raise DownloadTooLarge(f"{url}: more than {max_bytes} bytes")
+                        f.write(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+            except BaseException as e:
+                if isinstance(e, DownloadTooLarge) or not resumable or size < RESUME_MIN_BYTES:
+                    part.unlink(missing_ok=True)
+                    part_meta.unlink(missing_ok=True)
+                raise
+
+        os.replace(part, dest)
+        part_meta.unlink(missing_ok=True)
+        _fsync_dir(dest.parent)
+        self.stats.record(kind, size - offset)
+        if self.cache is not None:
+            self.cache.store(url, response, None)
+        return 'downloaded'
+
+    def _resume_validator(self, url: str, part: Path, part_meta: Path) -> Optional[str]:
+        """The validator of a resumable partial download of url, if any"""
+        try:
+            meta = json.loads(part_meta.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            part.unlink(missing_ok=True)
+            return None
+        if meta.get('url') != url or not part.exists():
+            part.unlink(missing_ok=True)
+            part_meta.unlink(missing_ok=True)
+            return None
+        return meta['validator']
+
+    def _cache_entry(self, url: str, local_copy: Optional[Path]):
+        """The cache entry to revalidate, and its body (None for local copies)"""
+        if self.cache is None:
+            return None, None
+        entry = self.cache.lookup(url)
+        if entry is None:
+            return None, None
+        if local_copy is not None:
+            return (entry, None) if local_copy.exists() else (None, None)
+        body = self.cache.body(url) if entry['has_body'] else None
+        return (entry, body) if body is not None else (None, None)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run fn on the pool; only call this from the main thread"""
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        self.stats.report()
+
+def _fsync_dir(path: Path):
+    """Make a rename in path durable (no-op where directories cannot be opened)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
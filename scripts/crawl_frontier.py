@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Breadth-first discovery of the WordPress site's pages.
+
+Starting from the seed URLs, the same-host links of every fetched page are
+normalized (fragments, tracking/nonce parameters, index.php, trailing
+slashes; ?page_id= is kept), deduplicated against a seen-set and queued one
+level deeper, up to max_depth. robots.txt (including Crawl-delay) is
+honored. Pages are fetched on a CrawlEngine and links are queued as soon as
+a page arrives, so discovery overlaps with the fetches still in flight and
+coverage grows without crawling level by level.
+
+The pages found are recorded in url_manifest.json at the workspace root,
+which crawl_and_convert.py (re-crawl seeds) and convert_to_jekyll.py (which
+mirrored files to convert) both read instead of hand-maintained page lists:
+
+  {"version": 1, "base_url": "https://www.fttt.org.tw", "pages": [
+      {"url": "https://www.fttt.org.tw/?page_id=125", "page_id": 125,
+       "file": "page_125.html", "depth": 1, "title": "...", "page": "....md"},
+      ...]}
+"""
+
+import heapq
+import json
+import re
+from concurrent.futures import FIRST_COMPLETED, wait
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from crawl_engine import CrawlEngine, USER_AGENT, log
+from pipeline_tracing import span
+
+MANIFEST_VERSION = 1
+DEFAULT_MAX_DEPTH = 4
+DEFAULT_MAX_PAGES = 1000
+
+# Query parameters that never select different content
+IGNORED_PARAMS = {'replytocom', 'share', 'fbclid', 'gclid', 'ver', '_wpnonce', 'amp'}
+IGNORED_PARAM_PREFIXES = ('utm_',)
+
+# Links that are not pages
+SKIPPED_PATHS = ('/wp-admin', '/wp-login.php', '/wp-json', '/wp-content/', '/wp-includes/',
+                 '/xmlrpc.php', '/feed', '/comments/feed', '/cdn-cgi/')
+SKIPPED_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp', '.tif', '.tiff',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar', '.7z',
+    '.mp3', '.mp4', '.m4a', '.mov', '.avi', '.wav', '.css', '.js', '.json', '.xml', '.txt',
+}
+
+class LinkParser(HTMLParser):
+    """Collect the <a href> targets and <base href> of a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[str] = []
+        self.base: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a' or tag == 'base':
+            href = dict(attrs).get('href')
+            if href:
+                if tag == 'a':
+                    self.links.append(href)
+                elif self.base is None:
+                    self.base = href
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Canonical form of a page URL, or None for non-http(s) links:
+    https://WWW.fttt.org.tw:443/index.php?utm_source=x&page_id=5#top
+    → https://www.fttt.org.tw/?page_id=5
+    """
+    url = urljoin(base, url.strip()) if base else url.strip()
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    if parsed.port and parsed.port != {'http': 80, 'https': 443}[parsed.scheme]:
+        host = f"{host}:{parsed.port}"
+
+    path = re.sub(r'/{2,}', '/', parsed.path or '/')
+    if path.endswith('/index.php'):
+        path = path[:-len('index.php')]
+    # WordPress serves pretty permalinks with a trailing slash
+    if not path.endswith('/') and '.' not in path.rsplit('/', 1)[-1]:
+        path += '/'
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in IGNORED_PARAMS and not k.lower().startswith(IGNORED_PARAM_PREFIXES)
+    )
+    return parsed._replace(scheme=parsed.scheme.lower(), netloc=host, path=path,
+                           params='', query=urlencode(query), fragment='').geturl()
+
+def is_page_url(url: str) -> bool:
+    """Whether a normalized same-host URL can be a content page"""
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+    if path.startswith(SKIPPED_PATHS) or '/feed/' in path:
+        return False
+    if Path(path).suffix in SKIPPED_EXTENSIONS:
+        return False
+    query = dict(parse_qsl(parsed.query))
+    # Search results, previews and feeds
+    return not ({'s', 'preview', 'feed', 'attachment_id'} & set(query))
+
+def page_id_of(url: str) -> Optional[int]:
+    match = re.search(r'[?&]page_id=(\d+)', url)
+    return int(match.group(1)) if match else None
+
+def backup_name(url: str) -> str:
+    """
+    File name of a page in the HTML mirror: page_<id>.html for ?page_id=,
+    index.html for the home page, a slug of the path/query otherwise.
+    """
+    page_id = page_id_of(url)
+    if page_id is not None:
+        return f"page_{page_id}.html"
+    parsed = urlparse(url)
+    if parsed.path in ('', '/') and not parsed.query:
+        return 'index.html'
+    slug = re.sub(r'[^\w]+', '_', f"{parsed.path}?{parsed.query}".strip('/?')).strip('_').lower()
+    return f"path_{slug[:100]}.html"
+
+class Frontier:
+    """Breadth-first, concurrent crawl of one site"""
+
+    def __init__(self, engine: CrawlEngine, seeds: Iterable[Tuple[str, int]],
+                 max_depth: int = DEFAULT_MAX_DEPTH, max_pages: int = DEFAULT_MAX_PAGES,
+                 respect_robots: bool = True):
+        self.engine = engine
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.respect_robots = respect_robots
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self.hosts = set()
+        self.seen: Dict[str, int] = {}     # url → shallowest depth found
+        self.dispatched = set()
+        self.links: Dict[str, List[str]] = {}   # page links of fetched pages
+        self.queue: List[Tuple[int, int, str]] = []
+        self.failed: Dict[str, str] = {}
+        self.blocked: List[str] = []
+        self.sequence = 0
+
+        for url, depth in seeds:
+            url = normalize_url(url)
+            if url:
+                self.hosts.add(urlparse(url).netloc)
+                self.add(url, depth)
+
+    def add(self, url: str, depth: int):
+        """Queue a URL unless it was seen at the same or a shallower depth"""
+        if depth > self.max_depth or self.seen.get(url, depth + 1) <= depth:
+            return
+        self.seen[url] = depth
+        if url in self.links:
+            # Fetched before a shorter path to it was found: its links are shallower too
+            for link in self.links[url]:
+                self.add(link, depth + 1)
+        elif url not in self.dispatched:
+            self.sequence += 1
+            heapq.heappush(self.queue, (depth, self.sequence, url))
+
+    def allowed(self, url: str) -> bool:
+        """Check robots.txt (fetched once per host; Crawl-delay slows the host down)"""
+        if not self.respect_robots:
+            return True
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self.robots:
+            parser = None
+            try:
+                response = self.engine.get(f"{origin}/robots.txt", kind='robots.txt')
+                if response.status_code < 400:
+                    parser = RobotFileParser()
+                    parser.parse(response.text.splitlines())
+                    delay = parser.crawl_delay(USER_AGENT)
+                    if delay:
+                        bucket = self.engine.bucket(url)
+                        bucket.rate = min(bucket.rate, 1 / float(delay)) if bucket.rate > 0 else 1 / float(delay)
+            except Exception as e:
+                log(f"  ⚠️  robots.txt unavailable for {origin}: {e}")
+            self.robots[origin] = parser
+        parser = self.robots[origin]
+        return parser is None or parser.can_fetch(USER_AGENT, url)
+
+    def discover(self, url: str, html: str):
+        """Queue the same-host page links of a fetched page"""
+        parser = LinkParser()
+        with span('discover', 'crawl'):
+            try:
+                parser.feed(html)
+                parser.close()
+            except Exception:
+                pass
+        base = urljoin(url, parser.base) if parser.base else url
+        links = []
+        for href in parser.links:
+            link = normalize_url(href, base)
+            if link and urlparse(link).netloc in self.hosts and is_page_url(link):
+                links.append(link)
+        self.links[url] = links
+        for link in links:
+            self.add(link, self.seen[url] + 1)
+
+    def crawl(self) -> Iterator[Tuple[str, int, object]]:
+        """
+        Fetch pages breadth first (shallowest queued page next), yielding
+        (url, depth, response) as each page arrives. Fetches keep running
+        while the caller processes a page. Failures are kept in self.failed.
+        """
+        pending = {}
+        while self.queue or pending:
+            # Keep the pool busy, shallowest pages first
+            while (self.queue and len(pending) < self.engine.concurrency * 2
+                   and len(self.dispatched) < self.max_pages):
+                depth, _, url = heapq.heappop(self.queue)
+                if url in self.dispatched or self.seen.get(url) != depth:
+                    continue
+                if not self.allowed(url):
+                    self.blocked.append(url)
+                    continue
+                self.dispatched.add(url)
+                pending[self.engine.submit(self.engine.get, url)] = (url, depth)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: pending[f]):
+                url, depth = pending.pop(future)
+                try:
+                    response = future.result()
+                    response.raise_for_status()
+                except Exception as e:
+                    self.failed[url] = str(e)
+                    continue
+
+                # Redirects: keep one URL per page
+                final = normalize_url(getattr(response, 'url', None) or url) or url
+                if final != url:
+                    if final in self.dispatched:
+                        continue
+                    self.dispatched.add(final)
+                    self.seen[final] = min(self.seen.get(final, depth), self.seen[url])
+                    url = final
+
+                if 'html' in response.headers.get('content-type', 'text/html'):
+                    self.discover(url, response.text)
+                    # The page may have been found at a shallower depth while it was in flight
+                    yield url, self.seen[url], response
+
+def load_manifest(path: Path) -> Dict:
+    """Read a URL manifest ({} if there is none)"""
+    try:
+        manifest = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return manifest if manifest.get('version') == MANIFEST_VERSION else {}
+
+def write_manifest(path: Path, base_url: str, pages: List[Dict]):
+    """Write a URL manifest, shallowest pages first"""
+    pages = sorted(pages, key=lambda p: (p['depth'], p['url']))
+    Path(path).write_text(
+        json.dumps({'version': MANIFEST_VERSION, 'base_url': base_url, 'pages': pages},
+                   ensure_ascii=False, indent=2),
+        encoding='utf-8'
+    )
@@ -4,23 +4,41 @@ Enrich Jekyll Site with YouTube Embeds and Images
 ================================================
 
 This script:
-1. Extracts YouTube video IDs from HTML backups
-2. Downloads images from the original website
+1. Extracts YouTube video IDs from HTML backups (indexed once and cached in
+   page_backups/backup_index.json, then matched to the pages by the keys the
+   converters write into the front matter or by the content fingerprint
+   crawl_and_convert.py recorded for the page, falling back to titles)
+2. Downloads images from the original website into the asset store
+   (see asset_store.py)
 3. Updates Markdown pages with YouTube embeds and image references
 
+The embeds and images go into a block between <!-- enrich:begin --> and
+<!-- enrich:end --> comments that each run replaces, and
+jekyll-site/assets_manifest.json records per page what was injected and the
+sha256 of its backup, so reruns only touch pages whose backup changed and
+never duplicate content. Safe to run on a schedule.
+
 Usage:
   python3 enrich_jekyll_site.py
+  python3 enrich_jekyll_site.py --trace trace.json  # spans per stage, see pipeline_tracing.py
 """
 
+import argparse
+import difflib
+import hashlib
 import os
 import re
 import json
+import unicodedata
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 from typing import Dict, List, Optional, Tuple
-import requests
 from bs4 import BeautifulSoup
-import time
+from asset_store import AssetStore
+from crawl_engine import CrawlEngine
+from crawl_frontier import backup_name, load_manifest, normalize_url
+from page_content import content_fingerprint
+from pipeline_tracing import add_tracing_arguments, span, tracing_run
 
 # Configuration
 WORKSPACE = Path('/Users/bird/Code/fttt/static-page')
@@ -29,14 +47,68 @@ JEKYLL_OUT = WORKSPACE / 'jekyll-site'
 PAGES_OUT = JEKYLL_OUT / 'pages'
 ASSETS_OUT = JEKYLL_OUT / 'assets'
 IMAGES_OUT = ASSETS_OUT / 'images'
+URL_MANIFEST = WORKSPACE / 'url_manifest.json'
+
+# One entry per backup (page id, title, canonical URL, media),
+# refreshed only for backups whose size or mtime changed
+BACKUP_INDEX_FILE = BACKUP_DIR / 'backup_index.json'
+BACKUP_INDEX_VERSION = 2
+
+# url → {fingerprint, title, filename} of each page crawl_and_convert.py wrote
+FINGERPRINTS_FILE = BACKUP_DIR / 'content_fingerprints.json'
+
+# Least difflib ratio for matching a page to a backup by a similar title
+FUZZY_TITLE_CUTOFF = 0.8
+
+# Which videos and images were injected into each page, and from which backup
+ASSET_MANIFEST = JEKYLL_OUT / 'assets_manifest.json'
+ASSET_MANIFEST_VERSION = 2
 
 BASE_URL = "https://www.fttt.org.tw"
 
-# Session for requests
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-})
+# Rate-limited, streaming downloads (shared with crawl_and_convert.py)
+engine = CrawlEngine()
+
+# Content-addressed asset storage shared with the other scripts
+store = AssetStore(JEKYLL_OUT)
+
+# Image URL → site path of the stored copy, for this run
+image_paths: Dict[str, str] = {}
+
+# The block injected into each page is marked, so reruns replace it
+ENRICH_BEGIN = '<!-- enrich:begin (generated by scripts/enrich_jekyll_site.py) -->'
+ENRICH_END = '<!-- enrich:end -->'
+ENRICH_BLOCK_RE = re.compile(r'\n*<!-- enrich:begin[^>]*-->.*?<!-- enrich:end -->\n*', re.DOTALL)
+
+# Unmarked sections appended by earlier versions, possibly several times:
+# heading → pattern of the lines under it
+LEGACY_SECTIONS = {
+    '## 影音資源': re.compile(r'(?:<iframe[^\n]*</iframe>\s*)+'),
+    '## 圖片': re.compile(r'(?:!\[[^\]\n]*\]\([^)\n]*\)\s*)+'),
+}
+
+def set_workspace(root: Path, base_url: Optional[str] = None):
+    """Point enrichment at another workspace (e.g. a benchmark's) and site instead of WORKSPACE"""
+    global WORKSPACE, BACKUP_DIR, JEKYLL_OUT, PAGES_OUT, ASSETS_OUT, IMAGES_OUT, URL_MANIFEST
+    global BACKUP_INDEX_FILE, FINGERPRINTS_FILE, ASSET_MANIFEST, BASE_URL, store
+    WORKSPACE = Path(root)
+    BACKUP_DIR = WORKSPACE / 'page_backups'
+    JEKYLL_OUT = WORKSPACE / 'jekyll-site'
+    PAGES_OUT = JEKYLL_OUT / 'pages'
+    ASSETS_OUT = JEKYLL_OUT / 'assets'
+    IMAGES_OUT = ASSETS_OUT / 'images'
+    URL_MANIFEST = WORKSPACE / 'url_manifest.json'
+    BACKUP_INDEX_FILE = BACKUP_DIR / 'backup_index.json'
+    FINGERPRINTS_FILE = BACKUP_DIR / 'content_fingerprints.json'
+    ASSET_MANIFEST = JEKYLL_OUT / 'assets_manifest.json'
+    BASE_URL = base_url or BASE_URL
+    store = AssetStore(JEKYLL_OUT)
+    image_paths.clear()
+
+def is_site_url(url: str) -> bool:
+    """True for absolute URLs on the WordPress site (BASE_URL's host, with or without www.)"""
+    site_host = urlparse(BASE_URL).netloc.lower().removeprefix('www.')
+    return urlparse(url).netloc.lower().removeprefix('www.') == site_host
 
 def safe_mkdir(p: Path):
     """Create directory safely"""
@@ -44,316 +116,508 @@ def safe_mkdir(p: Path):
         p.mkdir(parents=True, exist_ok=True)
         print(f"✓ Created directory: {p}")
 
-def extract_youtube_from_html(html_path: Path) -> List[Dict]:
-    """Extract YouTube embed information from HTML file"""
+def extract_youtube_from_html(soup: BeautifulSoup) -> List[Dict]:
+    """Extract YouTube embed information from a parsed HTML backup"""
     videos = []
 
-    if not html_path.exists():
-        return videos
+    # Find all YouTube iframes
+    iframes = soup.find_all('iframe')
 
-    try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-
-        # Find all YouTube iframes
-        iframes = soup.find_all('iframe')
-
-        for iframe in iframes:
-            src = iframe.get('src', '')
-            title = iframe.get('title', '')
-
-            # Extract video ID from YouTube URL
-            # Pattern: https://www.youtube.com/embed/VIDEO_ID
-            match = re.search(r'youtube\.com/embed/([a-zA-Z0-9_-]+)', src)
-            if match:
-                video_id = match.group(1)
-                videos.append({
-                    'id': video_id,
-                    'url': f'https://www.youtube.com/embed/{video_id}',
-                    'title': title,
-                    'src': src
-                })
-
-        # Also find YouTube watch URLs in the content
-        content = soup.get_text()
-        watch_pattern = r'youtube\.com/watch\?v=([a-zA-Z0-9_-]+)'
-        for match in re.finditer(watch_pattern, content):
+    for iframe in iframes:
+        src = iframe.get('src', '')
+        title = iframe.get('title', '')
+
+        # Extract video ID from YouTube URL
+        # Pattern: https://www.youtube.com/embed/VIDEO_ID
+        match = re.search(r'youtube\.com/embed/([a-zA-Z0-9_-]+)', src)
+        if match:
             video_id = match.group(1)
             videos.append({
                 'id': video_id,
-                'url': f'https://www.youtube.com/watch?v={video_id}',
-                'title': 'YouTube video',
-                'src': None
+                'url': f'https://www.youtube.com/embed/{video_id}',
+                'title': title,
+                'src': src
             })
 
-        # Remove duplicates
-        seen = set()
-        unique_videos = []
-        for v in videos:
-            if v['id'] not in seen:
-                seen.add(v['id'])
-                unique_videos.append(v)
-
-        return unique_videos
-    except Exception as e:
-        print(f"✗ Error extracting YouTube from {html_path}: {e}")
-        return videos
-
-def extract_images_from_html(html_path: Path) -> List[Dict]:
-    """Extract image information from HTML file"""
+    # Also find YouTube watch URLs in the content
+    content = soup.get_text()
+    watch_pattern = r'youtube\.com/watch\?v=([a-zA-Z0-9_-]+)'
+    for match in re.finditer(watch_pattern, content):
+        video_id = match.group(1)
+        videos.append({
+            'id': video_id,
+            'url': f'https://www.youtube.com/watch?v={video_id}',
+            'title': 'YouTube video',
+            'src': None
+        })
+
+    # Remove duplicates
+    seen = set()
+    unique_videos = []
+    for v in videos:
+        if v['id'] not in seen:
+            seen.add(v['id'])
+            unique_videos.append(v)
+
+    return unique_videos
+
+def extract_images_from_html(soup: BeautifulSoup) -> List[Dict]:
+    """Extract image information from a parsed HTML backup"""
     images = []
 
-    if not html_path.exists():
-        return images
-
-    try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-
-        # Find all img tags (excluding icons and very small images)
-        img_tags = soup.find_all('img')
-
-        for img in img_tags:
-            src = img.get('src', '')
-            alt = img.get('alt', '')
+    # Find all img tags (excluding icons and very small images)
+    img_tags = soup.find_all('img')
 
-            # Skip external tracking pixels and data URIs
-            if not src or 'fttt.org.tw' not in src or src.startswith('data:'):
-                continue
-
-            # Skip very tiny images (likely icons)
-            width = img.get('width', '')
-            height = img.get('height', '')
-            if width and height:
-                try:
-                    if int(width) < 50 or int(height) < 50:
-                        continue
-                except:
-                    pass
-
-            images.append({
-                'src': src,
-                'alt': alt,
-                'title': img.get('title', ''),
-                'lazy': img.get('loading') == 'lazy'
-            })
+    for img in img_tags:
+        src = img.get('src', '')
+        alt = img.get('alt', '')
 
-        # Remove duplicates
-        seen = set()
-        unique_images = []
-        for img in images:
-            if img['src'] not in seen:
-                seen.add(img['src'])
-                unique_images.append(img)
+        # Skip external tracking pixels and data URIs
+        if not src or not is_site_url(src) or src.startswith('data:'):
+            continue
 
-        return unique_images
-    except Exception as e:
-        print(f"✗ Error extracting images from {html_path}: {e}")
-        return images
-
-def download_image(url: str, dest_dir: Path) -> Optional[str]:
-    """Download an image and save it locally, return relative path"""
+        # Skip very tiny images (likely icons)
+        width = img.get('width', '')
+        height = img.get('height', '')
+        if width and height:
+            try:
+                if int(width) < 50 or int(height) < 50:
+                    continue
+            except:
+                pass
+
+        images.append({
+            'src': src,
+            'alt': alt,
+            'title': img.get('title', ''),
+            'lazy': img.get('loading') == 'lazy'
+        })
+
+    # Remove duplicates
+    seen = set()
+    unique_images = []
+    for img in images:
+        if img['src'] not in seen:
+            seen.add(img['src'])
+            unique_images.append(img)
+
+    return unique_images
+
+def download_image(url: str) -> Optional[str]:
+    """Download an image into the asset store, return its site path"""
     try:
         # Make full URL if relative
         if not url.startswith('http'):
             url = urljoin(BASE_URL, url)
 
-        # Skip if not from fttt.org.tw
-        if 'fttt.org.tw' not in url:
+        # Skip if not from the WordPress site
+        if not is_site_url(url):
             return None
 
-        # Determine filename
-        parsed_path = urlparse(url).path
-        filename = Path(parsed_path).name
-
-        # If no filename, create one
-        if not filename:
-            filename = f"image_{hash(url) % 10000}.jpg"
-
-        # Check if file already exists
-        dest_path = dest_dir / filename
-        if dest_path.exists():
-            print(f"  ⏭️  Skipped (exists): {filename}")
-            return f"/assets/images/{filename}"
-
-        # Download image
-        response = session.get(url, timeout=10)
-        response.raise_for_status()
-
-        # Save file
-        with open(dest_path, 'wb') as f:
-            f.write(response.content)
-
-        print(f"  ✓ Downloaded: {filename}")
-        return f"/assets/images/{filename}"
+        # Already stored under this URL
+        if url in image_paths:
+            return image_paths[url]
+        blob = store.lookup(url)
+        if blob is not None:
+            print(f"  ⏭️  Skipped (stored): {Path(urlparse(url).path).name}")
+        else:
+            # Stream to disk (atomic rename, so no half-written images)
+            with span('store_image', 'enrich', url=url):
+                blob = store.download(engine, url)
+            print(f"  ✓ Downloaded: {Path(urlparse(url).path).name} → {blob.relative_to(JEKYLL_OUT)}")
+
+        image_paths[url] = store.site_path(blob)
+        return image_paths[url]
 
     except Exception as e:
         print(f"  ✗ Failed to download {url}: {e}")
         return None
 
-def extract_page_title_from_html(html_path: Path) -> str:
-    """Extract page title from HTML"""
+def extract_page_title_from_html(soup: BeautifulSoup) -> str:
+    """Extract page title from a parsed HTML backup"""
+    # Try to get from h1 or h2 with wp-block-heading class
+    for tag in soup.find_all(['h1', 'h2', 'h3']):
+        if 'wp-block-heading' in tag.get('class', []):
+            return tag.get_text(strip=True)
+
+    # Fallback to title tag
+    title = soup.find('title')
+    if title:
+        text = title.get_text(strip=True)
+        # Remove site name suffix
+        text = re.sub(r'\s*–?\s*臺灣福音工作全時間訓練網站\s*$', '', text)
+        return text
+
+    return "Untitled"
+
+def normalize_title(title: str) -> str:
+    """Comparable form of a page title (width, case, punctuation and spacing ignored)"""
+    title = unicodedata.normalize('NFKC', title or '')
+    title = re.sub(r'\s*[–|-]\s*臺灣福音工作全時間訓練網站\s*$', '', title)
+    return re.sub(r'[\W_]+', '', title).casefold()
+
+def extract_page_id_from_html(soup: BeautifulSoup) -> Optional[int]:
+    """WordPress page id from the body class (page-id-N) or the shortlink (?p=N)"""
+    body = soup.find('body')
+    for cls in (body.get('class', []) if body else []):
+        match = re.fullmatch(r'page-id-(\d+)', cls)
+        if match:
+            return int(match.group(1))
+    shortlink = soup.find('link', rel='shortlink')
+    match = re.search(r'[?&]p(?:age_id)?=(\d+)', shortlink.get('href', '')) if shortlink else None
+    return int(match.group(1)) if match else None
+
+def extract_canonical_url(soup: BeautifulSoup) -> Optional[str]:
+    """Normalized <link rel=canonical> (or og:url) of a page"""
+    link = soup.find('link', rel='canonical')
+    url = link.get('href') if link else None
+    if not url:
+        meta = soup.find('meta', property='og:url')
+        url = meta.get('content') if meta else None
+    return normalize_url(url, BASE_URL) if url else None
+
+def index_backup(backup_file: Path) -> Dict:
+    """Everything enrichment needs from one backup, from a single parse"""
+    data = backup_file.read_bytes()
+    with span('parse', 'enrich'):
+        soup = BeautifulSoup(data.decode('utf-8', errors='ignore'), 'html.parser')
+    return {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'page_id': extract_page_id_from_html(soup),
+        'title': extract_page_title_from_html(soup),
+        'canonical': extract_canonical_url(soup),
+        'fingerprint': content_fingerprint(soup),
+        'videos': extract_youtube_from_html(soup),
+        'images': extract_images_from_html(soup),
+    }
+
+def load_backup_index() -> Dict[str, Dict]:
+    """
+    Index every backup in one pass, reusing the cached entries of backups
+    whose size and mtime did not change; returns backup file name → entry
+    """
     try:
-        with open(html_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'html.parser')
-
-        # Try to get from h1 or h2 with wp-block-heading class
-        for tag in soup.find_all(['h1', 'h2', 'h3']):
-            if 'wp-block-heading' in tag.get('class', []):
-                return tag.get_text(strip=True)
-
-        # Fallback to title tag
-        title = soup.find('title')
-        if title:
-            text = title.get_text(strip=True)
-            # Remove site name suffix
-            text = re.sub(r'\s*–?\s*臺灣福音工作全時間訓練網站\s*$', '', text)
-            return text
-
-        return "Untitled"
-    except:
-        return "Untitled"
+        cached = json.loads(BACKUP_INDEX_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        cached = {}
+    cached = cached.get('backups', {}) if cached.get('version') == BACKUP_INDEX_VERSION else {}
+
+    # The crawl knows the URL of each backup
+    urls = {page['file']: page['url'] for page in load_manifest(URL_MANIFEST).get('pages', [])}
+
+    index = {}
+    parsed = 0
+    for backup_file in sorted(BACKUP_DIR.glob('*.html')):
+        stat = backup_file.stat()
+        entry = cached.get(backup_file.name)
+        if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+            try:
+                entry = index_backup(backup_file)
+            except Exception as e:
+                print(f"✗ Error indexing {backup_file.name}: {e}")
+                continue
+            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+            parsed += 1
+        entry['url'] = urls.get(backup_file.name) or entry['canonical']
+        index[backup_file.name] = entry
+
+    BACKUP_INDEX_FILE.write_text(
+        json.dumps({'version': BACKUP_INDEX_VERSION, 'backups': index}, ensure_ascii=False, indent=1),
+        encoding='utf-8'
+    )
+    print(f"✓ Indexed {len(index)} backups ({parsed} parsed, {len(index) - parsed} cached)")
+    return index
+
+def read_front_matter(md_file: Path) -> Dict[str, str]:
+    """The `key: value` lines of a page's front matter"""
+    content = md_file.read_text(encoding='utf-8')
+    match = re.match(r'---\s*\n(.*?)\n---', content, re.DOTALL)
+    front_matter = {}
+    for line in (match.group(1).splitlines() if match else []):
+        key, sep, value = line.partition(':')
+        if sep and key.strip():
+            front_matter[key.strip()] = value.strip().strip('"\'')
+    return front_matter
 
 def generate_youtube_embed_markdown(video_id: str, title: str = "") -> str:
     """Generate Markdown for YouTube embed"""
     # Using HTML for better control of the iframe
     return f'<iframe width="100%" height="480" src="https://www.youtube.com/embed/{video_id}" title="{title}" frameborder="0" allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture; web-share" referrerpolicy="strict-origin-when-cross-origin" allowfullscreen></iframe>\n'
 
-def map_backup_files_to_pages() -> Dict[Path, Path]:
-    """Map backup HTML files to Markdown pages"""
-    mapping = {}
-
-    # Read all markdown files and their titles
-    md_files = list(PAGES_OUT.glob('*.md'))
+def closest_title(title: str, by_title: Dict[str, List[str]]) -> Optional[str]:
+    """The backup whose normalized title is most similar, unless that is ambiguous"""
+    scored = []
+    for candidate in difflib.get_close_matches(title, list(by_title), n=2, cutoff=FUZZY_TITLE_CUTOFF):
+        ratio = difflib.SequenceMatcher(None, title, candidate).ratio()
+        scored.append((ratio, candidate))
+    if not scored or len(by_title[scored[0][1]]) > 1 or (len(scored) > 1 and scored[0][0] == scored[1][0]):
+        return None
+    return by_title[scored[0][1]][0]
 
-    for md_file in md_files:
-        # Read the title from front matter
-        with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            title_match = re.search(r'title:\s*([^\n]+)', content)
-            if title_match:
-                title = title_match.group(1).strip()
+def load_page_fingerprints() -> Dict[str, str]:
+    """Page file name → content fingerprint recorded when crawl_and_convert.py wrote it"""
+    try:
+        recorded = json.loads(FINGERPRINTS_FILE.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return {entry['filename']: entry['fingerprint'] for entry in recorded.values()
+            if entry.get('filename') and entry.get('fingerprint')}
+
+def map_backup_files_to_pages(index: Dict[str, Dict]) -> Dict[Path, Path]:
+    """
+    Map Markdown pages to backup HTML files: by the original_file,
+    original_url or original_page_id the converters put in the front
+    matter or the content fingerprint recorded for the page, then by exact
+    normalized title, and only then by the closest similar title
+    """
+    page_fingerprints = load_page_fingerprints()
+    by_fingerprint = {}
+    by_url = {}
+    by_page_id = {}
+    by_title: Dict[str, List[str]] = {}
+    for name, entry in index.items():
+        for url in (entry['url'], entry['canonical']):
+            if url:
+                by_url.setdefault(url, name)
+        if entry['page_id'] is not None:
+            by_page_id.setdefault(entry['page_id'], name)
+        by_fingerprint.setdefault(entry['fingerprint'], name)
+        by_title.setdefault(normalize_title(entry['title']), []).append(name)
 
-                # Find matching backup file
-                for backup_file in BACKUP_DIR.glob('*.html'):
-                    backup_title = extract_page_title_from_html(backup_file)
-                    if title.lower() in backup_title.lower() or backup_title.lower() in title.lower():
-                        mapping[md_file] = backup_file
-                        break
+    mapping = {}
+    for md_file in sorted(PAGES_OUT.glob('*.md')):
+        front_matter = read_front_matter(md_file)
+        url = front_matter.get('original_url')
+        url = normalize_url(url) if url else None
+        page_id = front_matter.get('original_page_id', '')
+        title = normalize_title(front_matter.get('title', ''))
+
+        # Exact keys first
+        name = front_matter.get('original_file')
+        if name not in index:
+            name = by_url.get(url)
+        if name is None and url and backup_name(url) in index:
+            name = backup_name(url)
+        if name is None and page_id.isdigit():
+            name = by_page_id.get(int(page_id))
+        if name is None and md_file.stem in page_fingerprints:
+            name = by_fingerprint.get(page_fingerprints[md_file.stem])
+        if name is None and len(by_title.get(title, [])) == 1:
+            name = by_title[title][0]
+        if name is None and title:
+            name = closest_title(title, by_title)
+            if name:
+                print(f"  ≈ {md_file.name} → {name} (similar title)")
+
+        if name is None:
+            print(f"  ⚠️  No backup for {md_file.name}")
+            continue
+        mapping[md_file] = BACKUP_DIR / name
 
     return mapping
 
-def process_pages():
-    """Process all pages and add YouTube embeds and images"""
+def render_enrichment(videos: List[Dict], images: List[Tuple[str, str]]) -> str:
+    """The marked block of YouTube embeds and images added to a page ('' if there is nothing)"""
+    if not (videos or images):
+        return ''
+    block = ENRICH_BEGIN + "\n"
+
+    # YouTube videos
+    if videos:
+        block += "\n## 影音資源\n\n"
+        for video in videos:
+            block += generate_youtube_embed_markdown(video['id'], video['title'])
+            block += "\n"
+
+    # Downloaded images
+    if images:
+        block += "\n## 圖片\n\n"
+        for orig_src, local_path in images:
+            filename = Path(orig_src).name
+            block += f"![{filename}]({local_path})\n\n"
+
+    return block + ENRICH_END + "\n"
+
+def current_enrichment(md_content: str) -> str:
+    """The marked block a page already has ('' if none)"""
+    match = ENRICH_BLOCK_RE.search(md_content)
+    return match.group(0).strip('\n') + '\n' if match else ''
+
+def apply_enrichment(md_content: str, block: str) -> str:
+    """
+    Put the block at the end of a page, replacing the marked block of an
+    earlier run (or the unmarked sections appended by older versions)
+    """
+    if ENRICH_BEGIN in md_content:
+        md_content = ENRICH_BLOCK_RE.sub('\n', md_content)
+    else:
+        md_content = strip_legacy_sections(md_content)
+    md_content = md_content.rstrip('\n') + '\n'
+    return md_content + ('\n' + block if block else '')
+
+def strip_legacy_sections(md_content: str) -> str:
+    """
+    Remove the unmarked sections at the end of a page, walking its lines
+    backwards (linear time, unlike a regex anchored at the end)
+    """
+    lines = md_content.split('\n')
+    cut = len(lines)
+    items: List[str] = []
+    for i in range(len(lines) - 1, -1, -1):
+        line = lines[i].strip()
+        if line in LEGACY_SECTIONS:
+            if not all(LEGACY_SECTIONS[line].fullmatch(item) for item in items):
+                break
+            cut, items = i, []
+        elif line.startswith(('<iframe', '![')):
+            items.append(line)
+        elif line:
+            break
+    if cut == len(lines):
+        return md_content
+    return '\n'.join(lines[:cut]).rstrip()
+
+def block_hash(block: str) -> str:
+    return hashlib.sha256(block.encode('utf-8')).hexdigest()
+
+def load_asset_manifest() -> Dict[str, Dict]:
+    """Per-page records of the last run (empty for older manifests)"""
+    try:
+        manifest = json.loads(ASSET_MANIFEST.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('pages', {}) if manifest.get('version') == ASSET_MANIFEST_VERSION else {}
+
+def process_pages() -> Dict[str, Dict]:
+    """
+    Process all pages and add YouTube embeds and images.
+    Pages whose backup and injected block are unchanged since the last run
+    are skipped; returns the manifest records of all mapped pages.
+    """
 
     print("\n" + "=" * 70)
     print("ENRICHING JEKYLL SITE WITH YOUTUBE & IMAGES")
     print("=" * 70)
 
-    # Create image directory
-    safe_mkdir(IMAGES_OUT)
-
-    # Map markdown files to backup HTML
+    # Index the backups once, then map markdown files to them
     print("\n📋 Mapping pages to backups...")
-    page_mapping = map_backup_files_to_pages()
-
-    if not page_mapping:
-        print("✗ No page mappings found. Attempting fallback mapping...")
-        # Fallback: try to match by filename patterns
-        md_files = list(PAGES_OUT.glob('*.md'))
-        backup_files = list(BACKUP_DIR.glob('*.html'))
-
-        for md_file in md_files:
-            # Try to match by checking all backups
-            for backup_file in backup_files:
-                try:
-                    with open(md_file, 'r') as mf:
-                        md_content = mf.read()
-                    with open(backup_file, 'r') as bf:
-                        backup_content = bf.read()
-
-                    # Check if they share significant content
-                    if 'wp-block-heading' in backup_content:
-                        page_mapping[md_file] = backup_file
-                        break
-                except:
-                    pass
+    with span('index_backups', 'enrich'):
+        index = load_backup_index()
+    with span('map_pages', 'enrich'):
+        page_mapping = map_backup_files_to_pages(index)
 
     print(f"✓ Found {len(page_mapping)} page mappings\n")
 
+    previous = load_asset_manifest()
+    records = {}
+    updated = unchanged = 0
+
     # Process each page
     for md_file, backup_file in page_mapping.items():
+        key = md_file.relative_to(JEKYLL_OUT).as_posix()
+        entry = index[backup_file.name]
+        try:
+            md_content = md_file.read_text(encoding='utf-8')
+        except OSError as e:
+            print(f"   ✗ Error reading {md_file.name}: {e}")
+            continue
+
+        # Same backup as last time and our block is still in place: nothing to do
+        record = previous.get(key)
+        if (record and record['backup'] == backup_file.name
+                and record['source_sha256'] == entry['sha256']
+                and record['block_sha256'] == block_hash(current_enrichment(md_content))):
+            records[key] = record
+            unchanged += 1
+            continue
+
         print(f"\n📄 Processing: {md_file.name}")
         print(f"   Backup: {backup_file.name}")
 
-        # Extract YouTube videos
-        videos = extract_youtube_from_html(backup_file)
+        # YouTube videos and images, extracted when the backup was indexed
+        videos = entry['videos']
         print(f"   🎥 Found {len(videos)} YouTube video(s)")
 
-        # Extract images
-        images = extract_images_from_html(backup_file)
+        images = entry['images']
         print(f"   🖼️  Found {len(images)} image(s)")
 
         # Download images
-        downloaded_images = {}
+        downloaded_images = []
         if images:
             print("   ⬇️  Downloading images...")
             for img_info in images:
-                local_path = download_image(img_info['src'], IMAGES_OUT)
+                local_path = download_image(img_info['src'])
                 if local_path:
-                    downloaded_images[img_info['src']] = local_path
-            time.sleep(1)  # Be respectful to the server
+                    downloaded_images.append((img_info['src'], local_path))
 
-        # Update markdown file with embeds and images
-        if videos or downloaded_images:
+        # Replace the page's block with embeds and images (never append a second one)
+        block = render_enrichment(videos, downloaded_images)
+        new_content = apply_enrichment(md_content, block)
+        if new_content != md_content:
             try:
-                with open(md_file, 'r', encoding='utf-8') as f:
-                    md_content = f.read()
-
-                # Add YouTube videos to the end
-                if videos:
-                    md_content += "\n\n## 影音資源\n\n"
-                    for video in videos:
-                        md_content += generate_youtube_embed_markdown(video['id'], video['title'])
-                        md_content += "\n"
-
-                # If images were downloaded, add them
-                if downloaded_images:
-                    md_content += "\n\n## 圖片\n\n"
-                    for orig_src, local_path in downloaded_images.items():
-                        filename = Path(orig_src).name
-                        md_content += f"![{filename}]({local_path})\n\n"
-
-                with open(md_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-
+                with span('write_page', 'enrich'):
+                    md_file.write_text(new_content, encoding='utf-8')
                 print(f"   ✓ Updated: {md_file.name}")
+                updated += 1
             except Exception as e:
                 print(f"   ✗ Error updating {md_file.name}: {e}")
+                continue
 
-def create_asset_manifest():
-    """Create a manifest of all downloaded assets"""
+        records[key] = {
+            'backup': backup_file.name,
+            'source_sha256': entry['sha256'],
+            'block_sha256': block_hash(block),
+            'videos': [{'id': v['id'], 'title': v['title']} for v in videos],
+            'images': [
+                {'src': src, 'path': path,
+                 'sha256': store.urls.get(urljoin(BASE_URL, src), {}).get('sha256')}
+                for src, path in downloaded_images
+            ],
+        }
+
+    print(f"\n✓ Updated {updated} pages, {unchanged} unchanged since the last run")
+    return records
+
+def create_asset_manifest(pages: Dict[str, Dict]):
+    """Create a manifest of the injected videos and images, per page"""
     manifest = {
+        'version': ASSET_MANIFEST_VERSION,
         'generated': str(Path.cwd()),
         'images': [],
-        'videos': []
+        'videos': [],
+        'pages': pages,
     }
 
-    # List all images
+    # List all images: the curated ones and those injected into pages
     if IMAGES_OUT.exists():
         for img in IMAGES_OUT.glob('*'):
             if img.is_file():
                 manifest['images'].append(img.name)
+    manifest['images'] += sorted({img['path'] for page in pages.values() for img in page['images']})
+
+    # Every video once, with the pages it is embedded in
+    videos: Dict[str, Dict] = {}
+    for key, page in sorted(pages.items()):
+        for video in page['videos']:
+            videos.setdefault(video['id'], {**video, 'pages': []})['pages'].append(key)
+    manifest['videos'] = [videos[video_id] for video_id in sorted(videos)]
 
     # Save manifest
-    manifest_path = JEKYLL_OUT / 'assets_manifest.json'
-    with open(manifest_path, 'w', encoding='utf-8') as f:
+    with open(ASSET_MANIFEST, 'w', encoding='utf-8') as f:
         json.dump(manifest, f, indent=2, ensure_ascii=False)
 
-    print(f"\n📋 Asset manifest saved to: {manifest_path}")
+    print(f"\n📋 Asset manifest saved to: {ASSET_MANIFEST}")
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main execution"""
+    parser = argparse.ArgumentParser(description='Add YouTube embeds and images from the HTML backups to the Jekyll pages')
+    add_tracing_arguments(parser)
+    args = parser.parse_args(argv)
+    with tracing_run(args, 'enrich'):
+        enrich()
+
+def enrich():
+    """Enrich the pages, write the asset manifest and save the store"""
 
     # Check if directories exist
     if not BACKUP_DIR.exists():
@@ -365,15 +629,17 @@ def main():
         return
 
     # Process pages
-    process_pages()
+    pages = process_pages()
 
     # Create manifest
-    create_asset_manifest()
+    create_asset_manifest(pages)
+    engine.close()
+    store.save()
 
     print("\n" + "=" * 70)
     print("✅ ENRICHMENT COMPLETE!")
     print("=" * 70)
-    print(f"\n📁 Images saved to: {IMAGES_OUT}")
+    print(f"\n📁 Images saved to: {store.root}")
     print(f"📄 Updated pages: {PAGES_OUT}")
     print("\nNext steps:")
     print("  1. Review the updated pages in jekyll-site/pages/")
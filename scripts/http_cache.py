@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP cache for the crawl scripts (ETag / Last-Modified).
+
+Every URL fetched through a CrawlEngine with a cache gets an entry under the
+cache directory: <sha256 of url>.json holds the validators and freshness,
+<sha256 of url>.body the response body (unless the caller keeps the body
+itself, as download_asset does with the saved file). On the next request:
+
+- a copy that is still fresh is used without any request; freshness comes
+  from Cache-Control max-age / Expires, or, as browsers do, 10% of the time
+  since Last-Modified (at most a day)
+- otherwise the request carries If-None-Match / If-Modified-Since, and a
+  304 Not Modified reuses the stored body without transferring it again
+
+so re-syncing an unchanged mirror costs one small request per URL at most.
+"""
+
+import email.utils
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Heuristic freshness for responses with only Last-Modified (RFC 9111 4.2.2)
+HEURISTIC_FRACTION = 0.1
+MAX_HEURISTIC_AGE = 24 * 3600
+
+# Headers kept with an entry
+STORED_HEADERS = ('content-type', 'etag', 'last-modified', 'cache-control', 'expires', 'date')
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def response_charset(headers) -> str:
+    """
+    Charset to decode a body with: the Content-Type charset, else UTF-8
+    (what the site serves) rather than requests' ISO-8859-1 default for
+    text/*, so live and cached copies of a page decode the same way
+    """
+    charset = re.search(r'charset=["\']?([\w-]+)', headers.get('content-type', ''), re.IGNORECASE)
+    return charset.group(1) if charset else 'utf-8'
+
+def freshness_lifetime(headers: Dict[str, str]) -> float:
+    """Seconds a response may be reused without revalidation"""
+    cache_control = headers.get('cache-control', '').lower()
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return 0
+    max_age = re.search(r'max-age=(\d+)', cache_control)
+    if max_age:
+        return int(max_age.group(1))
+
+    date = _http_date(headers.get('date')) or time.time()
+    expires = _http_date(headers.get('expires'))
+    if expires is not None:
+        return max(0.0, expires - date)
+
+    last_modified = _http_date(headers.get('last-modified'))
+    if last_modified is not None:
+        return min(MAX_HEURISTIC_AGE, max(0.0, (date - last_modified) * HEURISTIC_FRACTION))
+    return 0
+
+class CachedResponse:
+    """The parts of requests.Response the scripts use, served from the cache"""
+
+    def __init__(self, url: str, entry: Dict, content: Optional[bytes], from_cache: str):
+        self.url = url
+        self.status_code = entry['status']
+        self.headers = CaseInsensitiveDict(entry['headers'])
+        self.content = content
+        # 'fresh' (no request sent) or 'revalidated' (304 Not Modified)
+        self.from_cache = from_cache
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        try:
+            return (self.content or b'').decode(response_charset(self.headers), errors='replace')
+        except LookupError:
+            return (self.content or b'').decode('utf-8', errors='replace')
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} for url: {self.url}")
+
+class HttpCache:
+    """On-disk validators (and bodies) keyed by URL"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = self.root / key[:2] / key
+        return base.with_suffix('.json'), base.with_suffix('.body')
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        meta_path, _ = self._paths(url)
+        try:
+            entry = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def body(self, url: str) -> Optional[bytes]:
+        _, body_path = self._paths(url)
+        try:
+            return body_path.read_bytes()
+        except OSError:
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry['stored'] < entry['lifetime']
+
+    def conditional_headers(self, entry: Dict) -> Dict[str, str]:
+        headers = {}
+        if entry['headers'].get('etag'):
+            headers['If-None-Match'] = entry['headers']['etag']
+        if entry['headers'].get('last-modified'):
+            headers['If-Modified-Since'] = entry['headers']['last-modified']
+        return headers
+
+    def store(self, url: str, response: requests.Response, body: Optional[bytes]) -> Optional[Dict]:
+        """
+        Record a 200 response. `body` is None when the caller keeps the body
+        (e.g. a downloaded file). Returns the entry, or None if the response
+        may not be cached or has nothing to revalidate with.
+        """
+        headers = {k: response.headers[k] for k in STORED_HEADERS if k in response.headers}
+        if 'no-store' in headers.get('cache-control', '').lower():
+            return None
+        entry = {
+            'url': url,
+            # A completed Range download is the whole 200 response
+            'status': 200 if response.status_code == 206 else response.status_code,
+            'headers': headers,
+            'stored': time.time(),
+            'lifetime': freshness_lifetime(headers),
+            'has_body': body is not None,
+        }
+        if not (entry['lifetime'] or 'etag' in headers or 'last-modified' in headers):
+            return None
+
+        meta_path, body_path = self._paths(url)
+        if body is not None:
+            self._write(body_path, body)
+        self._write(meta_path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
+
+    def revalidated(self, url: str, entry: Dict, response: requests.Response) -> Dict:
+        """Refresh an entry after a 304 Not Modified"""
+        for k in STORED_HEADERS:
+            if k in response.headers and k != 'content-type':
+                entry['headers'][k] = response.headers[k]
+        entry['stored'] = time.time()
+        entry['lifetime'] = freshness_lifetime(entry['headers'])
+        meta_path, _ = self._paths(url)
+        self._write(meta_path, json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+What a converted page is made of, and its content fingerprint.
+
+Shared by crawl_and_convert.py (which skips reconverting pages whose
+fingerprint did not change) and enrich_jekyll_site.py (which matches
+Markdown pages to their HTML backups by it). Importing this module has no
+side effects: no crawl engine, asset store or files are set up.
+
+Usage:
+  from page_content import content_fingerprint, extract_content
+
+  soup = BeautifulSoup(html, 'html.parser')
+  header_html, main_content, footer_html = extract_content(soup)
+  fingerprint = content_fingerprint(soup)
+"""
+
+import hashlib
+import re
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+# Bump when the conversion changes so every page is reconverted once
+FINGERPRINT_VERSION = 2
+
+# Markup that WordPress regenerates on every request without the content changing
+VOLATILE_ATTRS = {'nonce', 'data-nonce', 'data-wpnonce', 'data-timestamp', 'data-time'}
+VOLATILE_PARAMS = {'ver', 'version', '_wpnonce', 'nonce', '_', 't', 'ts', 'timestamp'}
+URL_ATTRS = {'href', 'src', 'srcset', 'data-src', 'data-srcset', 'action', 'poster'}
+NONCE_RE = re.compile(r'([\w-]*nonce["\']?\s*[:=]\s*)(["\'])[^"\']*\2', re.IGNORECASE)
+TIMESTAMP_RE = re.compile(
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?'
+    r'|\b1[5-9]\d{8}(?:\d{3})?\b'
+)
+
+def extract_page_title_from_h3(soup: BeautifulSoup) -> Optional[str]:
+    """Extract the page title from wp-block-heading class"""
+    # First try to find heading with wp-block-heading class
+    heading = soup.find(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'], class_='wp-block-heading')
+    if heading:
+        title = heading.get_text().strip()
+        return title if title else None
+    
+    # Fallback to first h1
+    h1 = soup.find('h1')
+    if h1 and h1.get('class') is None:  # Skip site title h1s
+        title = h1.get_text().strip()
+        return title if title else None
+    
+    # Fallback to h2
+    h2 = soup.find('h2')
+    if h2:
+        title = h2.get_text().strip()
+        return title if title else None
+    
+    return None
+
+def extract_content(soup: BeautifulSoup) -> Tuple[str, BeautifulSoup]:
+    """
+    Extract main content while preserving structure.
+    Returns (header_html, main_content_soup, footer_html)
+    """
+    # Extract header
+    header = soup.find('header')
+    header_html = str(header) if header else ""
+    
+    # Extract footer
+    footer = soup.find('footer')
+    footer_html = str(footer) if footer else ""
+    
+    # Extract main content
+    main = soup.find('main')
+    if not main:
+        main = soup.find('div', class_='content')
+    if not main:
+        main = soup.find('article')
+    if not main:
+        # Fallback: find the main content area
+        main = soup.find('div', id='content')
+    
+    return header_html, main if main else soup, footer_html
+
+def extract_page_title(soup: BeautifulSoup) -> Optional[str]:
+    """Extract the page title from the headings, falling back to the title tag"""
+    page_title = extract_page_title_from_h3(soup)
+
+    if not page_title:
+        # Fallback to page title tag
+        title_tag = soup.find('title')
+        if title_tag:
+            page_title = title_tag.get_text().strip()
+            # Remove site name if present
+            page_title = re.sub(r'\s*[-|]\s*.*$', '', page_title)
+
+    return page_title
+
+def strip_volatile_params(url: str) -> str:
+    """Drop cache-busting and nonce query parameters (?ver=6.4.2, _wpnonce=...) from a URL"""
+    parsed = urlparse(url)
+    if not parsed.query:
+        return url
+    query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+             if k.lower() not in VOLATILE_PARAMS]
+    return parsed._replace(query=urlencode(query)).geturl()
+
+def normalize_attr(name: str, value) -> str:
+    """Normalize an attribute value for fingerprinting"""
+    if isinstance(value, list):
+        value = ' '.join(value)
+    if name in URL_ATTRS:
+        if name.endswith('srcset'):
+            # "url 300w, url 768w"
+            value = ', '.join(
+                ' '.join([strip_volatile_params(parts[0])] + parts[1:])
+                for parts in (c.split() for c in value.split(',')) if parts
+            )
+        else:
+            value = strip_volatile_params(value.strip())
+    return scrub_volatile_text(value)
+
+def scrub_volatile_text(text: str) -> str:
+    """Blank out nonces and timestamps embedded in attribute values and scripts"""
+    text = NONCE_RE.sub(r'\1\2\2', text)
+    return TIMESTAMP_RE.sub('', text)
+
+def _fingerprint_node(node, digest):
+    """Feed one node of the content tree into the hash, depth first"""
+    if isinstance(node, Tag):
+        attrs = ' '.join(
+            f'{name}="{normalize_attr(name, value)}"'
+            for name, value in sorted(node.attrs.items())
+            if name.lower() not in VOLATILE_ATTRS
+        )
+        digest.update(f'<{node.name} {attrs}>'.encode('utf-8'))
+        for child in node.children:
+            _fingerprint_node(child, digest)
+        digest.update(f'</{node.name}>'.encode('utf-8'))
+    elif isinstance(node, Comment):
+        # Cache plugins stamp "generated in 0.42s on <date>" comments
+        return
+    elif isinstance(node, NavigableString):
+        text = str(node)
+        if node.parent is not None and node.parent.name in ('script', 'style'):
+            text = scrub_volatile_text(text)
+        digest.update(text.encode('utf-8'))
+
+def content_fingerprint(soup: BeautifulSoup) -> str:
+    """
+    Fingerprint the part of a page that ends up in the Jekyll page: the main
+    content region selected by extract_content() plus the page title.
+    Header/footer, WordPress nonces, ?ver= parameters and timestamps are
+    ignored, so the fingerprint only changes when the converted page would.
+    It depends on the HTML alone, so a backup gets the same fingerprint as
+    the crawl that saved it.
+    """
+    _, main_content, _ = extract_content(soup)
+    digest = hashlib.sha256()
+    digest.update(f"{FINGERPRINT_VERSION}\n".encode('utf-8'))
+    digest.update(f"{extract_page_title(soup) or ''}\n".encode('utf-8'))
+    _fingerprint_node(main_content, digest)
+    return digest.hexdigest()
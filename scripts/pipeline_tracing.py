@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Tracing for the crawl and conversion scripts.
+
+Re-exports span() and traced() from jekyll-site/tracing.py, so the scripts
+and the fallback build record the same Chrome trace events, and adds the
+--trace FILE, --profile FILE and --tracemalloc flags fallback_build.py has.
+Spans cost a single flag check unless --trace is given; worker processes
+started afterwards record theirs too.
+
+Usage:
+  from pipeline_tracing import add_tracing_arguments, span, tracing_run
+
+  add_tracing_arguments(parser)
+  args = parser.parse_args()
+  with tracing_run(args, 'crawl'):
+      with span('parse', 'crawl'):
+          ...
+"""
+
+import argparse
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'jekyll-site'))
+
+import tracing
+from tracing import span, traced
+
+__all__ = ['add_tracing_arguments', 'span', 'traced', 'tracing_run']
+
+def add_tracing_arguments(parser: argparse.ArgumentParser):
+    """The --trace, --profile and --tracemalloc flags"""
+    parser.add_argument('--trace', metavar='FILE', default=None,
+                        help='write a Chrome trace-event JSON of the run and print a per-stage summary')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help='run under cProfile and write the stats to FILE')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='report peak memory and the top allocation sites')
+
+@contextmanager
+def tracing_run(args: argparse.Namespace, name: str):
+    """
+    Run a block as one span named `name`, traced and profiled as the flags
+    ask; the trace is written and summarized when the block ends
+    """
+    if args.trace:
+        tracing.enable()
+
+    with tracing.profiled(args.profile, memory=args.tracemalloc):
+        with span(name, 'main'):
+            yield
+
+    if args.trace:
+        tracing.disable()
+        events = tracing.export(args.trace)
+        tracing.print_summary(events)
+        print(f'📈 Trace written to {args.trace} (open in chrome://tracing or ui.perfetto.dev)')
@@ -0,0 +1,149 @@
+"""
+A local http.server site for the crawl script tests.
+
+StubSite serves byte strings registered per path (including the query) on
+127.0.0.1, answers If-None-Match with 304 and Range / If-Range with 206 like
+the WordPress site, and records every request. A resource can be cut off
+after some bytes once (an interrupted download) or sent without
+Content-Length (a streamed response of unknown size).
+
+Usage:
+  site = StubSite()
+  self.addCleanup(site.close)
+  site.add('/?page_id=5', '<html>...</html>')
+  engine.get(site.url('/?page_id=5'))
+"""
+
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+@dataclass
+class Resource:
+    body: bytes
+    content_type: str = 'text/html; charset=utf-8'
+    headers: Dict[str, str] = field(default_factory=dict)
+    cut_after: Optional[int] = None     # send only this many bytes, once
+    sized: bool = True                  # send Content-Length
+
+    @property
+    def etag(self) -> str:
+        return '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+@dataclass
+class Request:
+    path: str
+    headers: Dict[str, str]
+    time: float
+    status: int = 0
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: 'StubServer'
+    record: Request
+
+    def do_GET(self):
+        site = self.server.site
+        self.record = Request(self.path, dict(self.headers), time.monotonic())
+        with site.lock:
+            site.requests.append(self.record)
+            site.in_flight += 1
+            site.max_in_flight = max(site.max_in_flight, site.in_flight)
+        try:
+            if site.delay:
+                time.sleep(site.delay)
+            self.respond(site.resources.get(self.path))
+        finally:
+            with site.lock:
+                site.in_flight -= 1
+
+    def send_response(self, code, message=None):
+        # Record the status before the headers reach the client, which may
+        # look at the request as soon as it has the response
+        self.record.status = code
+        super().send_response(code, message)
+
+    def respond(self, resource: Optional[Resource]):
+        if resource is None:
+            self.send_error(404)
+            return
+
+        if self.headers.get('If-None-Match') == resource.etag:
+            self.send_response(304)
+            self.send_header('ETag', resource.etag)
+            self.end_headers()
+            return
+
+        status, body = 200, resource.body
+        match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+        if match and self.headers.get('If-Range', resource.etag) == resource.etag:
+            offset = int(match.group(1))
+            if offset >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.end_headers()
+                return
+            status, body = 206, body[offset:]
+
+        self.send_response(status)
+        self.send_header('Content-Type', resource.content_type)
+        self.send_header('ETag', resource.etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range',
+                             f'bytes {len(resource.body) - len(body)}-{len(resource.body) - 1}/{len(resource.body)}')
+        if resource.sized:
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in resource.headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if resource.cut_after is not None:
+            body, resource.cut_after = body[:resource.cut_after], None
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    site: 'StubSite'
+
+class StubSite:
+    """Serves registered resources until close()"""
+
+    def __init__(self):
+        self.resources: Dict[str, Resource] = {}
+        self.requests: List[Request] = []
+        self.lock = threading.Lock()
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = StubServer(('127.0.0.1', 0), StubHandler)
+        self.server.site = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+    def add(self, path: str, body, **options) -> Resource:
+        """Serve body (str or bytes) at path, e.g. '/?page_id=5'"""
+        resource = Resource(body.encode('utf-8') if isinstance(body, str) else body, **options)
+        self.resources[path] = resource
+        return resource
+
+    def requested(self, path: str) -> List[Request]:
+        with self.lock:
+            return [request for request in self.requests if request.path == path]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
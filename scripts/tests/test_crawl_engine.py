@@ -0,0 +1,190 @@
+"""Rate limiting, revalidation and streaming downloads of CrawlEngine, against a local stub site"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawl_engine import RESUME_MIN_BYTES, CrawlEngine, DownloadTooLarge, TokenBucket
+from http_cache import HttpCache
+from stub_server import StubSite
+
+class StubSiteTestCase(unittest.TestCase):
+    """A fresh stub site and temporary directory per test"""
+
+    def setUp(self):
+        self.site = StubSite()
+        self.addCleanup(self.site.close)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def engine(self, **options) -> CrawlEngine:
+        engine = CrawlEngine(**{'rate': 0, **options})
+        self.addCleanup(engine.close)
+        return engine
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=3)
+        started = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.04)
+        for _ in range(4):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 20 - 0.01)
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, burst=1)
+        started = time.monotonic()
+        for _ in range(100):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - started, 0.05)
+
+class RateLimitTest(StubSiteTestCase):
+
+    def test_requests_to_a_host_are_spaced_by_the_rate(self):
+        for i in range(6):
+            self.site.add(f'/?page_id={i}', f'page {i}')
+        engine = self.engine(concurrency=6, rate=10, burst=1)
+        futures = [engine.submit(engine.get, self.site.url(f'/?page_id={i}')) for i in range(6)]
+        self.assertTrue(all(future.result().ok for future in futures))
+
+        times = sorted(request.time for request in self.site.requests)
+        self.assertGreaterEqual(times[-1] - times[0], 5 / 10 - 0.05)
+
+    def test_concurrency_caps_requests_in_flight(self):
+        for i in range(8):
+            self.site.add(f'/?page_id={i}', f'page {i}')
+        self.site.delay = 0.1
+        engine = self.engine(concurrency=2)
+        futures = [engine.submit(engine.get, self.site.url(f'/?page_id={i}')) for i in range(8)]
+        for future in futures:
+            future.result()
+
+        self.assertEqual(self.site.max_in_flight, 2)
+        self.assertEqual(engine.stats.requests, {'page': 8})
+
+class RevalidationTest(StubSiteTestCase):
+
+    def test_not_modified_reuses_the_cached_body(self):
+        resource = self.site.add('/?page_id=5', '<p>訓練</p>')
+        engine = self.engine(cache=HttpCache(self.tmp / 'cache'))
+
+        first = engine.get(self.site.url('/?page_id=5'))
+        second = engine.get(self.site.url('/?page_id=5'))
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.from_cache, 'revalidated')
+        self.assertEqual(second.text, '<p>訓練</p>')
+        requests_made = self.site.requested('/?page_id=5')
+        self.assertEqual([request.status for request in requests_made], [200, 304])
+        self.assertEqual(requests_made[1].headers['If-None-Match'], resource.etag)
+        self.assertEqual(engine.stats.cached['revalidated'], 1)
+
+    def test_changed_page_is_fetched_again(self):
+        self.site.add('/?page_id=5', 'old')
+        engine = self.engine(cache=HttpCache(self.tmp / 'cache'))
+        engine.get(self.site.url('/?page_id=5'))
+
+        self.site.add('/?page_id=5', 'new')
+        response = engine.get(self.site.url('/?page_id=5'))
+
+        self.assertIsNone(getattr(response, 'from_cache', None))
+        self.assertEqual(response.text, 'new')
+
+    def test_fresh_copy_needs_no_request(self):
+        self.site.add('/?page_id=5', 'page', headers={'Cache-Control': 'max-age=3600'})
+        engine = self.engine(cache=HttpCache(self.tmp / 'cache'))
+        engine.get(self.site.url('/?page_id=5'))
+
+        self.assertEqual(engine.get(self.site.url('/?page_id=5')).from_cache, 'fresh')
+        self.assertEqual(len(self.site.requested('/?page_id=5')), 1)
+
+    def test_download_revalidates_the_saved_file(self):
+        self.site.add('/a.pdf', b'%PDF-1.4 ' * 100, content_type='application/pdf')
+        engine = self.engine(cache=HttpCache(self.tmp / 'cache'))
+        dest = self.tmp / 'a.pdf'
+
+        self.assertEqual(engine.download(self.site.url('/a.pdf'), dest), 'downloaded')
+        mtime = dest.stat().st_mtime_ns
+        self.assertEqual(engine.download(self.site.url('/a.pdf'), dest), 'revalidated')
+        self.assertEqual(dest.stat().st_mtime_ns, mtime)
+
+class DownloadTest(StubSiteTestCase):
+
+    def interrupted_download(self, body: bytes) -> Path:
+        """Start a download that the server cuts off halfway; returns its dest"""
+        self.site.add('/big.zip', body, content_type='application/zip', cut_after=len(body) // 2)
+        dest = self.tmp / 'big.zip'
+        with self.assertRaises(requests.RequestException):
+            self.engine().download(self.site.url('/big.zip'), dest)
+        self.assertFalse(dest.exists())
+        return dest
+
+    def test_interrupted_download_resumes_with_range(self):
+        body = os.urandom(3 * RESUME_MIN_BYTES)
+        dest = self.interrupted_download(body)
+        part = dest.with_name(dest.name + '.part')
+        offset = part.stat().st_size
+        self.assertGreaterEqual(offset, RESUME_MIN_BYTES)
+
+        self.assertEqual(self.engine().download(self.site.url('/big.zip'), dest), 'downloaded')
+
+        self.assertEqual(dest.read_bytes(), body)
+        resumed = self.site.requested('/big.zip')[-1]
+        self.assertEqual(resumed.headers['Range'], f'bytes={offset}-')
+        self.assertEqual(resumed.headers['If-Range'], self.site.resources['/big.zip'].etag)
+        self.assertEqual(resumed.status, 206)
+        self.assertFalse(part.exists())
+        self.assertFalse(dest.with_name(dest.name + '.part.json').exists())
+
+    def test_file_changed_since_the_interruption_is_fetched_whole(self):
+        dest = self.interrupted_download(os.urandom(3 * RESUME_MIN_BYTES))
+        changed = os.urandom(3 * RESUME_MIN_BYTES)
+        self.site.add('/big.zip', changed, content_type='application/zip')
+
+        self.assertEqual(self.engine().download(self.site.url('/big.zip'), dest), 'downloaded')
+
+        self.assertEqual(dest.read_bytes(), changed)
+        self.assertEqual(self.site.requested('/big.zip')[-1].status, 200)
+
+    def test_small_partial_download_is_not_kept(self):
+        dest = self.interrupted_download(os.urandom(RESUME_MIN_BYTES))
+        self.assertFalse(dest.with_name(dest.name + '.part').exists())
+
+    def test_max_bytes_from_content_length(self):
+        self.site.add('/big.zip', b'x' * 5000, content_type='application/zip')
+        dest = self.tmp / 'big.zip'
+
+        with self.assertRaises(DownloadTooLarge):
+            self.engine().download(self.site.url('/big.zip'), dest, max_bytes=1000)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+    def test_max_bytes_of_a_resumed_download(self):
+        dest = self.interrupted_download(os.urandom(3 * RESUME_MIN_BYTES))
+        self.assertTrue(dest.with_name(dest.name + '.part').exists())
+
+        with self.assertRaises(DownloadTooLarge):
+            self.engine().download(self.site.url('/big.zip'), dest, max_bytes=2 * RESUME_MIN_BYTES)
+        self.assertEqual(self.site.requested('/big.zip')[-1].status, 206)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+    def test_max_bytes_while_streaming(self):
+        self.site.add('/big.zip', b'x' * 500_000, content_type='application/zip', sized=False)
+        dest = self.tmp / 'big.zip'
+
+        with self.assertRaises(DownloadTooLarge):
+            self.engine().download(self.site.url('/big.zip'), dest, max_bytes=100_000)
+        self.assertEqual(list(self.tmp.iterdir()), [])
+
+if __name__ == '__main__':
+    unittest.main()
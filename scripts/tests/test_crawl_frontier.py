@@ -0,0 +1,123 @@
+"""URL normalization and breadth-first discovery of the Frontier, against a local stub site"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from crawl_engine import CrawlEngine
+from crawl_frontier import Frontier, backup_name, is_page_url, normalize_url
+from stub_server import StubSite
+
+def page(*links: str) -> str:
+    return '<html><body><main>' + ''.join(f'<a href="{link}">link</a>' for link in links) + '</main></body></html>'
+
+class NormalizeUrlTest(unittest.TestCase):
+
+    def test_canonical_forms(self):
+        cases = {
+            'https://WWW.fttt.org.tw:443/index.php?utm_source=x&page_id=5#top': 'https://www.fttt.org.tw/?page_id=5',
+            'http://www.fttt.org.tw:80/': 'http://www.fttt.org.tw/',
+            'http://127.0.0.1:8000/about': 'http://127.0.0.1:8000/about/',
+            'https://www.fttt.org.tw//a//b/?ver=6.4&b=2&a=1': 'https://www.fttt.org.tw/a/b/?a=1&b=2',
+            'https://www.fttt.org.tw/?page_id=5&fbclid=abc&_wpnonce=1': 'https://www.fttt.org.tw/?page_id=5',
+            'https://www.fttt.org.tw/wp-content/uploads/a.pdf': 'https://www.fttt.org.tw/wp-content/uploads/a.pdf',
+        }
+        for url, expected in cases.items():
+            with self.subTest(url=url):
+                self.assertEqual(normalize_url(url), expected)
+
+    def test_relative_links_resolve_against_the_page(self):
+        self.assertEqual(normalize_url('../?page_id=7', 'https://www.fttt.org.tw/a/b/'),
+                         'https://www.fttt.org.tw/a/?page_id=7')
+
+    def test_non_http_links(self):
+        for url in ('mailto:office@fttt.org.tw', 'javascript:void(0)', 'tel:+886', '#top'):
+            with self.subTest(url=url):
+                self.assertIsNone(normalize_url(url))
+
+    def test_page_urls(self):
+        self.assertTrue(is_page_url('https://www.fttt.org.tw/?page_id=5'))
+        self.assertTrue(is_page_url('https://www.fttt.org.tw/about/'))
+        for url in ('https://www.fttt.org.tw/wp-admin/', 'https://www.fttt.org.tw/wp-content/uploads/a.pdf',
+                    'https://www.fttt.org.tw/feed/', 'https://www.fttt.org.tw/?s=訓練',
+                    'https://www.fttt.org.tw/logo.png'):
+            with self.subTest(url=url):
+                self.assertFalse(is_page_url(url))
+
+    def test_backup_names(self):
+        self.assertEqual(backup_name('https://www.fttt.org.tw/?page_id=5'), 'page_5.html')
+        self.assertEqual(backup_name('https://www.fttt.org.tw/'), 'index.html')
+        self.assertEqual(backup_name('https://www.fttt.org.tw/about/'), 'path_about.html')
+
+class FrontierTest(unittest.TestCase):
+    """
+    The stub site: / links to page 1 (three spellings of it) and to links
+    that are not pages; page N links to page N + 1 up to page 5, and page 1
+    also links to page 4
+    """
+
+    def setUp(self):
+        self.site = StubSite()
+        self.addCleanup(self.site.close)
+        self.site.add('/', page('/?page_id=1', '/index.php?page_id=1#comments',
+                                self.site.url('/?page_id=1&utm_source=fb'),
+                                '/wp-admin/', '/wp-content/uploads/a.pdf', 'mailto:a@b',
+                                'https://other.example/?page_id=2'))
+        for n in range(1, 6):
+            links = [f'/?page_id={n + 1}'] if n < 5 else []
+            if n == 1:
+                links.append('/?page_id=4')
+            self.site.add(f'/?page_id={n}', page(*links))
+
+    def crawl(self, **options) -> Frontier:
+        engine = CrawlEngine(rate=0)
+        self.addCleanup(engine.close)
+        frontier = Frontier(engine, [(self.site.url('/'), 0)], **options)
+        self.fetched = {url: depth for url, depth, _ in frontier.crawl()}
+        return frontier
+
+    def test_every_page_is_fetched_once_at_its_shallowest_depth(self):
+        self.crawl()
+
+        self.assertEqual(self.fetched, {
+            self.site.url('/'): 0,
+            self.site.url('/?page_id=1'): 1,
+            self.site.url('/?page_id=2'): 2,
+            self.site.url('/?page_id=4'): 2,
+            self.site.url('/?page_id=3'): 3,
+            self.site.url('/?page_id=5'): 3,
+        })
+        pages = [request.path for request in self.site.requests if request.path != '/robots.txt']
+        self.assertEqual(sorted(pages), sorted(set(pages)))
+        self.assertNotIn('/wp-admin/', pages)
+
+    def test_max_depth(self):
+        self.crawl(max_depth=1)
+        self.assertEqual(self.fetched, {self.site.url('/'): 0, self.site.url('/?page_id=1'): 1})
+
+    def test_max_pages(self):
+        self.crawl(max_pages=3)
+        self.assertEqual(len(self.fetched), 3)
+        self.assertIn(self.site.url('/?page_id=1'), self.fetched)
+
+    def test_robots_txt_is_respected(self):
+        self.site.add('/robots.txt', 'User-agent: *\nDisallow: /?page_id=2\n', content_type='text/plain')
+        frontier = self.crawl()
+
+        self.assertEqual(frontier.blocked, [self.site.url('/?page_id=2')])
+        self.assertNotIn(self.site.url('/?page_id=2'), self.fetched)
+        self.assertEqual(self.site.requested('/?page_id=2'), [])
+        # Page 3 is only linked from page 2
+        self.assertNotIn(self.site.url('/?page_id=3'), self.fetched)
+
+    def test_failed_pages_are_recorded(self):
+        del self.site.resources['/?page_id=4']
+        frontier = self.crawl()
+
+        self.assertIn(self.site.url('/?page_id=4'), frontier.failed)
+        self.assertNotIn(self.site.url('/?page_id=4'), self.fetched)
+
+if __name__ == '__main__':
+    unittest.main()
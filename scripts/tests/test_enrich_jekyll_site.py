@@ -0,0 +1,119 @@
+"""Reruns of enrich_jekyll_site.py leave pages alone unless their backup changed"""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import enrich_jekyll_site
+from crawl_engine import CrawlEngine
+from enrich_jekyll_site import ENRICH_BEGIN
+from stub_server import StubSite
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\0' * 4096 + b'\xff\xd9'
+
+def backup(site: StubSite, video_id: str) -> str:
+    return (
+        '<html><head><title>生命 – 臺灣福音工作全時間訓練網站</title></head>'
+        '<body class="page-template-default page page-id-5"><main>'
+        '<h3 class="wp-block-heading">生命</h3><p>訓練的內容</p>'
+        f'<img src="{site.url("/wp-content/uploads/2024/01/photo.jpg")}" alt="照片" width="800" height="600">'
+        f'<iframe src="https://www.youtube.com/embed/{video_id}" title="見證"></iframe>'
+        '</main></body></html>'
+    )
+
+class EnrichTest(unittest.TestCase):
+
+    def setUp(self):
+        self.site = StubSite()
+        self.addCleanup(self.site.close)
+        self.site.add('/wp-content/uploads/2024/01/photo.jpg', JPEG, content_type='image/jpeg')
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        workspace = Path(tmp.name)
+        (workspace / 'page_backups').mkdir()
+        (workspace / 'jekyll-site' / 'pages').mkdir(parents=True)
+        self.backup = workspace / 'page_backups' / 'page_5.html'
+        self.backup.write_text(backup(self.site, 'abcDEF12345'), encoding='utf-8')
+        self.page = workspace / 'jekyll-site' / 'pages' / '生命.md'
+        self.page.write_text('---\nlayout: default\ntitle: 生命\noriginal_page_id: 5\n---\n\n訓練的內容\n',
+                             encoding='utf-8')
+        enrich_jekyll_site.set_workspace(workspace, self.site.base)
+
+    def enrich(self) -> str:
+        enrich_jekyll_site.engine = CrawlEngine(rate=0)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            enrich_jekyll_site.main([])
+        return output.getvalue()
+
+    def test_first_run_adds_one_block(self):
+        self.assertIn('Updated 1 pages', self.enrich())
+
+        content = self.page.read_text(encoding='utf-8')
+        self.assertEqual(content.count(ENRICH_BEGIN), 1)
+        self.assertIn('https://www.youtube.com/embed/abcDEF12345', content)
+        self.assertIn('](/assets/store/', content)
+        self.assertTrue(content.startswith('---\nlayout: default\ntitle: 生命\n'))
+
+    def test_rerun_changes_nothing(self):
+        self.enrich()
+        content = self.page.read_bytes()
+        mtime = self.page.stat().st_mtime_ns
+        manifest = enrich_jekyll_site.ASSET_MANIFEST.read_bytes()
+
+        self.assertIn('Updated 0 pages, 1 unchanged', self.enrich())
+        self.assertEqual(self.page.read_bytes(), content)
+        self.assertEqual(self.page.stat().st_mtime_ns, mtime)
+        self.assertEqual(enrich_jekyll_site.ASSET_MANIFEST.read_bytes(), manifest)
+        self.assertEqual(len(self.site.requested('/wp-content/uploads/2024/01/photo.jpg')), 1)
+
+    def test_edits_outside_the_block_are_kept(self):
+        self.enrich()
+        content = self.page.read_text(encoding='utf-8')
+        self.page.write_text(content.replace('訓練的內容', '訓練的內容（已修訂）'), encoding='utf-8')
+        self.backup.write_text(backup(self.site, 'xyzXYZ98765'), encoding='utf-8')
+
+        self.enrich()
+
+        content = self.page.read_text(encoding='utf-8')
+        self.assertIn('訓練的內容（已修訂）', content)
+        self.assertEqual(content.count(ENRICH_BEGIN), 1)
+        self.assertIn('embed/xyzXYZ98765', content)
+        self.assertNotIn('embed/abcDEF12345', content)
+
+    def test_removed_block_is_restored(self):
+        self.enrich()
+        enriched = self.page.read_text(encoding='utf-8')
+        self.page.write_text(enriched.split(ENRICH_BEGIN)[0].rstrip('\n') + '\n', encoding='utf-8')
+
+        self.assertIn('Updated 1 pages', self.enrich())
+        self.assertEqual(self.page.read_text(encoding='utf-8'), enriched)
+
+class SiteUrlTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(enrich_jekyll_site, 'BASE_URL', 'https://www.fttt.org.tw')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_site_hosts(self):
+        for url in ('https://www.fttt.org.tw/wp-content/uploads/a.jpg', 'http://fttt.org.tw/a.jpg',
+                    'https://WWW.FTTT.org.tw/a.jpg'):
+            with self.subTest(url=url):
+                self.assertTrue(enrich_jekyll_site.is_site_url(url))
+
+    def test_other_hosts_containing_the_site_host(self):
+        for url in ('https://notfttt.org.tw/a.jpg', 'https://fttt.org.tw.example/a.jpg',
+                    'https://cdn.example/www.fttt.org.tw/a.jpg', '/wp-content/uploads/a.jpg'):
+            with self.subTest(url=url):
+                self.assertFalse(enrich_jekyll_site.is_site_url(url))
+
+if __name__ == '__main__':
+    unittest.main()